@@ -3,38 +3,74 @@ JARVIS AI Model with Groq API Integration
 Free, fast, and powerful AI responses
 """
 
+import asyncio
+import hashlib
+import json
 import os
+import re
+import threading
+import time
 from datetime import datetime
 import random
 
+from cache import TTLCache
+from conversation_store import create_conversation_store
+from context_builder import ContextBuilder
+from metrics import DEPENDENCY_LATENCY
+from logger import get_logger
+
+logger = get_logger('ai.groq')
+
 try:
-    from groq import Groq
+    from groq import Groq, AsyncGroq
     GROQ_AVAILABLE = True
 except ImportError:
     GROQ_AVAILABLE = False
-    print("Groq package not installed. Run: pip install groq")
+    logger.warning("Groq package not installed. Run: pip install groq")
 
 class JarvisAIGroq:
     """AI model using Groq API for intelligent responses"""
     
-    def __init__(self):
+    TASK_MARKER = 'TASK_CREATE:'
+    
+    # Intents whose answers go stale or have side effects - never served from cache
+    UNCACHEABLE_INTENTS = {'time', 'date', 'task'}
+    INTENT_PATTERNS = [
+        ('task', re.compile(r'\b(remind|reminder|schedule|task|meeting|alarm)\b')),
+        ('time', re.compile(r'\b(time|clock|hour|minute)\b')),
+        ('date', re.compile(r'\b(date|today|tomorrow|yesterday|day|week|month|year)\b')),
+    ]
+    
+    def __init__(self, client=None, async_client=None):
         self.api_key = os.getenv('GROQ_API_KEY', '')
         self.model = 'llama-3.3-70b-versatile'  # Updated model (Jan 2025)
-        self.conversation_history = []
-        self.client = None
+        self.conversations = create_conversation_store()
+        self.client = client
+        self.async_client = async_client
+        self.last_stream_stats = None
+        self.response_cache = TTLCache(
+            max_entries=int(os.getenv('GROQ_CACHE_SIZE', '512')),
+            ttl=int(os.getenv('GROQ_CACHE_TTL', '300')),
+            max_bytes=int(os.getenv('GROQ_CACHE_MAX_BYTES', str(1024 * 1024)))
+        )
         
-        if GROQ_AVAILABLE and self.api_key:
+        if self.client is not None or self.async_client is not None:
+            # Injected client(s) (e.g. a local fake for testing)
+            pass
+        elif GROQ_AVAILABLE and self.api_key:
             try:
                 self.client = Groq(api_key=self.api_key)
-                print(f"✅ Groq AI initialized successfully")
+                self.async_client = AsyncGroq(api_key=self.api_key)
+                logger.info("Groq AI initialized successfully")
             except Exception as e:
-                print(f"⚠️ Groq initialization error: {e}")
+                logger.error("Groq initialization error: %s", e)
                 self.client = None
+                self.async_client = None
         else:
             if not GROQ_AVAILABLE:
-                print("⚠️ Groq package not available")
+                logger.warning("Groq package not available")
             if not self.api_key:
-                print("⚠️ GROQ_API_KEY not found in environment")
+                logger.warning("GROQ_API_KEY not found in environment")
         
         # System prompt for JARVIS personality
         self.system_prompt = """You are JARVIS (Just A Rather Very Intelligent System), Tony Stark's AI assistant from Iron Man.
@@ -75,8 +111,17 @@ Examples:
 - "On it like a car bonnet, sir."
 - "I could tell you, but where's the fun in that?"
 """
+        
+        # Fits system prompt + history into a token budget (system prompt is tokenized once)
+        self.context_builder = ContextBuilder(
+            self.system_prompt,
+            budget=int(os.getenv('GROQ_CONTEXT_BUDGET', '1200'))
+        )
+        self.last_prompt_stats = None
+        self.prompt_totals = {'requests': 0, 'prompt_tokens': 0, 'api_prompt_tokens': 0}
+        self._stats_lock = threading.Lock()
     
-    def process_command(self, command):
+    def process_command(self, command, session_id='default'):
         """Process a command using Groq API"""
         
         # If no client, use fallback responses
@@ -84,22 +129,29 @@ Examples:
             return self._fallback_response(command)
         
         try:
-            # Add command to history
-            self.conversation_history.append({
-                'role': 'user',
-                'content': command
-            })
-            
-            # Keep only last 10 messages for context
-            if len(self.conversation_history) > 10:
-                self.conversation_history = self.conversation_history[-10:]
-            
-            # Prepare messages for API
-            messages = [
-                {'role': 'system', 'content': self.system_prompt}
-            ] + self.conversation_history
-            
-            # Call Groq API using the official client
+            return self.complete(command, session_id)
+        except Exception as e:
+            logger.error("Error calling Groq API: %s", e)
+            return self._fallback_response(command)
+    
+    def complete(self, command, session_id='default', superseded=None):
+        """Get a response from Groq, raising on API errors instead of falling back
+        
+        superseded: optional callable; if it is true once the response arrives, another
+        backend has already answered and the response is not added to history.
+        """
+        if not self.client:
+            raise RuntimeError("Groq client is not configured")
+        
+        cache_key = self._cache_key(command, session_id)
+        cached = self._get_cached(command, cache_key, session_id)
+        if cached is not None:
+            return cached
+        
+        messages = self._build_messages(command, session_id)
+        
+        # Call Groq API using the official client
+        with DEPENDENCY_LATENCY.time('groq', 'chat.completions.create'):
             chat_completion = self.client.chat.completions.create(
                 messages=messages,
                 model=self.model,
@@ -108,28 +160,301 @@ Examples:
                 top_p=1,
                 stream=False
             )
+        
+        # Extract response
+        ai_response = chat_completion.choices[0].message.content
+        self._record_usage(chat_completion)
+        
+        # Add to history, unless the caller already took another backend's answer
+        if not (superseded and superseded()):
+            self.conversations.append(session_id, {
+                'role': 'assistant',
+                'content': ai_response
+            })
+        
+        self._store_cached(cache_key, ai_response)
+        return ai_response
+    
+    async def process_command_async(self, command, session_id='default'):
+        """Process a command using the async Groq client, without blocking the event loop"""
+        
+        if not self.client and not self.async_client:
+            return self._fallback_response(command)
+        
+        try:
+            return await self.complete_async(command, session_id)
+        except Exception as e:
+            logger.error("Error calling Groq API: %s", e)
+            return self._fallback_response(command)
+    
+    async def complete_async(self, command, session_id='default', superseded=None):
+        """Async complete(): raises on API errors instead of falling back"""
+        if not self.async_client:
+            if self.client:
+                # Only a sync client is available - keep it off the event loop
+                return await asyncio.to_thread(self.complete, command, session_id, superseded)
+            raise RuntimeError("Groq client is not configured")
+        
+        cache_key = self._cache_key(command, session_id)
+        cached = self._get_cached(command, cache_key, session_id)
+        if cached is not None:
+            return cached
+        
+        messages = self._build_messages(command, session_id)
+        
+        with DEPENDENCY_LATENCY.time('groq', 'chat.completions.create'):
+            chat_completion = await self.async_client.chat.completions.create(
+                messages=messages,
+                model=self.model,
+                temperature=0.8,
+                max_tokens=150,
+                top_p=1,
+                stream=False
+            )
+        
+        ai_response = chat_completion.choices[0].message.content
+        self._record_usage(chat_completion)
+        
+        if not (superseded and superseded()):
+            self.conversations.append(session_id, {
+                'role': 'assistant',
+                'content': ai_response
+            })
+        
+        self._store_cached(cache_key, ai_response)
+        return ai_response
+    
+    def process_command_stream(self, command, session_id='default'):
+        """Stream a response from Groq as it is generated
+        
+        Yields event dicts:
+        - {'type': 'token', 'content': str} for each piece of text
+        - {'type': 'task', 'text': str, 'time': str|None} if a TASK_CREATE marker was found
+        - {'type': 'done', 'response': str, 'ttft_ms': float, 'total_ms': float, 'tokens': int}
+        
+        Text that could be the start of a TASK_CREATE marker, anywhere in the
+        response, is held back until it is clear whether it is one, so markers
+        (and the task details after them) never reach the client as tokens.
+        """
+        start = time.perf_counter()
+        first_token_at = None
+        token_count = 0
+        
+        if not self.client:
+            response = self._fallback_response(command)
+            yield {'type': 'token', 'content': response}
+            yield self._stream_done(response, start, time.perf_counter(), 1)
+            return
+        
+        cache_key = self._cache_key(command, session_id)
+        cached = self._get_cached(command, cache_key, session_id)
+        if cached is not None:
+            yield {'type': 'token', 'content': cached}
+            yield self._stream_done(cached, start, time.perf_counter(), 1)
+            return
+        
+        parts = []
+        held = ''
+        is_task = False
+        requested_at = None
+        
+        try:
+            messages = self._build_messages(command, session_id)
             
-            # Extract response
-            ai_response = chat_completion.choices[0].message.content
+            requested_at = time.perf_counter()
+            stream = self.client.chat.completions.create(
+                messages=messages,
+                model=self.model,
+                temperature=0.8,
+                max_tokens=150,
+                top_p=1,
+                stream=True
+            )
+            
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if not content:
+                    continue
+                
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    DEPENDENCY_LATENCY.labels('groq', 'first_token').observe(first_token_at - requested_at)
+                token_count += 1
+                parts.append(content)
+                
+                if is_task:
+                    continue
+                
+                # Hold back text while it may still turn into the marker
+                text, held, is_task = self._split_marker(held + content)
+                if text:
+                    yield {'type': 'token', 'content': text}
+            
+            if held and not is_task:
+                yield {'type': 'token', 'content': held}
+            
+            ai_response = ''.join(parts)
             
-            # Add to history
-            self.conversation_history.append({
+            self.conversations.append(session_id, {
                 'role': 'assistant',
                 'content': ai_response
             })
             
-            return ai_response
-                
+            self._store_cached(cache_key, ai_response)
+        
         except Exception as e:
-            print(f"Error calling Groq API: {e}")
-            return self._fallback_response(command)
+            logger.error("Error streaming from Groq API: %s", e)
+            if parts:
+                # Keep what was generated: send the held-back tail and record the partial turn
+                if held and not is_task:
+                    yield {'type': 'token', 'content': held}
+                ai_response = ''.join(parts)
+                self.conversations.append(session_id, {
+                    'role': 'assistant',
+                    'content': ai_response
+                })
+            else:
+                ai_response = self._fallback_response(command)
+                yield {'type': 'token', 'content': ai_response}
+                token_count = 1
+        
+        finally:
+            # Whole stream, failed or not; includes the time the caller spends between reads
+            if requested_at is not None:
+                DEPENDENCY_LATENCY.labels('groq', 'chat.completions.create(stream)').observe(
+                    time.perf_counter() - requested_at)
+        
+        task = self._parse_task_marker(ai_response)
+        if task:
+            yield {'type': 'task', 'text': task[0], 'time': task[1]}
+        
+        yield self._stream_done(ai_response, start, first_token_at, token_count)
     
-    def _fallback_response(self, command):
-        """Fallback responses when API is not available"""
-        command_lower = command.lower().strip()
+    def _split_marker(self, text):
+        """Split streamed text into (safe to send, held back, marker found)
         
-        # Greetings
-        if any(word in command_lower for word in ['hello', 'hi', 'hey', 'greetings']):
+        Held back is the marker and everything after it, or a tail of the text
+        that could still grow into the marker.
+        """
+        index = text.find(self.TASK_MARKER)
+        if index >= 0:
+            return text[:index], text[index:], True
+        for start in range(max(0, len(text) - len(self.TASK_MARKER) + 1), len(text)):
+            if self.TASK_MARKER.startswith(text[start:]):
+                return text[:start], text[start:], False
+        return text, '', False
+    
+    def _stream_done(self, response, start, first_token_at, token_count):
+        """Build the final stream event and record timing stats"""
+        end = time.perf_counter()
+        first = first_token_at if first_token_at is not None else end
+        self.last_stream_stats = {
+            'ttft_ms': round((first - start) * 1000, 2),
+            'total_ms': round((end - start) * 1000, 2),
+            'tokens': token_count
+        }
+        return {'type': 'done', 'response': response, **self.last_stream_stats}
+    
+    def _build_messages(self, command, session_id):
+        """Add the command to the session's history and build the message list for the API"""
+        # Add command to history (the store keeps only the last few messages)
+        self.conversations.append(session_id, {
+            'role': 'user',
+            'content': command
+        })
+        
+        # Prepare messages for API, trimmed to the token budget
+        messages, stats = self.context_builder.build(self.conversations.get(session_id))
+        
+        with self._stats_lock:
+            self.last_prompt_stats = stats
+            self.prompt_totals['requests'] += 1
+            self.prompt_totals['prompt_tokens'] += stats['prompt_tokens']
+        
+        return messages
+    
+    def _record_usage(self, chat_completion):
+        """Record the prompt token count reported by the API, if any"""
+        usage = getattr(chat_completion, 'usage', None)
+        prompt_tokens = getattr(usage, 'prompt_tokens', None)
+        if prompt_tokens is None:
+            return
+        
+        with self._stats_lock:
+            if self.last_prompt_stats is not None:
+                self.last_prompt_stats['api_prompt_tokens'] = prompt_tokens
+            self.prompt_totals['api_prompt_tokens'] += prompt_tokens
+    
+    def get_prompt_stats(self):
+        """Get prompt token counts for the last request and running totals"""
+        with self._stats_lock:
+            totals = dict(self.prompt_totals)
+            last = dict(self.last_prompt_stats) if self.last_prompt_stats else None
+        
+        if totals['requests']:
+            totals['avg_prompt_tokens'] = round(totals['prompt_tokens'] / totals['requests'], 1)
+        return {'last': last, 'totals': totals}
+    
+    def _classify_intent(self, normalized):
+        """Rough intent of a normalized command, used for cacheability rules"""
+        for intent, pattern in self.INTENT_PATTERNS:
+            if pattern.search(normalized):
+                return intent
+        return 'conversation'
+    
+    def _cache_key(self, command, session_id):
+        """Cache key for a command in the current conversation window, or None if uncacheable"""
+        normalized = ' '.join(re.sub(r'[^\w\s]', ' ', command.lower()).split())
+        if not normalized or self._classify_intent(normalized) in self.UNCACHEABLE_INTENTS:
+            return None
+        
+        # The window the model would see once this command is added and trimmed
+        history = self.conversations.get(session_id)
+        keep = self.conversations.max_messages - 1
+        window = history[-keep:] if keep > 0 else []
+        window_hash = hashlib.sha1(
+            json.dumps(window, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        return f"{normalized}|{window_hash}"
+    
+    def _get_cached(self, command, cache_key, session_id):
+        """Return a cached response and record the exchange in history, or None"""
+        if cache_key is None:
+            return None
+        
+        cached = self.response_cache.get(cache_key)
+        if cached is None:
+            return None
+        
+        self.conversations.append(
+            session_id,
+            {'role': 'user', 'content': command},
+            {'role': 'assistant', 'content': cached}
+        )
+        return cached
+    
+    def _store_cached(self, cache_key, response):
+        """Cache a response unless it carries a task marker"""
+        if cache_key and response and self.TASK_MARKER not in response:
+            self.response_cache.set(cache_key, response)
+    
+    def get_cache_stats(self):
+        """Get response cache hit/miss/eviction counters"""
+        return self.response_cache.stats()
+    
+    def _parse_task_marker(self, response):
+        """Extract (task, time) from a TASK_CREATE marker, or None"""
+        match = re.search(r'TASK_CREATE:\s*([^|\n]+?)\s*(?:\|\s*TIME:\s*([^\n]*))?\s*$', response, re.MULTILINE)
+        if not match:
+            return None
+        task_time = match.group(2).strip() if match.group(2) else None
+        return match.group(1).strip(), task_time or None
+    
+    def local_response(self, intent):
+        """Answer a locally routed intent (greeting, time, date, status) without the API"""
+        if intent == 'greeting':
             responses = [
                 "Good evening, sir. JARVIS at your service. All systems operational.",
                 "Ah, hello sir. I was just running some diagnostics. Everything's in order.",
@@ -137,19 +462,38 @@ Examples:
             ]
             return random.choice(responses)
         
-        # Time
-        if any(word in command_lower for word in ['time', 'clock']):
+        if intent == 'time':
             current_time = datetime.now().strftime("%I:%M %p")
             return f"It's {current_time}, sir. Time flies when you're having fun."
         
-        # Date
-        if any(word in command_lower for word in ['date', 'today', 'day']):
+        if intent == 'date':
             current_date = datetime.now().strftime("%A, %B %d, %Y")
             return f"Today is {current_date}, sir. Another day, another opportunity."
         
+        if intent == 'status':
+            return "All systems operational, sir. Running at peak performance."
+        
+        return None
+    
+    def _fallback_response(self, command):
+        """Fallback responses when API is not available"""
+        command_lower = command.lower().strip()
+        
+        # Greetings
+        if any(word in command_lower for word in ['hello', 'hi', 'hey', 'greetings']):
+            return self.local_response('greeting')
+        
+        # Time
+        if any(word in command_lower for word in ['time', 'clock']):
+            return self.local_response('time')
+        
+        # Date
+        if any(word in command_lower for word in ['date', 'today', 'day']):
+            return self.local_response('date')
+        
         # Status
         if any(word in command_lower for word in ['status', 'how are you']):
-            return "All systems operational, sir. Running at peak performance."
+            return self.local_response('status')
         
         # Jokes
         if 'joke' in command_lower:
@@ -167,6 +511,6 @@ Examples:
         # Default
         return "I'm here to help, sir. Could you please rephrase that? The Groq API is not configured yet."
     
-    def get_conversation_summary(self):
+    def get_conversation_summary(self, session_id='default'):
         """Get conversation summary"""
-        return f"We've had {len(self.conversation_history)} interactions, sir."
+        return f"We've had {len(self.conversations.get(session_id))} interactions, sir."
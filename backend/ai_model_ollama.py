@@ -3,18 +3,45 @@ JARVIS AI Model with Ollama Integration
 Runs locally on your computer - completely free and private
 """
 
+import json
+import os
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 import random
+from metrics import DEPENDENCY_LATENCY
+from logger import get_logger
+
+logger = get_logger('ai.ollama')
+
+class OllamaBusyError(Exception):
+    """Raised when no generation slot frees up within the queue timeout"""
 
 class JarvisAIOllama:
     """AI model using Ollama for local intelligent responses"""
     
-    def __init__(self):
-        self.api_url = 'http://localhost:11434/api/generate'
+    def __init__(self, base_url=None, max_concurrent=None, queue_timeout=None):
+        self.base_url = (base_url or os.getenv('OLLAMA_URL', 'http://localhost:11434')).rstrip('/')
+        self.api_url = f'{self.base_url}/api/generate'
         self.model = 'llama3.1'
         self.conversation_history = []
         
+        # One pooled keep-alive session for all calls to the local Ollama server
+        self.max_concurrent = max_concurrent or int(os.getenv('OLLAMA_MAX_CONCURRENT', '2'))
+        self.queue_timeout = queue_timeout if queue_timeout is not None else float(os.getenv('OLLAMA_QUEUE_TIMEOUT', '10'))
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrent + 1)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # Bounds in-flight generations; callers wait up to queue_timeout, then get a busy reply
+        self.generation_slots = threading.BoundedSemaphore(self.max_concurrent)
+        self.in_flight = 0
+        self.rejected = 0
+        self._counter_lock = threading.Lock()
+        
         # System prompt for JARVIS personality
         self.system_prompt = """You are JARVIS (Just A Rather Very Intelligent System), Tony Stark's AI assistant.
 
@@ -33,49 +60,93 @@ Examples:
     
     def process_command(self, command):
         """Process a command using Ollama"""
+        try:
+            ai_response = self.complete(command)
+        except requests.exceptions.ConnectionError:
+            return "Ollama is not running, sir. Please start Ollama with 'ollama serve' or use the Ollama app."
+        except requests.exceptions.Timeout:
+            return "Ollama is taking too long to respond, sir. The model might be loading."
+        except OllamaBusyError:
+            return "I'm juggling rather a lot of thoughts at the moment, sir. Give me a second and ask again."
+        except Exception as e:
+            logger.error("Error calling Ollama: %s", e)
+            return self._fallback_response(command)
+        
+        return ai_response
+    
+    def complete(self, command):
+        """Get a full response from Ollama, raising on errors instead of falling back"""
+        ai_response = ''.join(self.process_command_stream(command)).strip()
+        if not ai_response:
+            raise RuntimeError("Ollama returned an empty response")
+        
+        # Add to history
+        self.conversation_history.append({
+            'command': command,
+            'response': ai_response,
+            'timestamp': datetime.now()
+        })
         
+        return ai_response
+    
+    def process_command_stream(self, command):
+        """Stream response text from Ollama as it is generated
+        
+        Waits up to queue_timeout for a free generation slot and raises
+        OllamaBusyError if none frees up. Connection and timeout errors from
+        requests propagate to the caller.
+        """
+        if not self.generation_slots.acquire(timeout=self.queue_timeout):
+            with self._counter_lock:
+                self.rejected += 1
+            raise OllamaBusyError(f"{self.max_concurrent} generations already in flight")
+        
+        with self._counter_lock:
+            self.in_flight += 1
+        requested_at = time.perf_counter()
+        first_token = True
         try:
             # Build prompt with personality
             full_prompt = f"{self.system_prompt}\n\nUser: {command}\nJARVIS:"
             
-            # Call Ollama API
-            response = requests.post(
+            # Call Ollama API over the pooled keep-alive session
+            with self.session.post(
                 self.api_url,
                 json={
                     'model': self.model,
                     'prompt': full_prompt,
-                    'stream': False,
+                    'stream': True,
                     'options': {
                         'temperature': 0.8,
                         'num_predict': 150
                     }
                 },
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                ai_response = data.get('response', '').strip()
+                stream=True,
+                timeout=(3, 30)
+            ) as response:
+                if response.status_code != 200:
+                    raise RuntimeError(f"Ollama error: {response.status_code}")
                 
-                # Add to history
-                self.conversation_history.append({
-                    'command': command,
-                    'response': ai_response,
-                    'timestamp': datetime.now()
-                })
-                
-                return ai_response if ai_response else self._fallback_response(command)
-            else:
-                print(f"Ollama error: {response.status_code}")
-                return self._fallback_response(command)
-                
-        except requests.exceptions.ConnectionError:
-            return "Ollama is not running, sir. Please start Ollama with 'ollama serve' or use the Ollama app."
-        except requests.exceptions.Timeout:
-            return "Ollama is taking too long to respond, sir. The model might be loading."
-        except Exception as e:
-            print(f"Error calling Ollama: {e}")
-            return self._fallback_response(command)
+                # Ollama streams one JSON object per line
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if data.get('error'):
+                        raise RuntimeError(f"Ollama error: {data['error']}")
+                    if data.get('response'):
+                        if first_token:
+                            DEPENDENCY_LATENCY.labels('ollama', 'first_token').observe(time.perf_counter() - requested_at)
+                            first_token = False
+                        yield data['response']
+                    if data.get('done'):
+                        break
+        finally:
+            # Whole stream, failed or not; includes the time the caller spends between reads
+            DEPENDENCY_LATENCY.labels('ollama', 'generate').observe(time.perf_counter() - requested_at)
+            with self._counter_lock:
+                self.in_flight -= 1
+            self.generation_slots.release()
     
     def _fallback_response(self, command):
         """Fallback responses when Ollama is not available"""
@@ -123,11 +194,24 @@ Examples:
     def check_ollama_status(self):
         """Check if Ollama is running"""
         try:
-            response = requests.get('http://localhost:11434/api/tags', timeout=2)
+            response = self.session.get(f'{self.base_url}/api/tags', timeout=2)
             return response.status_code == 200
         except:
             return False
     
+    def get_pool_stats(self):
+        """Get concurrency limiter counters"""
+        with self._counter_lock:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'in_flight': self.in_flight,
+                'rejected': self.rejected
+            }
+    
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+    
     def get_conversation_summary(self):
         """Get conversation summary"""
         return f"We've had {len(self.conversation_history)} interactions, sir."
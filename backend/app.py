@@ -1,56 +1,177 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g
 from flask_cors import CORS
 from datetime import datetime
+import json
 import os
+import time
 from dotenv import load_dotenv
 
 from voice_engine import VoiceEngine
 from ai_model_groq import JarvisAIGroq as JarvisAI
+from ai_model_ollama import JarvisAIOllama
+from ai_model import JarvisAI as RuleBasedAI
+from llm_router import create_llm_router
 from task_manager import TaskManager
-from auth import register_user, login_user, token_required, get_user_by_id
+from auth import register_user, login_user, token_required, admin_required, get_user_by_id, get_user_id_from_header
 from database import db
 from notification_manager import notification_manager
+from notification_stream import notification_broker, format_event, HEARTBEAT_INTERVAL, KEEPALIVE, DROPPED, STREAM_MAX_AGE
+from system_monitor import system_monitor
+from metrics import REGISTRY, REQUEST_LATENCY, Gauge
+from tracing import span, start_trace, end_trace, trace_exporter
+from profiler import profiler, ProfilerBusyError, collapsed_text, flamegraph_svg
+from logger import get_logger, get_logging_stats, set_request_id, reset_request_id
 from system_commands import system_commands
+from intent_router import (
+    intent_router, SYSTEM, TASK_DELETE, TASK_EDIT, TASK_COMPLETE, TASK_CREATE,
+    TASK_INTENTS, LOCAL_INTENTS
+)
 
 # Load environment variables
 load_dotenv()
 
+logger = get_logger('app')
+
+# Per-request DEBUG lines are on the hot path; keep only a sample of them
+REQUEST_LOG_SAMPLE_RATE = float(os.getenv('REQUEST_LOG_SAMPLE_RATE', '0.01'))
+
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 
 # Initialize components
 voice_engine = VoiceEngine()
 jarvis_ai = JarvisAI()
+ollama_ai = JarvisAIOllama()
+rule_based_ai = RuleBasedAI()
+llm_router = create_llm_router(jarvis_ai, ollama_ai, rule_based_ai)
 task_manager = TaskManager()
+system_monitor.start()
+
+# Push every new notification to connected stream clients
+notification_manager.register_callback('*', notification_broker.publish)
+
+# Gauges read when /api/metrics is scraped
+Gauge('jarvis_reminders_scheduled', 'Reminders waiting in the scheduler', lambda: len(task_manager.scheduler))
+Gauge('jarvis_reminder_delivery_queue_depth', 'Reminders waiting to be delivered',
+      lambda: task_manager.delivery.get_stats()['queue_depth'])
+Gauge('jarvis_notifications_stored', 'Notifications held in memory', lambda: len(notification_manager.store))
+Gauge('jarvis_dialog_sessions_pending', 'Voice/chat sessions waiting on a follow-up answer',
+      lambda: len(getattr(task_manager, 'pending_tasks', {})) + len(getattr(task_manager, 'pending_operations', {})))
+Gauge('jarvis_speech_queue_depth', 'Phrases waiting to be spoken', lambda: voice_engine.speech_queue.qsize())
+Gauge('jarvis_notification_stream_subscribers', 'Connected notification stream clients',
+      lambda: notification_broker.get_stats()['subscribers'])
+
+# Containers sized by memory profiles
+profiler.track('groq.conversations', lambda: jarvis_ai.conversations)
+profiler.track('ollama.conversation_history', lambda: ollama_ai.conversation_history)
+profiler.track('rule_based.conversation_history', lambda: rule_based_ai.conversation_history)
+profiler.track('notifications', lambda: notification_manager.store)
+profiler.track('pending_tasks', lambda: getattr(task_manager, 'pending_tasks', {}))
+profiler.track('pending_operations', lambda: getattr(task_manager, 'pending_operations', {}))
 
 # Check database connection
 if db.is_connected():
-    print("🗄️  Database: Connected")
+    logger.info("Database: Connected")
 else:
-    print("⚠️  Database: Not connected (using local storage)")
+    logger.warning("Database: Not connected (using local storage)")
 
 def get_user_id_from_request():
     """Extract user_id from Authorization header"""
+    return get_user_id_from_header(request.headers.get('Authorization'))
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.trace = start_trace(f'{request.method} {route}', **{'http.method': request.method, 'http.route': route})
+    # Correlation id for every log line of this request: the caller's, or the trace's
+    g.request_id = request.headers.get('X-Request-ID') or g.trace[0].trace_id[:16]
+    g.request_id_token = set_request_id(g.request_id)
+
+@app.after_request
+def record_request_latency(response):
+    """Observe request latency by route template (not raw path, to keep label counts bounded)"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        elapsed = time.perf_counter() - started
+        REQUEST_LATENCY.labels(request.method, route, str(response.status_code)).observe(elapsed)
+        logger.debug("request", extra={
+            'method': request.method, 'route': route, 'status': response.status_code,
+            'duration_ms': round(elapsed * 1000, 2), 'sample_rate': REQUEST_LOG_SAMPLE_RATE
+        })
+    trace = g.pop('trace', None)
+    if trace is not None:
+        trace[0].root.attributes['request.id'] = g.get('request_id')
+        end_trace(*trace, status_code=response.status_code)
+        response.headers['Server-Timing'] = trace[0].server_timing()
+        response.headers['Timing-Allow-Origin'] = '*'
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+        reset_request_id(g.pop('request_id_token'))
+    return response
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text exposition of request, dependency and queue metrics"""
+    return Response(REGISTRY.exposition(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/admin/profile', methods=['GET'])
+@admin_required
+def cpu_profile():
+    """Sample all threads' stacks for ?seconds=N (default 10)
+    
+    ?format=collapsed (default, for flamegraph.pl/speedscope), svg or json;
+    ?interval= sampling period in seconds; ?idle=true keeps waiting threads.
+    """
     try:
-        from auth import decode_token
-        auth_header = request.headers.get('Authorization')
-        if auth_header and auth_header.startswith('Bearer '):
-            token = auth_header.split(' ')[1]
-            data = decode_token(token)
-            if data:
-                return data.get('user_id')
-    except:
-        pass
-    return None
+        stacks, rounds = profiler.sample_stacks(
+            seconds=request.args.get('seconds', 10, type=float),
+            interval=max(0.001, request.args.get('interval', 0.01, type=float)),
+            idle=request.args.get('idle', 'false').lower() == 'true'
+        )
+    except ProfilerBusyError as e:
+        return jsonify({'error': str(e)}), 409
+    
+    output = request.args.get('format', 'collapsed')
+    if output == 'svg':
+        return Response(flamegraph_svg(stacks), mimetype='image/svg+xml')
+    if output == 'json':
+        return jsonify({'rounds': rounds, 'stacks': dict(stacks.most_common())})
+    return Response(collapsed_text(stacks), mimetype='text/plain')
+
+@app.route('/api/admin/profile/memory', methods=['GET'])
+@admin_required
+def memory_profile():
+    """Diff tracemalloc snapshots taken ?seconds=N apart (default 10), top ?top=N lines"""
+    try:
+        return jsonify(profiler.memory_growth(
+            seconds=request.args.get('seconds', 10, type=float),
+            top=request.args.get('top', 25, type=int)
+        ))
+    except ProfilerBusyError as e:
+        return jsonify({'error': str(e)}), 409
+
+def health_payload():
+    """Health status with component stats, shared with the async app"""
+    return {
+        'status': 'online',
+        'timestamp': datetime.now().isoformat(),
+        'message': 'JARVIS systems operational',
+        'ai': llm_router.get_stats(),
+        'db_cache': db.get_cache_stats(),
+        'reminders': task_manager.scheduler.get_stats(),
+        'reminder_delivery': task_manager.delivery.get_stats(),
+        'notification_stream': notification_broker.get_stats(),
+        'notifications': notification_manager.get_stats(),
+        'tracing': trace_exporter.get_stats(),
+        'logging': get_logging_stats()
+    }
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
-        'status': 'online',
-        'timestamp': datetime.now().isoformat(),
-        'message': 'JARVIS systems operational'
-    })
+    return jsonify(health_payload())
 
 @app.route('/api/auth/register', methods=['POST'])
 def register():
@@ -76,7 +197,7 @@ def register():
         })
     
     except Exception as e:
-        print(f"Error in registration: {e}")
+        logger.exception("Error in registration")
         return jsonify({'error': 'Registration failed'}), 500
 
 @app.route('/api/auth/login', methods=['POST'])
@@ -102,7 +223,7 @@ def login():
         })
     
     except Exception as e:
-        print(f"Error in login: {e}")
+        logger.exception("Error in login")
         return jsonify({'error': 'Login failed'}), 500
 
 @app.route('/api/auth/me', methods=['GET'])
@@ -115,423 +236,483 @@ def get_current_user():
             return jsonify({'user': user})
         return jsonify({'error': 'User not found'}), 404
     except Exception as e:
-        print(f"Error getting user: {e}")
+        logger.exception("Error getting user")
         return jsonify({'error': 'Failed to get user'}), 500
 
-@app.route('/api/voice-command', methods=['POST'])
-def voice_command():
-    """Process voice commands - optimized for speed"""
-    try:
-        data = request.json
-        command = data.get('command', '')
-        session_id = data.get('sessionId', 'default')
-        
-        if not command:
-            return jsonify({'error': 'No command provided'}), 400
-        
-        # Check if we're in a task operation flow (delete/edit/complete)
-        if hasattr(task_manager, 'pending_operations'):
-            operation = task_manager.pending_operations.get(session_id)
-            if operation and operation['state'] == 'awaiting_task_selection':
-                # User is selecting a task to delete/edit/complete
-                selection = command.strip()
-                user_id = get_user_id_from_request()
-                tasks = task_manager.get_all_tasks(user_id=user_id)
-                
-                # Try to match by number
-                selected_task = None
-                try:
-                    task_num = int(selection)
-                    if 1 <= task_num <= len(tasks):
-                        selected_task = tasks[task_num - 1]
-                except ValueError:
-                    # Try to match by name
-                    selection_lower = selection.lower()
-                    for task in tasks:
-                        if selection_lower in task['text'].lower():
-                            selected_task = task
-                            break
-                
-                if not selected_task:
-                    response = "I couldn't find that task, sir. Please say the number or name of the task you want to manage."
-                    return jsonify({
-                        'response': response,
-                        'awaitingInput': True,
-                        'inputType': 'taskSelection',
-                        'timestamp': datetime.now().isoformat()
-                    })
-                
-                # Perform the operation
-                if operation['operation'] == 'delete':
-                    task_manager.delete_task(selected_task['id'])
-                    del task_manager.pending_operations[session_id]
-                    response = f"Task '{selected_task['text']}' has been deleted, sir. Consider it done."
-                    
-                    return jsonify({
-                        'response': response,
-                        'taskDeleted': True,
-                        'taskId': selected_task['id'],
-                        'timestamp': datetime.now().isoformat()
-                    })
-                
-                elif operation['operation'] == 'complete':
-                    task_manager.update_task(selected_task['id'], {'completed': True})
-                    del task_manager.pending_operations[session_id]
-                    response = f"Excellent work, sir. Task '{selected_task['text']}' has been marked as complete."
-                    
-                    return jsonify({
-                        'response': response,
-                        'taskCompleted': True,
-                        'taskId': selected_task['id'],
-                        'timestamp': datetime.now().isoformat()
-                    })
-                
-                elif operation['operation'] == 'edit':
-                    # Store the task to edit and ask for new name
-                    operation['task_id'] = selected_task['id']
-                    operation['state'] = 'awaiting_new_name'
-                    response = f"What would you like to rename '{selected_task['text']}' to, sir?"
-                    
-                    return jsonify({
-                        'response': response,
-                        'awaitingInput': True,
-                        'inputType': 'newTaskName',
-                        'timestamp': datetime.now().isoformat()
-                    })
-            
-            elif operation and operation['state'] == 'awaiting_new_name':
-                # User provided new name for task
-                new_name = command.strip()
-                task_manager.update_task(operation['task_id'], {'text': new_name})
+def continue_pending_task(text, session_id, user_id):
+    """Continue a task creation flow that is waiting for a name or a time
+    
+    Returns a response payload, or None if there is no pending task for the session.
+    """
+    # Check if we're in a task creation flow
+    if hasattr(task_manager, 'pending_tasks'):
+        pending = task_manager.pending_tasks.get(session_id)
+        if pending:
+            # We're collecting task details
+            if pending['state'] == 'awaiting_name':
+                # User provided task name
+                task_name = text.strip()
+                pending['name'] = task_name
+                pending['state'] = 'awaiting_time'
                 
-                # Ask for new time
-                operation['state'] = 'awaiting_new_time'
-                response = f"Got it, sir. Renamed to '{new_name}'. Would you like to change the scheduled time? Say a new time, or 'keep the same' to leave it unchanged."
+                response = f"Got it, sir. '{task_name}'. When would you like to be reminded? You can say a time like '3 PM', 'tomorrow', 'in 30 minutes', or 'no time' for no specific time."
                 
-                return jsonify({
+                return {
                     'response': response,
                     'awaitingInput': True,
-                    'inputType': 'newTaskTime',
+                    'inputType': 'time',
                     'timestamp': datetime.now().isoformat()
-                })
+                }
             
-            elif operation and operation['state'] == 'awaiting_new_time':
-                # User provided new time or wants to keep it
-                time_input = command.strip().lower()
+            elif pending['state'] == 'awaiting_time':
+                # User provided time
+                time_input = text.strip().lower()
                 
-                if 'keep' in time_input or 'same' in time_input or 'no change' in time_input:
-                    del task_manager.pending_operations[session_id]
-                    response = "Perfect, sir. The task has been updated."
-                else:
-                    # Parse new time
-                    try:
-                        full_command = f"task {time_input}"
-                        task_text, scheduled_time = task_manager._parse_task_command(full_command)
-                        task_manager.update_task(operation['task_id'], {'scheduledFor': scheduled_time})
-                        
-                        response = "Excellent, sir. The task has been updated with the new schedule."
-                    except Exception as e:
-                        print(f"Error parsing new time: {e}")
-                        response = "The task name has been updated, but I had trouble with the new time, sir."
-                    
-                    del task_manager.pending_operations[session_id]
-                
-                return jsonify({
-                    'response': response,
-                    'taskUpdated': True,
-                    'timestamp': datetime.now().isoformat()
-                })
-        
-        # Check if we're in a task creation flow
-        if hasattr(task_manager, 'pending_tasks'):
-            pending = task_manager.pending_tasks.get(session_id)
-            if pending:
-                # We're collecting task details
-                if pending['state'] == 'awaiting_name':
-                    # User provided task name
-                    task_name = command.strip()
-                    pending['name'] = task_name
-                    pending['state'] = 'awaiting_time'
+                if 'no time' in time_input or 'no specific' in time_input or 'none' in time_input:
+                    # Create task without time
+                    task = task_manager.create_task(pending['name'], None, user_id=user_id)
+                    del task_manager.pending_tasks[session_id]
                     
-                    response = f"Got it, sir. '{task_name}'. When would you like to be reminded? You can say a time like '3 PM', 'tomorrow', 'in 30 minutes', or 'no time' for no specific time."
+                    response = f"Perfect, sir. Task '{task['text']}' has been created. I'll keep it on your list."
                     
-                    return jsonify({
+                    return {
                         'response': response,
-                        'awaitingInput': True,
-                        'inputType': 'time',
+                        'task': task,
+                        'taskCreated': True,
                         'timestamp': datetime.now().isoformat()
-                    })
-                
-                elif pending['state'] == 'awaiting_time':
-                    # User provided time
-                    time_input = command.strip().lower()
-                    
-                    if 'no time' in time_input or 'no specific' in time_input or 'none' in time_input:
-                        # Create task without time
-                        user_id = get_user_id_from_request()
-                        task = task_manager.create_task(pending['name'], None, user_id=user_id)
+                    }
+                else:
+                    # Parse time and create task
+                    try:
+                        full_command = f"{pending['name']} {time_input}"
+                        task_text, scheduled_time = task_manager._parse_task_command(full_command)
+                        
+                        task = task_manager.create_task(pending['name'], scheduled_time, user_id=user_id)
                         del task_manager.pending_tasks[session_id]
                         
-                        response = f"Perfect, sir. Task '{task['text']}' has been created. I'll keep it on your list."
+                        response = f"Excellent, sir. Task '{task['text']}' has been scheduled"
+                        if task.get('scheduledFor'):
+                            from dateutil import parser as date_parser
+                            scheduled_dt = date_parser.parse(task['scheduledFor'])
+                            response += f" for {scheduled_dt.strftime('%I:%M %p on %B %d')}"
+                        response += ". I'll remind you at the appropriate time."
                         
-                        return jsonify({
+                        return {
                             'response': response,
                             'task': task,
                             'taskCreated': True,
                             'timestamp': datetime.now().isoformat()
-                        })
-                    else:
-                        # Parse time and create task
-                        try:
-                            full_command = f"{pending['name']} {time_input}"
-                            task_text, scheduled_time = task_manager._parse_task_command(full_command)
-                            
-                            user_id = get_user_id_from_request()
-                            task = task_manager.create_task(pending['name'], scheduled_time, user_id=user_id)
-                            del task_manager.pending_tasks[session_id]
-                            
-                            response = f"Excellent, sir. Task '{task['text']}' has been scheduled"
-                            if task.get('scheduledFor'):
-                                from dateutil import parser as date_parser
-                                scheduled_dt = date_parser.parse(task['scheduledFor'])
-                                response += f" for {scheduled_dt.strftime('%I:%M %p on %B %d')}"
-                            response += ". I'll remind you at the appropriate time."
-                            
-                            return jsonify({
-                                'response': response,
-                                'task': task,
-                                'taskCreated': True,
-                                'timestamp': datetime.now().isoformat()
-                            })
-                        except Exception as e:
-                            print(f"Error parsing time: {e}")
-                            response = "I didn't quite catch that time, sir. Could you say it again? For example: '3 PM', 'tomorrow', or 'in 30 minutes'."
-                            
-                            return jsonify({
-                                'response': response,
-                                'awaitingInput': True,
-                                'inputType': 'time',
-                                'timestamp': datetime.now().isoformat()
-                            })
-        
-        # Check for system commands first (open apps, play music, web search)
-        command_lower = command.lower()
-        
-        # System commands
-        if any(keyword in command_lower for keyword in [
-            'open', 'launch', 'start', 'run',  # Open apps
-            'play', 'music', 'song',  # Play music
-            'search', 'google', 'find', 'look up',  # Web search
-            'website', 'go to', 'navigate',  # Open website
-            'volume', 'mute', 'unmute',  # Volume control
-            'screenshot', 'screen shot',  # Screenshot
-            'lock computer', 'shutdown', 'restart'  # System operations
-        ]):
-            result = system_commands.execute_command(command)
+                        }
+                    except Exception as e:
+                        logger.error("Error parsing time: %s", e)
+                        response = "I didn't quite catch that time, sir. Could you say it again? For example: '3 PM', 'tomorrow', or 'in 30 minutes'."
+                        
+                        return {
+                            'response': response,
+                            'awaitingInput': True,
+                            'inputType': 'time',
+                            'timestamp': datetime.now().isoformat()
+                        }
+    
+    return None
+
+def handle_pending_voice_command(command, session_id, user_id):
+    """Handle voice commands that don't need the AI model
+    
+    Continues pending task operations (delete/edit/complete) and task creation
+    flows. Returns a response payload, or None if no flow is pending.
+    """
+    # Check if we're in a task operation flow (delete/edit/complete)
+    if hasattr(task_manager, 'pending_operations'):
+        operation = task_manager.pending_operations.get(session_id)
+        if operation and operation['state'] == 'awaiting_task_selection':
+            # User is selecting a task to delete/edit/complete
+            selection = command.strip()
+            tasks = task_manager.get_all_tasks(user_id=user_id)
             
-            if result['success']:
-                return jsonify({
-                    'response': result['message'],
-                    'action': result.get('action'),
-                    'commandExecuted': True,
-                    'timestamp': datetime.now().isoformat()
-                })
-            else:
-                # If system command failed, continue to AI response
-                response = result['message']
-                return jsonify({
+            # Try to match by number
+            selected_task = None
+            try:
+                task_num = int(selection)
+                if 1 <= task_num <= len(tasks):
+                    selected_task = tasks[task_num - 1]
+            except ValueError:
+                # Try to match by name
+                selection_lower = selection.lower()
+                for task in tasks:
+                    if selection_lower in task['text'].lower():
+                        selected_task = task
+                        break
+            
+            if not selected_task:
+                response = "I couldn't find that task, sir. Please say the number or name of the task you want to manage."
+                return {
                     'response': response,
+                    'awaitingInput': True,
+                    'inputType': 'taskSelection',
                     'timestamp': datetime.now().isoformat()
-                })
-        
-        # Get AI response
-        response = jarvis_ai.process_command(command)
-        
-        # Check for task management commands
-        command_lower = command.lower()
-        
-        # DELETE TASK
-        if any(keyword in command_lower for keyword in ['delete task', 'remove task', 'delete the task', 'remove the task', 'cancel task']):
-            user_id = get_user_id_from_request()
-            tasks = task_manager.get_all_tasks(user_id=user_id)
-            if not tasks:
-                response = "You don't have any tasks to delete, sir."
-                return jsonify({
+                }
+            
+            # Perform the operation
+            if operation['operation'] == 'delete':
+                task_manager.delete_task(selected_task['id'])
+                del task_manager.pending_operations[session_id]
+                response = f"Task '{selected_task['text']}' has been deleted, sir. Consider it done."
+                
+                return {
                     'response': response,
+                    'taskDeleted': True,
+                    'taskId': selected_task['id'],
                     'timestamp': datetime.now().isoformat()
-                })
-            
-            # Ask which task to delete
-            if not hasattr(task_manager, 'pending_operations'):
-                task_manager.pending_operations = {}
+                }
             
-            task_manager.pending_operations[session_id] = {
-                'operation': 'delete',
-                'state': 'awaiting_task_selection'
-            }
+            elif operation['operation'] == 'complete':
+                task_manager.update_task(selected_task['id'], {'completed': True})
+                del task_manager.pending_operations[session_id]
+                response = f"Excellent work, sir. Task '{selected_task['text']}' has been marked as complete."
+                
+                return {
+                    'response': response,
+                    'taskCompleted': True,
+                    'taskId': selected_task['id'],
+                    'timestamp': datetime.now().isoformat()
+                }
             
-            # List tasks
-            task_list = "Which task would you like to delete, sir? Here are your tasks:\n"
-            for i, task in enumerate(tasks, 1):
-                task_list += f"{i}. {task['text']}\n"
-            task_list += "Please say the number or name of the task."
+            elif operation['operation'] == 'edit':
+                # Store the task to edit and ask for new name
+                operation['task_id'] = selected_task['id']
+                operation['state'] = 'awaiting_new_name'
+                response = f"What would you like to rename '{selected_task['text']}' to, sir?"
+                
+                return {
+                    'response': response,
+                    'awaitingInput': True,
+                    'inputType': 'newTaskName',
+                    'timestamp': datetime.now().isoformat()
+                }
+        
+        elif operation and operation['state'] == 'awaiting_new_name':
+            # User provided new name for task
+            new_name = command.strip()
+            task_manager.update_task(operation['task_id'], {'text': new_name})
             
-            response = task_list
+            # Ask for new time
+            operation['state'] = 'awaiting_new_time'
+            response = f"Got it, sir. Renamed to '{new_name}'. Would you like to change the scheduled time? Say a new time, or 'keep the same' to leave it unchanged."
             
-            return jsonify({
+            return {
                 'response': response,
                 'awaitingInput': True,
-                'inputType': 'taskSelection',
-                'tasks': tasks,
+                'inputType': 'newTaskTime',
                 'timestamp': datetime.now().isoformat()
-            })
+            }
         
-        # EDIT TASK
-        elif any(keyword in command_lower for keyword in ['edit task', 'update task', 'change task', 'modify task']):
-            user_id = get_user_id_from_request()
-            tasks = task_manager.get_all_tasks(user_id=user_id)
-            if not tasks:
-                response = "You don't have any tasks to edit, sir."
-                return jsonify({
-                    'response': response,
-                    'timestamp': datetime.now().isoformat()
-                })
+        elif operation and operation['state'] == 'awaiting_new_time':
+            # User provided new time or wants to keep it
+            time_input = command.strip().lower()
             
-            # Ask which task to edit
-            if not hasattr(task_manager, 'pending_operations'):
-                task_manager.pending_operations = {}
+            if 'keep' in time_input or 'same' in time_input or 'no change' in time_input:
+                del task_manager.pending_operations[session_id]
+                response = "Perfect, sir. The task has been updated."
+            else:
+                # Parse new time
+                try:
+                    full_command = f"task {time_input}"
+                    task_text, scheduled_time = task_manager._parse_task_command(full_command)
+                    task_manager.update_task(operation['task_id'], {'scheduledFor': scheduled_time})
+                    
+                    response = "Excellent, sir. The task has been updated with the new schedule."
+                except Exception as e:
+                    logger.error("Error parsing new time: %s", e)
+                    response = "The task name has been updated, but I had trouble with the new time, sir."
+                
+                del task_manager.pending_operations[session_id]
             
-            task_manager.pending_operations[session_id] = {
-                'operation': 'edit',
-                'state': 'awaiting_task_selection'
+            return {
+                'response': response,
+                'taskUpdated': True,
+                'timestamp': datetime.now().isoformat()
             }
-            
-            # List tasks
-            task_list = "Which task would you like to edit, sir? Here are your tasks:\n"
-            for i, task in enumerate(tasks, 1):
-                task_list += f"{i}. {task['text']}\n"
-            task_list += "Please say the number or name of the task."
-            
-            response = task_list
-            
-            return jsonify({
+    
+    return continue_pending_task(command, session_id, user_id)
+
+def handle_voice_intent(command, session_id, user_id):
+    """Handle a voice command routed to a local intent
+    
+    Runs system commands, starts task management flows and answers time, date
+    and greeting requests. Returns a response payload, or None if the command
+    needs the AI model.
+    """
+    intent = intent_router.route(command)
+    
+    # System commands (open apps, play music, web search)
+    if intent == SYSTEM:
+        with span('system.execute_command'):
+            result = system_commands.execute_command(command)
+        
+        if result['success']:
+            return {
+                'response': result['message'],
+                'action': result.get('action'),
+                'commandExecuted': True,
+                'timestamp': datetime.now().isoformat()
+            }
+        else:
+            response = result['message']
+            return {
                 'response': response,
-                'awaitingInput': True,
-                'inputType': 'taskSelection',
-                'tasks': tasks,
                 'timestamp': datetime.now().isoformat()
-            })
+            }
+    
+    # DELETE TASK
+    if intent == TASK_DELETE:
+        tasks = task_manager.get_all_tasks(user_id=user_id)
+        if not tasks:
+            response = "You don't have any tasks to delete, sir."
+            return {
+                'response': response,
+                'timestamp': datetime.now().isoformat()
+            }
         
-        # COMPLETE TASK
-        elif any(keyword in command_lower for keyword in ['complete task', 'finish task', 'mark task complete', 'task done', 'mark as done']):
-            user_id = get_user_id_from_request()
-            tasks = task_manager.get_all_tasks(user_id=user_id)
-            incomplete_tasks = [t for t in tasks if not t.get('completed')]
-            
-            if not incomplete_tasks:
-                response = "You don't have any incomplete tasks, sir. Well done!"
-                return jsonify({
-                    'response': response,
-                    'timestamp': datetime.now().isoformat()
-                })
+        # Ask which task to delete
+        if not hasattr(task_manager, 'pending_operations'):
+            task_manager.pending_operations = {}
+        
+        task_manager.pending_operations[session_id] = {
+            'operation': 'delete',
+            'state': 'awaiting_task_selection'
+        }
+        
+        # List tasks
+        task_list = "Which task would you like to delete, sir? Here are your tasks:\n"
+        for i, task in enumerate(tasks, 1):
+            task_list += f"{i}. {task['text']}\n"
+        task_list += "Please say the number or name of the task."
+        
+        response = task_list
+        
+        return {
+            'response': response,
+            'awaitingInput': True,
+            'inputType': 'taskSelection',
+            'tasks': tasks,
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    # EDIT TASK
+    elif intent == TASK_EDIT:
+        tasks = task_manager.get_all_tasks(user_id=user_id)
+        if not tasks:
+            response = "You don't have any tasks to edit, sir."
+            return {
+                'response': response,
+                'timestamp': datetime.now().isoformat()
+            }
+        
+        # Ask which task to edit
+        if not hasattr(task_manager, 'pending_operations'):
+            task_manager.pending_operations = {}
+        
+        task_manager.pending_operations[session_id] = {
+            'operation': 'edit',
+            'state': 'awaiting_task_selection'
+        }
+        
+        # List tasks
+        task_list = "Which task would you like to edit, sir? Here are your tasks:\n"
+        for i, task in enumerate(tasks, 1):
+            task_list += f"{i}. {task['text']}\n"
+        task_list += "Please say the number or name of the task."
+        
+        response = task_list
+        
+        return {
+            'response': response,
+            'awaitingInput': True,
+            'inputType': 'taskSelection',
+            'tasks': tasks,
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    # COMPLETE TASK
+    elif intent == TASK_COMPLETE:
+        tasks = task_manager.get_all_tasks(user_id=user_id)
+        incomplete_tasks = [t for t in tasks if not t.get('completed')]
+        
+        if not incomplete_tasks:
+            response = "You don't have any incomplete tasks, sir. Well done!"
+            return {
+                'response': response,
+                'timestamp': datetime.now().isoformat()
+            }
+        
+        # Ask which task to complete
+        if not hasattr(task_manager, 'pending_operations'):
+            task_manager.pending_operations = {}
+        
+        task_manager.pending_operations[session_id] = {
+            'operation': 'complete',
+            'state': 'awaiting_task_selection'
+        }
+        
+        # List incomplete tasks
+        task_list = "Which task have you completed, sir? Here are your incomplete tasks:\n"
+        for i, task in enumerate(incomplete_tasks, 1):
+            task_list += f"{i}. {task['text']}\n"
+        task_list += "Please say the number or name of the task."
+        
+        response = task_list
+        
+        return {
+            'response': response,
+            'awaitingInput': True,
+            'inputType': 'taskSelection',
+            'tasks': incomplete_tasks,
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    # CREATE TASK
+    elif intent == TASK_CREATE:
+        # Try smart parsing first - check if command contains both task and time
+        task_text, scheduled_time = task_manager._parse_task_command(command)
+        
+        # If we successfully extracted both task name and time, create it directly!
+        if task_text and scheduled_time:
+            task = task_manager.create_task(task_text, scheduled_time, user_id=user_id)
             
-            # Ask which task to complete
-            if not hasattr(task_manager, 'pending_operations'):
-                task_manager.pending_operations = {}
+            response = f"Excellent, sir! I've scheduled '{task['text']}'"
+            if task.get('scheduledFor'):
+                from dateutil import parser as date_parser
+                scheduled_dt = date_parser.parse(task['scheduledFor'])
+                response += f" for {scheduled_dt.strftime('%I:%M %p on %B %d')}"
+            response += ". I'll remind you at the appropriate time."
             
-            task_manager.pending_operations[session_id] = {
-                'operation': 'complete',
-                'state': 'awaiting_task_selection'
+            return {
+                'response': response,
+                'task': task,
+                'taskCreated': True,
+                'timestamp': datetime.now().isoformat()
             }
+        
+        # If only task name was extracted (no time), ask for time
+        elif task_text:
+            if not hasattr(task_manager, 'pending_tasks'):
+                task_manager.pending_tasks = {}
             
-            # List incomplete tasks
-            task_list = "Which task have you completed, sir? Here are your incomplete tasks:\n"
-            for i, task in enumerate(incomplete_tasks, 1):
-                task_list += f"{i}. {task['text']}\n"
-            task_list += "Please say the number or name of the task."
+            task_manager.pending_tasks[session_id] = {
+                'state': 'awaiting_time',
+                'name': task_text,
+                'time': None
+            }
             
-            response = task_list
+            response = f"Got it, sir. '{task_text}'. When would you like to be reminded?"
             
-            return jsonify({
+            return {
                 'response': response,
                 'awaitingInput': True,
-                'inputType': 'taskSelection',
-                'tasks': incomplete_tasks,
+                'inputType': 'time',
                 'timestamp': datetime.now().isoformat()
-            })
+            }
         
-        # CREATE TASK
-        elif any(keyword in command_lower for keyword in ['remind', 'schedule', 'task', 'meeting', 'reminder', 'create task', 'add task', 'set reminder']):
-            # Try smart parsing first - check if command contains both task and time
-            task_text, scheduled_time = task_manager._parse_task_command(command)
+        # If nothing was extracted, ask for task name
+        else:
+            if not hasattr(task_manager, 'pending_tasks'):
+                task_manager.pending_tasks = {}
             
-            # If we successfully extracted both task name and time, create it directly!
-            if task_text and scheduled_time:
-                user_id = get_user_id_from_request()
-                task = task_manager.create_task(task_text, scheduled_time, user_id=user_id)
-                
-                response = f"Excellent, sir! I've scheduled '{task['text']}'"
-                if task.get('scheduledFor'):
-                    from dateutil import parser as date_parser
-                    scheduled_dt = date_parser.parse(task['scheduledFor'])
-                    response += f" for {scheduled_dt.strftime('%I:%M %p on %B %d')}"
-                response += ". I'll remind you at the appropriate time."
-                
-                return jsonify({
-                    'response': response,
-                    'task': task,
-                    'taskCreated': True,
-                    'timestamp': datetime.now().isoformat()
-                })
+            task_manager.pending_tasks[session_id] = {
+                'state': 'awaiting_name',
+                'name': None,
+                'time': None
+            }
             
-            # If only task name was extracted (no time), ask for time
-            elif task_text:
-                if not hasattr(task_manager, 'pending_tasks'):
-                    task_manager.pending_tasks = {}
-                
-                task_manager.pending_tasks[session_id] = {
-                    'state': 'awaiting_time',
-                    'name': task_text,
-                    'time': None
-                }
-                
-                response = f"Got it, sir. '{task_text}'. When would you like to be reminded?"
-                
-                return jsonify({
-                    'response': response,
-                    'awaitingInput': True,
-                    'inputType': 'time',
-                    'timestamp': datetime.now().isoformat()
-                })
+            response = "Of course, sir. What would you like to name this task?"
             
-            # If nothing was extracted, ask for task name
-            else:
-                if not hasattr(task_manager, 'pending_tasks'):
-                    task_manager.pending_tasks = {}
-                
-                task_manager.pending_tasks[session_id] = {
-                    'state': 'awaiting_name',
-                    'name': None,
-                    'time': None
-                }
-                
-                response = "Of course, sir. What would you like to name this task?"
-                
-                return jsonify({
-                    'response': response,
-                    'awaitingInput': True,
-                    'inputType': 'taskName',
-                    'timestamp': datetime.now().isoformat()
-                })
+            return {
+                'response': response,
+                'awaitingInput': True,
+                'inputType': 'taskName',
+                'timestamp': datetime.now().isoformat()
+            }
+    
+    # Time, date and greetings are answered locally
+    if intent in LOCAL_INTENTS:
+        return {
+            'response': jarvis_ai.local_response(intent),
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    return None
+
+def handle_chat_intent(message, session_id):
+    """Handle a chat message routed to a local intent
+    
+    Starts a task creation flow and answers time, date and greeting requests.
+    Returns a response payload, or None if the message needs the AI model.
+    """
+    # Chat never runs system commands, so "open"/"play" must not hide a task
+    intent = intent_router.route(message, skip=(SYSTEM,))
+    
+    # Check if user wants to create a task
+    if intent in TASK_INTENTS:
+        # Initialize pending task
+        if not hasattr(task_manager, 'pending_tasks'):
+            task_manager.pending_tasks = {}
         
-        # Normal conversation
-        return jsonify({
+        task_manager.pending_tasks[session_id] = {
+            'state': 'awaiting_name',
+            'name': None,
+            'time': None
+        }
+        
+        response = "Of course, sir. What would you like to name this task?"
+        
+        return {
             'response': response,
+            'awaitingInput': True,
+            'inputType': 'taskName',
             'timestamp': datetime.now().isoformat()
-        })
+        }
+    
+    # Time, date and greetings are answered locally
+    if intent in LOCAL_INTENTS:
+        return {
+            'response': jarvis_ai.local_response(intent),
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    return None
+
+@app.route('/api/voice-command', methods=['POST'])
+def voice_command():
+    """Process voice commands - optimized for speed"""
+    try:
+        data = request.json
+        command = data.get('command', '')
+        session_id = data.get('sessionId', 'default')
+        
+        if not command:
+            return jsonify({'error': 'No command provided'}), 400
+        
+        user_id = get_user_id_from_request()
+        
+        with span('voice.pending'):
+            payload = handle_pending_voice_command(command, session_id, user_id)
+        if payload is None:
+            with span('voice.intent'):
+                payload = handle_voice_intent(command, session_id, user_id)
+        if payload is None:
+            # Open-ended conversation - get AI response
+            with span('voice.ai'):
+                response = llm_router.process_command(command, session_id)
+            payload = {
+                'response': response,
+                'timestamp': datetime.now().isoformat()
+            }
+        
+        return jsonify(payload)
     
     except Exception as e:
-        print(f"Error processing voice command: {e}")
+        logger.exception("Error processing voice command")
         return jsonify({
             'error': 'Failed to process command',
             'response': "Oops, something went wrong. But don't worry, I'm still here, sir."
@@ -548,126 +729,90 @@ def chat():
         if not message:
             return jsonify({'error': 'No message provided'}), 400
         
-        # Check if we're in a task creation flow
-        if hasattr(task_manager, 'pending_tasks'):
-            pending = task_manager.pending_tasks.get(session_id)
-            if pending:
-                # We're collecting task details
-                if pending['state'] == 'awaiting_name':
-                    # User provided task name
-                    task_name = message.strip()
-                    pending['name'] = task_name
-                    pending['state'] = 'awaiting_time'
-                    
-                    response = f"Got it, sir. '{task_name}'. When would you like to be reminded? You can say a time like '3 PM', 'tomorrow', 'in 30 minutes', or 'no time' for no specific time."
-                    
-                    return jsonify({
-                        'response': response,
-                        'awaitingInput': True,
-                        'inputType': 'time',
-                        'timestamp': datetime.now().isoformat()
-                    })
-                
-                elif pending['state'] == 'awaiting_time':
-                    # User provided time
-                    time_input = message.strip().lower()
-                    
-                    if 'no time' in time_input or 'no specific' in time_input or 'none' in time_input:
-                        # Create task without time
-                        user_id = get_user_id_from_request()
-                        task = task_manager.create_task(pending['name'], None, user_id=user_id)
-                        del task_manager.pending_tasks[session_id]
-                        
-                        response = f"Perfect, sir. Task '{task['text']}' has been created. I'll keep it on your list."
-                        
-                        return jsonify({
-                            'response': response,
-                            'task': task,
-                            'taskCreated': True,
-                            'timestamp': datetime.now().isoformat()
-                        })
-                    else:
-                        # Parse time and create task
-                        try:
-                            full_command = f"{pending['name']} {time_input}"
-                            task_text, scheduled_time = task_manager._parse_task_command(full_command)
-                            
-                            user_id = get_user_id_from_request()
-                            task = task_manager.create_task(pending['name'], scheduled_time, user_id=user_id)
-                            del task_manager.pending_tasks[session_id]
-                            
-                            response = f"Excellent, sir. Task '{task['text']}' has been scheduled"
-                            if task.get('scheduledFor'):
-                                from dateutil import parser as date_parser
-                                scheduled_dt = date_parser.parse(task['scheduledFor'])
-                                response += f" for {scheduled_dt.strftime('%I:%M %p on %B %d')}"
-                            response += ". I'll remind you at the appropriate time."
-                            
-                            return jsonify({
-                                'response': response,
-                                'task': task,
-                                'taskCreated': True,
-                                'timestamp': datetime.now().isoformat()
-                            })
-                        except Exception as e:
-                            print(f"Error parsing time: {e}")
-                            response = "I didn't quite catch that time, sir. Could you say it again? For example: '3 PM', 'tomorrow', or 'in 30 minutes'."
-                            
-                            return jsonify({
-                                'response': response,
-                                'awaitingInput': True,
-                                'inputType': 'time',
-                                'timestamp': datetime.now().isoformat()
-                            })
-        
-        # Get AI response
-        response = jarvis_ai.process_command(message)
-        
-        # Check if user wants to create a task
-        message_lower = message.lower()
-        if any(keyword in message_lower for keyword in ['remind', 'schedule', 'task', 'meeting', 'reminder', 'create task', 'add task', 'set reminder']):
-            # Initialize pending task
-            if not hasattr(task_manager, 'pending_tasks'):
-                task_manager.pending_tasks = {}
-            
-            task_manager.pending_tasks[session_id] = {
-                'state': 'awaiting_name',
-                'name': None,
-                'time': None
-            }
-            
-            response = "Of course, sir. What would you like to name this task?"
-            
-            return jsonify({
-                'response': response,
-                'awaitingInput': True,
-                'inputType': 'taskName',
+        user_id = get_user_id_from_request()
+        
+        payload = continue_pending_task(message, session_id, user_id)
+        if payload is None:
+            payload = handle_chat_intent(message, session_id)
+        if payload is None:
+            # Open-ended conversation - get AI response
+            payload = {
+                'response': llm_router.process_command(message, session_id),
                 'timestamp': datetime.now().isoformat()
-            })
+            }
         
-        # Normal conversation
-        return jsonify({
-            'response': response,
-            'timestamp': datetime.now().isoformat()
-        })
+        return jsonify(payload)
     
     except Exception as e:
-        print(f"Error processing chat message: {e}")
+        logger.exception("Error processing chat message")
         return jsonify({
             'error': 'Failed to process message',
             'response': "Well, that didn't go as planned. Let's try that again, shall we, sir?"
         }), 500
 
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """Stream chat responses as Server-Sent Events"""
+    data = request.json or {}
+    message = data.get('message', '')
+    session_id = data.get('sessionId', 'default_chat')
+    
+    if not message:
+        return jsonify({'error': 'No message provided'}), 400
+    
+    user_id = get_user_id_from_request()
+    
+    def generate():
+        try:
+            for event in jarvis_ai.process_command_stream(message, session_id):
+                if event['type'] == 'task':
+                    # The model asked for a task - create it like the chat flow would
+                    time_text = event.get('time') or ''
+                    task_text, scheduled_time = task_manager._parse_task_command(f"{event['text']} {time_text}")
+                    task = task_manager.create_task(task_text or event['text'], scheduled_time, user_id=user_id)
+                    event = {'type': 'task', 'task': task, 'taskCreated': True}
+                
+                yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+        except Exception as e:
+            logger.exception("Error streaming chat message")
+            error = {
+                'type': 'error',
+                'error': 'Failed to process message',
+                'response': "Well, that didn't go as planned. Let's try that again, shall we, sir?"
+            }
+            yield f"event: error\ndata: {json.dumps(error)}\n\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
 @app.route('/api/tasks', methods=['GET'])
 def get_tasks():
-    """Get all tasks"""
+    """Get all tasks, or one page of them with ?limit=&cursor=&fields="""
     try:
         # Get user_id from token if available
         user_id = get_user_id_from_request()
+        
+        if any(arg in request.args for arg in ('limit', 'cursor', 'fields')):
+            page = task_manager.get_tasks_page(
+                user_id=user_id,
+                limit=request.args.get('limit', type=int),
+                cursor=request.args.get('cursor'),
+                fields=request.args.get('fields')
+            )
+            return jsonify({'tasks': page['items'], 'next_cursor': page['next_cursor']})
+        
         tasks = task_manager.get_all_tasks(user_id=user_id)
         return jsonify({'tasks': tasks})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        print(f"Error getting tasks: {e}")
+        logger.exception("Error getting tasks")
         return jsonify({'error': 'Failed to retrieve tasks'}), 500
 
 @app.route('/api/tasks', methods=['POST'])
@@ -684,10 +829,11 @@ def create_task():
         )
         return jsonify({'task': task})
     except Exception as e:
-        print(f"Error creating task: {e}")
+        logger.exception("Error creating task")
         return jsonify({'error': 'Failed to create task'}), 500
 
 @app.route('/api/tasks/<int:task_id>', methods=['PUT'])
+@app.route('/api/tasks/<task_id>', methods=['PUT'])
 def update_task(task_id):
     """Update a task"""
     try:
@@ -695,84 +841,120 @@ def update_task(task_id):
         task = task_manager.update_task(task_id, data)
         return jsonify({'task': task})
     except Exception as e:
-        print(f"Error updating task: {e}")
+        logger.exception("Error updating task")
         return jsonify({'error': 'Failed to update task'}), 500
 
 @app.route('/api/tasks/<int:task_id>', methods=['DELETE'])
+@app.route('/api/tasks/<task_id>', methods=['DELETE'])
 def delete_task(task_id):
     """Delete a task"""
     try:
         task_manager.delete_task(task_id)
         return jsonify({'success': True})
     except Exception as e:
-        print(f"Error deleting task: {e}")
+        logger.exception("Error deleting task")
         return jsonify({'error': 'Failed to delete task'}), 500
 
 @app.route('/api/system-status', methods=['GET'])
 def system_status():
-    """Get system status"""
-    try:
-        import psutil
-        
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        
-        return jsonify({
-            'cpu': cpu_percent,
-            'memory': memory.percent,
-            'status': 'online',
-            'timestamp': datetime.now().isoformat()
-        })
-    except Exception as e:
-        print(f"Error getting system status: {e}")
+    """Get the latest system status sample (?history=N adds the last N samples)"""
+    sample = system_monitor.latest()
+    if sample is None:
+        # Not sampled yet (or psutil is missing)
         return jsonify({
             'cpu': 0,
             'memory': 0,
             'status': 'online',
             'timestamp': datetime.now().isoformat()
         })
+    
+    status = dict(sample, status='online')
+    history = request.args.get('history', type=int)
+    if history:
+        status['history'] = system_monitor.history(history)
+    return jsonify(status)
 
 @app.route('/api/notifications', methods=['GET'])
 def get_notifications():
-    """Get all notifications"""
+    """Get the user's notifications (?unread=true, ?limit=N for the newest N)"""
     try:
         unread_only = request.args.get('unread', 'false').lower() == 'true'
-        notifications = notification_manager.get_notifications(unread_only=unread_only)
+        notifications = notification_manager.get_notifications(
+            user_id=get_user_id_from_request(),
+            unread_only=unread_only,
+            limit=request.args.get('limit', type=int)
+        )
         return jsonify({'notifications': notifications})
     except Exception as e:
-        print(f"Error getting notifications: {e}")
+        logger.exception("Error getting notifications")
         return jsonify({'error': 'Failed to get notifications'}), 500
 
+@app.route('/api/notifications/stream', methods=['GET'])
+def stream_notifications():
+    """Push new notifications as Server-Sent Events"""
+    # EventSource can't set headers, so the token may also come as ?token=
+    user_id = get_user_id_from_request()
+    if not user_id and request.args.get('token'):
+        user_id = get_user_id_from_header(f"Bearer {request.args['token']}")
+    
+    subscriber = notification_broker.subscribe(user_id, request.headers.get('Last-Event-ID'))
+    
+    def generate():
+        # Each open stream holds a worker thread, so end it after STREAM_MAX_AGE;
+        # the client reconnects after the retry delay and resumes from Last-Event-ID
+        closes_at = time.monotonic() + STREAM_MAX_AGE
+        try:
+            yield 'retry: 3000\n\n'
+            while time.monotonic() < closes_at:
+                notification = subscriber.get(min(HEARTBEAT_INTERVAL, max(0.0, closes_at - time.monotonic())))
+                if subscriber.dropped:
+                    # Fell behind; the client reconnects with Last-Event-ID
+                    yield DROPPED
+                    return
+                yield format_event(notification) if notification else KEEPALIVE
+        finally:
+            notification_broker.unsubscribe(subscriber)
+    
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
 @app.route('/api/notifications/<notification_id>/read', methods=['POST'])
 def mark_notification_read(notification_id):
     """Mark a notification as read"""
     try:
-        success = notification_manager.mark_as_read(notification_id)
+        success = notification_manager.mark_as_read(notification_id, get_user_id_from_request())
         if success:
             return jsonify({'message': 'Notification marked as read'})
         return jsonify({'error': 'Notification not found'}), 404
     except Exception as e:
-        print(f"Error marking notification as read: {e}")
+        logger.exception("Error marking notification as read")
         return jsonify({'error': 'Failed to mark notification as read'}), 500
 
 @app.route('/api/notifications/<notification_id>', methods=['DELETE'])
 def delete_notification(notification_id):
     """Delete a notification"""
     try:
-        notification_manager.clear_notification(notification_id)
-        return jsonify({'message': 'Notification deleted'})
+        if notification_manager.clear_notification(notification_id, get_user_id_from_request()):
+            return jsonify({'message': 'Notification deleted'})
+        return jsonify({'error': 'Notification not found'}), 404
     except Exception as e:
-        print(f"Error deleting notification: {e}")
+        logger.exception("Error deleting notification")
         return jsonify({'error': 'Failed to delete notification'}), 500
 
 @app.route('/api/notifications/clear', methods=['POST'])
 def clear_all_notifications():
-    """Clear all notifications"""
+    """Clear all of the user's notifications"""
     try:
-        notification_manager.clear_all_notifications()
+        notification_manager.clear_all_notifications(get_user_id_from_request())
         return jsonify({'message': 'All notifications cleared'})
     except Exception as e:
-        print(f"Error clearing notifications: {e}")
+        logger.exception("Error clearing notifications")
         return jsonify({'error': 'Failed to clear notifications'}), 500
 
 if __name__ == '__main__':
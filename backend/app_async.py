@@ -0,0 +1,267 @@
+"""
+Async serving mode for JARVIS
+Runs the hot I/O endpoints (chat, voice commands, auth, the notification
+stream) as async Quart handlers so a worker is not held while waiting on
+Groq, Supabase or bcrypt, or while a client sits on an open stream.
+Every other route is served by the regular Flask app through an ASGI adapter.
+
+Run with:  hypercorn app_async:app --bind 0.0.0.0:$PORT
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from asgiref.wsgi import WsgiToAsgi
+from quart import Quart, request, jsonify, make_response, g
+from quart_cors import cors
+
+from app import (
+    app as flask_app,
+    llm_router,
+    health_payload,
+    continue_pending_task,
+    handle_pending_voice_command,
+    handle_voice_intent,
+    handle_chat_intent,
+)
+from auth import register_user, login_user, get_user_id_from_header
+from notification_stream import notification_broker, format_event, HEARTBEAT_INTERVAL, KEEPALIVE, DROPPED
+from metrics import REQUEST_LATENCY
+from tracing import span, start_trace, end_trace
+from logger import get_logger, set_request_id, reset_request_id
+
+logger = get_logger('app.async')
+
+quart_app = cors(Quart(__name__), allow_origin="*")
+
+# Blocking Supabase / task-store calls run on the I/O pool, bcrypt on the CPU pool
+io_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('ASYNC_IO_WORKERS', '32')),
+    thread_name_prefix='jarvis-io'
+)
+cpu_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('ASYNC_CPU_WORKERS', str(os.cpu_count() or 2))),
+    thread_name_prefix='jarvis-bcrypt'
+)
+
+# Routes handled natively by the async app
+ASYNC_PATHS = {
+    '/api/health',
+    '/api/chat',
+    '/api/voice-command',
+    '/api/auth/register',
+    '/api/auth/login',
+    '/api/notifications/stream',
+}
+
+async def run_blocking(func, *args, executor=None):
+    """Run a blocking function in an executor and await its result"""
+    loop = asyncio.get_running_loop()
+    # Carry the request's context so spans in the executor join its trace
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(executor or io_executor, context.run, func, *args)
+
+def get_user_id_from_request():
+    """Extract user_id from Authorization header"""
+    return get_user_id_from_header(request.headers.get('Authorization'))
+
+@quart_app.before_request
+async def start_request_timer():
+    g.request_started = time.perf_counter()
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.trace = start_trace(f'{request.method} {route}', **{'http.method': request.method, 'http.route': route})
+    g.request_id = request.headers.get('X-Request-ID') or g.trace[0].trace_id[:16]
+    g.request_id_token = set_request_id(g.request_id)
+
+@quart_app.after_request
+async def record_request_latency(response):
+    """Observe latency of the async routes alongside the Flask ones"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_LATENCY.labels(request.method, route, str(response.status_code)).observe(time.perf_counter() - started)
+    trace = g.pop('trace', None)
+    if trace is not None:
+        trace[0].root.attributes['request.id'] = g.get('request_id')
+        end_trace(*trace, status_code=response.status_code)
+        response.headers['Server-Timing'] = trace[0].server_timing()
+        response.headers['Timing-Allow-Origin'] = '*'
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+        reset_request_id(g.pop('request_id_token'))
+    return response
+
+@quart_app.route('/api/health', methods=['GET'])
+async def health_check():
+    """Health check endpoint"""
+    return jsonify(dict(health_payload(), mode='async'))
+
+@quart_app.route('/api/auth/register', methods=['POST'])
+async def register():
+    """Register a new user"""
+    try:
+        data = await request.get_json()
+        email = data.get('email')
+        password = data.get('password')
+        name = data.get('name', 'User')
+
+        if not email or not password:
+            return jsonify({'error': 'Email and password are required'}), 400
+
+        # bcrypt hashing is CPU-bound - keep it off the event loop
+        user, token_or_error = await run_blocking(register_user, email, password, name, executor=cpu_executor)
+
+        if user is None:
+            return jsonify({'error': token_or_error}), 400
+
+        return jsonify({
+            'user': user,
+            'token': token_or_error,
+            'message': 'Registration successful'
+        })
+
+    except Exception as e:
+        logger.exception("Error in registration")
+        return jsonify({'error': 'Registration failed'}), 500
+
+@quart_app.route('/api/auth/login', methods=['POST'])
+async def login():
+    """Login a user"""
+    try:
+        data = await request.get_json()
+        email = data.get('email')
+        password = data.get('password')
+
+        if not email or not password:
+            return jsonify({'error': 'Email and password are required'}), 400
+
+        user, token_or_error = await run_blocking(login_user, email, password, executor=cpu_executor)
+
+        if user is None:
+            return jsonify({'error': token_or_error}), 401
+
+        return jsonify({
+            'user': user,
+            'token': token_or_error,
+            'message': 'Login successful'
+        })
+
+    except Exception as e:
+        logger.exception("Error in login")
+        return jsonify({'error': 'Login failed'}), 500
+
+@quart_app.route('/api/voice-command', methods=['POST'])
+async def voice_command():
+    """Process voice commands without blocking on Groq or Supabase"""
+    try:
+        data = await request.get_json()
+        command = data.get('command', '')
+        session_id = data.get('sessionId', 'default')
+
+        if not command:
+            return jsonify({'error': 'No command provided'}), 400
+
+        user_id = get_user_id_from_request()
+
+        with span('voice.pending'):
+            payload = await run_blocking(handle_pending_voice_command, command, session_id, user_id)
+        if payload is None:
+            with span('voice.intent'):
+                payload = await run_blocking(handle_voice_intent, command, session_id, user_id)
+        if payload is None:
+            with span('voice.ai'):
+                response = await llm_router.process_command_async(command, session_id)
+            payload = {
+                'response': response,
+                'timestamp': datetime.now().isoformat()
+            }
+
+        return jsonify(payload)
+
+    except Exception as e:
+        logger.exception("Error processing voice command")
+        return jsonify({
+            'error': 'Failed to process command',
+            'response': "Oops, something went wrong. But don't worry, I'm still here, sir."
+        }), 500
+
+@quart_app.route('/api/chat', methods=['POST'])
+async def chat():
+    """Process chat messages without blocking on Groq or Supabase"""
+    try:
+        data = await request.get_json()
+        message = data.get('message', '')
+        session_id = data.get('sessionId', 'default_chat')
+
+        if not message:
+            return jsonify({'error': 'No message provided'}), 400
+
+        user_id = get_user_id_from_request()
+
+        payload = await run_blocking(continue_pending_task, message, session_id, user_id)
+        if payload is None:
+            payload = handle_chat_intent(message, session_id)
+        if payload is None:
+            payload = {
+                'response': await llm_router.process_command_async(message, session_id),
+                'timestamp': datetime.now().isoformat()
+            }
+
+        return jsonify(payload)
+
+    except Exception as e:
+        logger.exception("Error processing chat message")
+        return jsonify({
+            'error': 'Failed to process message',
+            'response': "Well, that didn't go as planned. Let's try that again, shall we, sir?"
+        }), 500
+
+@quart_app.route('/api/notifications/stream', methods=['GET'])
+async def stream_notifications():
+    """Push new notifications as Server-Sent Events without holding a thread per client"""
+    user_id = get_user_id_from_request()
+    if not user_id and request.args.get('token'):
+        user_id = get_user_id_from_header(f"Bearer {request.args['token']}")
+
+    subscriber = notification_broker.subscribe(
+        user_id, request.headers.get('Last-Event-ID'), loop=asyncio.get_running_loop()
+    )
+
+    async def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                notification = await subscriber.get(HEARTBEAT_INTERVAL)
+                if subscriber.dropped:
+                    yield DROPPED
+                    return
+                yield format_event(notification) if notification else KEEPALIVE
+        finally:
+            notification_broker.unsubscribe(subscriber)
+
+    response = await make_response(generate(), {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    response.timeout = None  # streams stay open
+    return response
+
+@quart_app.after_serving
+async def shutdown_executors():
+    """Release executor threads when the server stops"""
+    io_executor.shutdown(wait=False)
+    cpu_executor.shutdown(wait=False)
+
+flask_asgi = WsgiToAsgi(flask_app)
+
+async def app(scope, receive, send):
+    """ASGI entry point: async routes go to Quart, everything else to Flask"""
+    if scope['type'] == 'http' and scope['path'] not in ASYNC_PATHS:
+        await flask_asgi(scope, receive, send)
+    else:
+        await quart_app(scope, receive, send)
@@ -5,16 +5,17 @@ from functools import wraps
 from flask import request, jsonify
 import os
 from database import db
+from local_database import local_db
+from metrics import DEPENDENCY_LATENCY, timed
 
 SECRET_KEY = os.getenv('SECRET_KEY', 'jarvis_secret_key_change_in_production')
 
-# In-memory user storage (fallback if database not available)
-users_db = {}
-
+@timed(DEPENDENCY_LATENCY, 'bcrypt', 'hashpw')
 def hash_password(password):
     """Hash a password using bcrypt"""
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
+@timed(DEPENDENCY_LATENCY, 'bcrypt', 'checkpw')
 def verify_password(password, hashed):
     """Verify a password against its hash"""
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
@@ -37,6 +38,18 @@ def decode_token(token):
     except jwt.InvalidTokenError:
         return None
 
+def get_user_id_from_header(auth_header):
+    """Extract user_id from an Authorization header value, if it holds a valid token"""
+    try:
+        if auth_header and auth_header.startswith('Bearer '):
+            token = auth_header.split(' ')[1]
+            data = decode_token(token)
+            if data:
+                return data.get('user_id')
+    except:
+        pass
+    return None
+
 def token_required(f):
     """Decorator to require authentication"""
     @wraps(f)
@@ -63,6 +76,19 @@ def token_required(f):
     
     return decorated
 
+def admin_required(f):
+    """Decorator to require a token whose email is listed in ADMIN_EMAILS"""
+    @wraps(f)
+    @token_required
+    def decorated(*args, **kwargs):
+        admins = {email.strip().lower() for email in os.getenv('ADMIN_EMAILS', '').split(',') if email.strip()}
+        if (request.user_email or '').lower() not in admins:
+            return jsonify({'error': 'Admin access required'}), 403
+        
+        return f(*args, **kwargs)
+    
+    return decorated
+
 def register_user(email, password, name):
     """Register a new user"""
     # Try database first
@@ -75,27 +101,17 @@ def register_user(email, password, name):
         token = generate_token(user['id'], email)
         return user, token
     
-    # Fallback to in-memory storage
-    if email in users_db:
+    # Fallback to local SQLite storage
+    user = local_db.create_user(email, password, name)
+    if user is None:
         return None, 'User already exists'
     
-    user_id = f"user_{len(users_db) + 1}"
-    hashed_password = hash_password(password)
-    
-    users_db[email] = {
-        'id': user_id,
-        'email': email,
-        'name': name,
-        'password': hashed_password,
-        'created_at': datetime.now().isoformat()
-    }
-    
-    token = generate_token(user_id, email)
+    token = generate_token(user['id'], email)
     
     return {
-        'id': user_id,
-        'email': email,
-        'name': name
+        'id': user['id'],
+        'email': user['email'],
+        'name': user['name']
     }, token
 
 def login_user(email, password):
@@ -110,13 +126,9 @@ def login_user(email, password):
         token = generate_token(user['id'], email)
         return user, token
     
-    # Fallback to in-memory storage
-    if email not in users_db:
-        return None, 'Invalid credentials'
-    
-    user = users_db[email]
-    
-    if not verify_password(password, user['password']):
+    # Fallback to local SQLite storage
+    user = local_db.authenticate_user(email, password)
+    if user is None:
         return None, 'Invalid credentials'
     
     token = generate_token(user['id'], email)
@@ -133,12 +145,12 @@ def get_user_by_id(user_id):
     if db.is_connected():
         return db.get_user(user_id)
     
-    # Fallback to in-memory storage
-    for email, user in users_db.items():
-        if user['id'] == user_id:
-            return {
-                'id': user['id'],
-                'email': user['email'],
-                'name': user['name']
-            }
+    # Fallback to local SQLite storage
+    user = local_db.get_user(user_id)
+    if user:
+        return {
+            'id': user['id'],
+            'email': user['email'],
+            'name': user['name']
+        }
     return None
@@ -0,0 +1,124 @@
+"""
+Load benchmark: sync Flask app vs async serving mode
+Simulates N concurrent chat sessions against both apps in-process, with a
+fake Groq client that sleeps for a fixed latency, and reports requests/sec
+and p50/p99 latency.
+
+Usage: python bench_async.py [sessions] [requests_per_session] [sync_workers] [groq_latency_ms]
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+from app import app as flask_app, jarvis_ai
+from app_async import quart_app
+
+COMMAND = "Tell me something interesting about quantum physics"
+RESPONSE = "Quantum physics, sir, is where cats are both alive and dead. Rather like my patience."
+
+
+def _completion():
+    message = SimpleNamespace(content=RESPONSE)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class FakeSyncGroq:
+    """Blocking stand-in for groq.Groq"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        time.sleep(self.latency)
+        return _completion()
+
+
+class FakeAsyncGroq:
+    """Non-blocking stand-in for groq.AsyncGroq"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        return _completion()
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(name, latencies, elapsed):
+    print(f"{name:<8} {len(latencies) / elapsed:9.1f} req/s   "
+          f"p50 {percentile(latencies, 50) * 1000:8.1f} ms   "
+          f"p99 {percentile(latencies, 99) * 1000:8.1f} ms")
+
+
+def bench_sync(sessions, per_session, workers):
+    """Each session is a client thread; a semaphore stands in for gunicorn sync workers"""
+    worker_slots = threading.Semaphore(workers)
+    latencies = []
+    lock = threading.Lock()
+
+    def session(n):
+        client = flask_app.test_client()
+        for i in range(per_session):
+            start = time.perf_counter()
+            with worker_slots:
+                # Distinct messages so the response cache never answers for Groq
+                client.post('/api/chat', json={'message': f'{COMMAND} #{i}', 'sessionId': f'sync_{n}'})
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - start
+
+
+async def bench_async(sessions, per_session):
+    """All sessions share a single event loop, like one async worker"""
+    client = quart_app.test_client()
+    latencies = []
+
+    async def session(n):
+        for i in range(per_session):
+            start = time.perf_counter()
+            await client.post('/api/chat', json={'message': f'{COMMAND} #{i}', 'sessionId': f'async_{n}'})
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session(n) for n in range(sessions)))
+    return latencies, time.perf_counter() - start
+
+
+def run():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    per_session = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    latency = (float(sys.argv[4]) if len(sys.argv) > 4 else 200) / 1000
+
+    jarvis_ai.client = FakeSyncGroq(latency)
+    jarvis_ai.async_client = FakeAsyncGroq(latency)
+
+    print("=" * 60)
+    print(f"{sessions} sessions x {per_session} requests, Groq latency {latency * 1000:.0f} ms")
+    print(f"sync app: {workers} gunicorn-style workers, async app: 1 event loop")
+    print("=" * 60)
+
+    report('sync', *bench_sync(sessions, per_session, workers))
+    report('async', *asyncio.run(bench_async(sessions, per_session)))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,68 @@
+"""
+Conversation store benchmark
+Measures memory per 10k sessions and append/get latency of the in-process store.
+Pass a Redis URL to also time the Redis backend: python bench_conversation_store.py redis://localhost:6379/0
+"""
+
+import sys
+import time
+import tracemalloc
+
+from conversation_store import InMemoryConversationStore, RedisConversationStore
+
+USER_MESSAGE = {'role': 'user', 'content': "Remind me what we said about the quarterly report, JARVIS"}
+ASSISTANT_MESSAGE = {
+    'role': 'assistant',
+    'content': "You said it was due Friday, sir. I said you'd finish it Thursday night. We'll see who's right."
+}
+
+
+def fill(store, sessions, turns):
+    for n in range(sessions):
+        session_id = f'session_{n}'
+        for _ in range(turns):
+            store.append(session_id, dict(USER_MESSAGE))
+            store.append(session_id, dict(ASSISTANT_MESSAGE))
+
+
+def measure_memory(sessions=10000, turns=5):
+    store = InMemoryConversationStore(max_messages=10, max_sessions=sessions)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    fill(store, sessions, turns)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    used = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    print(f"In-process: {store.session_count()} sessions x {turns * 2} messages = "
+          f"{used / 1024 / 1024:.1f} MiB ({used / sessions:.0f} bytes/session)")
+
+
+def measure_latency(store, name, sessions=1000, turns=5):
+    start = time.perf_counter()
+    fill(store, sessions, turns)
+    append_us = (time.perf_counter() - start) / (sessions * turns * 2) * 1e6
+
+    start = time.perf_counter()
+    for n in range(sessions):
+        store.get(f'session_{n}')
+    get_us = (time.perf_counter() - start) / sessions * 1e6
+    print(f"{name}: append {append_us:.2f} us, get {get_us:.2f} us")
+
+
+def run():
+    print("=" * 60)
+    print("Conversation store")
+    print("=" * 60)
+    measure_memory()
+    measure_latency(InMemoryConversationStore(), "In-process")
+
+    if len(sys.argv) > 1:
+        store = RedisConversationStore(sys.argv[1], prefix='jarvis:bench:')
+        measure_latency(store, "Redis")
+        for key in store.client.scan_iter(match='jarvis:bench:*'):
+            store.client.delete(key)
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,189 @@
+"""
+Database round-trip benchmark against a local PostgREST-compatible stub
+Counts the HTTP requests DatabaseService makes for typical user actions,
+per-row vs bulk APIs, the preferences upsert and the write buffer.
+
+Usage: python bench_database.py [tasks]
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl
+
+
+class StubPostgRESTHandler(BaseHTTPRequestHandler):
+    """Just enough PostgREST for DatabaseService: eq/in filters, insert, upsert, update, delete"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _parse(self):
+        # Always consume the body (the client sends one even on GET) so keep-alive stays in sync
+        self.payload = self._body()
+        url = urlparse(self.path)
+        table = url.path.rsplit('/', 1)[-1]
+        filters, params = [], {}
+        for key, value in parse_qsl(url.query):
+            if value.startswith('eq.'):
+                filters.append((key, {value[3:]}))
+            elif value.startswith('in.('):
+                filters.append((key, {item.strip('"') for item in value[4:-1].split(',')}))
+            else:
+                params[key] = value
+        with self.server.lock:
+            self.server.requests += 1
+            rows = self.server.tables.setdefault(table, [])
+        return rows, filters, params
+
+    def _matching(self, rows, filters):
+        return [row for row in rows if all(str(row.get(key)) in values for key, values in filters)]
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length)) if length else None
+
+    def _reply(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        rows, filters, _ = self._parse()
+        with self.server.lock:
+            self._reply(200, self._matching(rows, filters))
+
+    def do_POST(self):
+        rows, _, params = self._parse()
+        payload = self.payload if isinstance(self.payload, list) else [self.payload]
+        conflict = params.get('on_conflict')
+        created = []
+        with self.server.lock:
+            for values in payload:
+                existing = next((row for row in rows if conflict and row.get(conflict) == values.get(conflict)), None)
+                if existing:
+                    existing.update(values)
+                    created.append(existing)
+                else:
+                    row = dict(values, id=values.get('id') or str(uuid.uuid4()))
+                    rows.append(row)
+                    created.append(row)
+        self._reply(201, created)
+
+    def do_PATCH(self):
+        rows, filters, _ = self._parse()
+        updates = self.payload
+        with self.server.lock:
+            matched = self._matching(rows, filters)
+            for row in matched:
+                row.update(updates)
+        self._reply(200, matched)
+
+    def do_DELETE(self):
+        rows, filters, _ = self._parse()
+        with self.server.lock:
+            matched = self._matching(rows, filters)
+            rows[:] = [row for row in rows if row not in matched]
+        self._reply(200, matched)
+
+
+def start_stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubPostgRESTHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.tables = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def measure(server, label, action):
+    before = server.requests
+    start = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<44} {server.requests - before:5d} requests  {elapsed * 1000:8.1f} ms")
+
+
+def run():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    server = start_stub_server()
+    os.environ['SUPABASE_URL'] = f'http://127.0.0.1:{server.server_address[1]}'
+    os.environ['SUPABASE_KEY'] = 'stub.stub.stub'
+
+    from database import DatabaseService, WriteBuffer
+    db = DatabaseService()
+    user_id = db.create_user('tony@stark.com', 'password', 'Tony Stark')['id']
+    texts = [f'Task {n}' for n in range(count)]
+
+    print("=" * 72)
+    print(f"Round-trips to a PostgREST stub, {count} tasks")
+    print("=" * 72)
+
+    ids = []
+    measure(server, f"create {count} tasks one by one", lambda: ids.extend(
+        db.create_task(user_id, text)['id'] for text in texts))
+    measure(server, f"create {count} tasks with create_tasks", lambda: ids.extend(
+        task['id'] for task in db.create_tasks([{'user_id': user_id, 'text': text} for text in texts])))
+    measure(server, f"complete {count} tasks one by one", lambda: [
+        db.update_task(task_id, {'completed': True}) for task_id in ids[:count]])
+    measure(server, f"complete {count} tasks with update_tasks", lambda: db.update_tasks(ids[count:], {'completed': True}))
+
+    def legacy_preferences():
+        # The previous implementation: select, then update or insert
+        for n in range(count):
+            if db.client.table('user_preferences').select('*').eq('user_id', user_id).execute().data:
+                db.client.table('user_preferences').update({'volume': n / count}).eq('user_id', user_id).execute()
+            else:
+                db.client.table('user_preferences').insert({'user_id': user_id, 'volume': n / count}).execute()
+
+    measure(server, f"save preferences {count}x (select + write)", legacy_preferences)
+    measure(server, f"save preferences {count}x (upsert)", lambda: [
+        db.update_user_preferences(user_id, {'volume': n / count}) for n in range(count)])
+
+    buffer = WriteBuffer(db, max_size=1000, max_delay=60)
+
+    def buffered():
+        # Users toggle tasks back and forth, rename some and delete a few
+        for round_number in range(5):
+            for task_id in ids[:count]:
+                buffer.update_task(task_id, {'completed': round_number % 2 == 0})
+        for task_id in ids[:count // 2]:
+            buffer.update_task(task_id, {'text': 'Renamed'})
+        for task_id in ids[count:]:
+            buffer.delete_task(task_id)
+        buffer.flush()
+
+    writes = count * 5 + count // 2 + count
+    measure(server, f"{writes} buffered task writes", buffered)
+
+
+    def voice_flows():
+        # Each delete/complete voice flow lists the tasks, then lists them again to pick one by number
+        for _ in range(count):
+            tasks = db.get_user_tasks(user_id)
+            db.get_user_tasks(user_id)
+            db.get_user_preferences(user_id)
+            db.get_user(user_id)
+        db.update_task(tasks[0]['id'], {'completed': False})
+        db.get_user_tasks(user_id)
+
+    db.cache.clear()
+    measure(server, f"{count} voice flows + 1 edit (read-through cache)", voice_flows)
+    print(f"  cache: {db.get_cache_stats()}")
+
+    measure(server, f"delete {count} tasks one by one", lambda: [db.delete_task(task_id) for task_id in ids[:count]])
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    run()
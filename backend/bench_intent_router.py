@@ -0,0 +1,94 @@
+"""
+Intent router benchmark
+Measures per-command routing latency and the share of commands that are
+served without an LLM call, over a sample of typical JARVIS commands
+"""
+
+import sys
+import time
+
+from intent_router import intent_router, CONVERSATION, SYSTEM
+
+# (command, expected intent)
+SAMPLE_COMMANDS = [
+    ("What time is it?", 'time'),
+    ("what's the time", 'time'),
+    ("Tell me the current time please", 'time'),
+    ("What's the date today?", 'date'),
+    ("What day is it", 'date'),
+    ("Hello JARVIS", 'greeting'),
+    ("hey", 'greeting'),
+    ("Good morning, sir", 'greeting'),
+    ("How are you?", 'status'),
+    ("Remind me to call John at 3 PM", 'task_create'),
+    ("Schedule a meeting tomorrow at 10 AM", 'task_create'),
+    ("Set reminder to check emails in 30 minutes", 'task_create'),
+    ("remind me to open the door", 'task_create'),
+    ("set reminder to start laundry", 'task_create'),
+    ("remind me to find my keys at 5pm", 'task_create'),
+    ("schedule a meeting to run through slides", 'task_create'),
+    ("Delete task", 'task_delete'),
+    ("remove the task", 'task_delete'),
+    ("Edit task", 'task_edit'),
+    ("Mark as done", 'task_complete'),
+    ("Complete task", 'task_complete'),
+    ("Open notepad", 'system'),
+    ("Play Back in Black on YouTube", 'system'),
+    ("Search for the best pizza near me", 'system'),
+    ("Volume up", 'system'),
+    ("Tell me a joke", CONVERSATION),
+    ("What is quantum physics?", CONVERSATION),
+    ("Explain how transformers work in machine learning", CONVERSATION),
+    ("Hi, can you explain black holes to me?", CONVERSATION),
+    ("Who won the world cup in 2018?", CONVERSATION),
+    ("Write a haiku about coffee", CONVERSATION),
+    ("Thanks JARVIS", CONVERSATION),
+]
+
+# Chat routes with skip=(SYSTEM,): it has no system commands, so any task keyword starts a task
+CHAT_COMMANDS = [
+    ("open the door reminder for tonight", 'task_create'),
+    ("add a meeting to play through the demo", 'task_create'),
+    ("Open notepad", CONVERSATION),
+]
+
+
+def run(iterations=20000):
+    mismatches = [
+        (command, expected, intent_router.route(command))
+        for command, expected in SAMPLE_COMMANDS
+        if intent_router.route(command) != expected
+    ] + [
+        (command, expected, intent_router.route(command, skip=(SYSTEM,)))
+        for command, expected in CHAT_COMMANDS
+        if intent_router.route(command, skip=(SYSTEM,)) != expected
+    ]
+    for command, expected, got in mismatches:
+        print(f"MISMATCH: {command!r}: expected {expected}, got {got}")
+
+    print("=" * 60)
+    print("Intent routing latency")
+    print("=" * 60)
+
+    total_ns = 0
+    for command, _ in SAMPLE_COMMANDS:
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            intent_router.route(command)
+        per_call = (time.perf_counter_ns() - start) / iterations
+        total_ns += per_call
+        print(f"{per_call / 1000:7.2f} us  {intent_router.route(command):<14} {command}")
+
+    local = sum(1 for command, _ in SAMPLE_COMMANDS
+                if not intent_router.needs_llm(intent_router.route(command)))
+    print("-" * 60)
+    print(f"Mean routing latency: {total_ns / len(SAMPLE_COMMANDS) / 1000:.2f} us")
+    print(f"Served without LLM:   {local}/{len(SAMPLE_COMMANDS)} "
+          f"({local / len(SAMPLE_COMMANDS):.0%})")
+    checked = len(SAMPLE_COMMANDS) + len(CHAT_COMMANDS)
+    print(f"Correctly classified: {checked - len(mismatches)}/{checked}")
+    return mismatches
+
+
+if __name__ == '__main__':
+    sys.exit(1 if run() else 0)
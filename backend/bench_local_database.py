@@ -0,0 +1,126 @@
+"""
+Local storage benchmark
+Compares the JSON task path (TaskStore + TaskJournal) with the SQLite
+LocalDatabaseService for creates, per-user listing, updates, concurrent
+writers and cold start.
+
+Usage: python bench_local_database.py [tasks] [users]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from local_database import LocalDatabaseService
+from task_journal import TaskJournal
+from task_store import TaskStore
+
+WRITERS = 8
+
+
+class JsonTasks:
+    """The file-backed TaskManager path, without the scheduler"""
+
+    def __init__(self, path):
+        self.journal = TaskJournal(path, sync_interval=0.05)
+        tasks, self.counter = self.journal.load()
+        self.store = TaskStore(tasks)
+        self.lock = threading.Lock()
+
+    def create_task(self, user_id, text, scheduled_for=None):
+        with self.lock:
+            task = {'id': self.counter, 'text': text, 'completed': False,
+                    'createdAt': datetime.now().isoformat(), 'scheduledFor': scheduled_for, 'userId': user_id}
+            self.store.add(task)
+            self.counter += 1
+            self.journal.log_create(task, self.counter, sync=False)
+        return task
+
+    def get_user_tasks(self, user_id):
+        return self.store.all(user_id)
+
+    def update_task(self, task_id, updates):
+        with self.lock:
+            task = self.store.update(task_id, updates)
+            self.journal.log_update(task_id, updates, sync=False)
+        return task
+
+    def close(self):
+        self.journal.close()
+
+
+def timed(label, func, count):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<26} {elapsed / count * 1e6:10.1f} us/op   {count / elapsed:10.0f} ops/s")
+
+
+def bench(name, storage, users, count):
+    print(f"{name}:")
+    now = datetime.now()
+    ids = []
+
+    def create():
+        for n in range(count):
+            scheduled = (now + timedelta(minutes=n)).isoformat()
+            ids.append(storage.create_task(users[n % len(users)], f'Task {n}', scheduled)['id'])
+
+    def create_concurrent():
+        with ThreadPoolExecutor(max_workers=WRITERS) as pool:
+            list(pool.map(lambda n: storage.create_task(users[n % len(users)], f'Task {n}'), range(count)))
+
+    def list_tasks():
+        for n in range(len(users)):
+            storage.get_user_tasks(users[n])
+
+    def update():
+        for task_id in ids:
+            storage.update_task(task_id, {'completed': True})
+
+    timed("create", create, count)
+    timed(f"create ({WRITERS} threads)", create_concurrent, count)
+    timed(f"list ({2 * count // len(users)} tasks/user)", list_tasks, len(users))
+    timed("update", update, count)
+
+
+def run():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    user_count = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    with tempfile.TemporaryDirectory() as directory:
+        print("=" * 60)
+        print(f"{count} tasks across {user_count} users")
+        print("=" * 60)
+
+        json_path = os.path.join(directory, 'tasks.json')
+        json_tasks = JsonTasks(json_path)
+        bench("JSON (TaskStore + journal)", json_tasks, [f'user_{n}' for n in range(user_count)], count)
+        json_tasks.journal.compact(json_tasks.store.all(all_users=True), json_tasks.counter)
+        json_tasks.close()
+
+        local_db = LocalDatabaseService(os.path.join(directory, 'jarvis.db'))
+        users = [local_db.create_user(f'user_{n}@jarvis.local', 'password', f'User {n}')['id'] for n in range(user_count)]
+        bench("SQLite (WAL)", local_db, users, count)
+        local_db.close()
+
+        print("-" * 60)
+        start = time.perf_counter()
+        cold = JsonTasks(json_path)
+        cold.get_user_tasks('user_0')
+        print(f"cold start + first list, JSON:   {(time.perf_counter() - start) * 1000:8.1f} ms")
+        cold.close()
+
+        start = time.perf_counter()
+        cold_db = LocalDatabaseService(os.path.join(directory, 'jarvis.db'))
+        cold_db.get_user_tasks(users[0])
+        print(f"cold start + first list, SQLite: {(time.perf_counter() - start) * 1000:8.1f} ms")
+        cold_db.close()
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,87 @@
+"""
+Logging benchmark
+Compares the time a request thread spends in print() against logger calls
+that only enqueue a record for the writer thread, with several threads
+logging at once, plus the cost of a sampled-out DEBUG line.
+
+Output goes to a slow sink (each write sleeps briefly, like a busy terminal
+or pipe) so the difference between blocking and queued writes shows.
+
+Usage: python bench_logging.py [threads] [lines_per_thread]
+"""
+
+import io
+import logging
+import sys
+import threading
+import time
+
+import logger as logger_module
+from logger import get_logger
+
+
+class SlowStream(io.TextIOBase):
+    def write(self, text):
+        time.sleep(0.00005)
+        return len(text)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_threads(threads, lines, log_line):
+    timings = []
+    lock = threading.Lock()
+
+    def worker(n):
+        local = []
+        for i in range(lines):
+            start = time.perf_counter()
+            log_line(n, i)
+            local.append(time.perf_counter() - start)
+        with lock:
+            timings.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return timings
+
+
+def report(label, timings):
+    print(f"  {label:<28} p50 {percentile(timings, 0.5) * 1e6:8.1f} us   p99 {percentile(timings, 0.99) * 1e6:8.1f} us",
+          file=sys.__stdout__)
+
+
+def run():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    print("=" * 60, file=sys.__stdout__)
+    print(f"{threads} threads x {lines} lines to a slow sink", file=sys.__stdout__)
+
+    sys.stdout = SlowStream()
+    try:
+        timings = run_threads(threads, lines, lambda n, i: print(f"Error getting tasks: worker {n} line {i}"))
+        report("print", timings)
+
+        log = get_logger('bench')
+        # Point the writer thread at the slow sink too
+        for handler in logger_module._listener.handlers:
+            handler.setStream(sys.stdout)
+        timings = run_threads(threads, lines, lambda n, i: log.error("Error getting tasks: worker %d line %d", n, i))
+        report("logger.error (queued)", timings)
+
+        log.setLevel(logging.DEBUG)
+        timings = run_threads(threads, lines, lambda n, i: log.debug("hot path", extra={'sample_rate': 0.01}))
+        report("sampled debug (1%)", timings)
+    finally:
+        sys.stdout = sys.__stdout__
+    print(f"  {logger_module.get_logging_stats()}")
+
+
+if __name__ == '__main__':
+    run()
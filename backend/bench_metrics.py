@@ -0,0 +1,94 @@
+"""
+Metrics benchmark
+Measures the cost of one histogram observation (cached child, labels()
+lookup plus observe, and the timer context manager) from one thread and from
+several threads at once, compared with a single shared lock, and the cost of
+rendering /api/metrics.
+
+Usage: python bench_metrics.py [observations] [threads]
+"""
+
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+from metrics import DEFAULT_BUCKETS, Histogram, Registry
+
+
+class LockedHistogram:
+    """A histogram guarded by one lock, for comparison"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        with self.lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.total += value
+
+
+def per_op(label, func, ops):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<40} {elapsed / ops * 1e6:8.3f} us/op")
+
+
+def threaded(observe, threads, count):
+    def worker():
+        for n in range(count):
+            observe(n % 1000 / 1000)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def run():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    registry = Registry()
+    histogram = Histogram('bench_seconds', 'Benchmark latency', ('route', 'status'), registry=registry)
+    child = histogram.labels('/api/tasks', '200')
+    values = [n % 1000 / 1000 for n in range(count)]
+
+    print("=" * 60)
+    print(f"{count:,d} observations")
+    per_op("observe (cached child)", lambda: [child.observe(v) for v in values], count)
+    per_op("labels() + observe", lambda: [histogram.labels('/api/tasks', '200').observe(v) for v in values], count)
+    per_op("with histogram.time(...)", lambda: [histogram.time('/api/tasks', '200').__enter__().__exit__()
+                                                 for _ in range(count)], count)
+    locked = LockedHistogram()
+    per_op("single-lock histogram observe", lambda: [locked.observe(v) for v in values], count)
+
+    print("-" * 60)
+    per_thread = count // threads
+    sharded = histogram.labels('/api/threads', '200')
+    elapsed = threaded(sharded.observe, threads, per_thread)
+    print(f"{threads} threads x {per_thread:,d} observations")
+    print(f"  per-thread shards    {elapsed / count * 1e6:8.3f} us/op")
+    elapsed = threaded(LockedHistogram().observe, threads, per_thread)
+    print(f"  single lock          {elapsed / count * 1e6:8.3f} us/op")
+    _, total, _ = sharded.snapshot()
+    print(f"  sharded count after merge: {total:,d} (expected {per_thread * threads:,d})")
+
+    print("-" * 60)
+    for route in range(50):
+        for status in ('200', '404', '500'):
+            histogram.labels(f'/api/route_{route}', status)
+    start = time.perf_counter()
+    text = registry.exposition()
+    elapsed = time.perf_counter() - start
+    print(f"Render {len(text.splitlines()):,d} lines: {elapsed * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,98 @@
+"""
+Notification store benchmark
+Loads 1M notifications spread over many users into NotificationStore and
+times per-user listing, unread listing, mark-read and delete, against the
+previous single global list (linear scans and list rebuilds). Also shows
+retention keeping memory bounded when notifications keep arriving.
+
+Usage: python bench_notification_store.py [notifications] [users]
+"""
+
+import random
+import sys
+import time
+from datetime import datetime
+
+from notification_store import NotificationStore, new_notification_id
+
+
+def make_notifications(count, users):
+    timestamp = datetime.now().isoformat()
+    return [{'id': new_notification_id(), 'type': 'reminder', 'message': f'Reminder {n}',
+             'user_id': f'user_{n % users}', 'timestamp': timestamp, 'read': False}
+            for n in range(count)]
+
+
+def timed(label, func, ops):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<34} {elapsed / ops * 1e6:12.2f} us/op")
+
+
+class LegacyNotifications:
+    """The previous NotificationManager list handling"""
+
+    def __init__(self, notifications):
+        self.active_notifications = list(notifications)
+
+    def get_notifications(self, user_id=None, unread_only=False):
+        notifications = self.active_notifications
+        if unread_only:
+            notifications = [n for n in notifications if not n.get('read')]
+        return notifications
+
+    def mark_as_read(self, notification_id):
+        for notif in self.active_notifications:
+            if notif.get('id') == notification_id:
+                notif['read'] = True
+                return True
+        return False
+
+    def clear_notification(self, notification_id):
+        self.active_notifications = [n for n in self.active_notifications if n.get('id') != notification_id]
+
+
+def run():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    notifications = make_notifications(count, users)
+    ids = [notification['id'] for notification in notifications]
+    random.seed(7)
+    sample = random.sample(ids, 1000)
+    user_sample = [f'user_{random.randrange(users)}' for _ in range(1000)]
+
+    print("=" * 60)
+    print(f"{count:,d} notifications over {users:,d} users")
+
+    print("Indexed store")
+    store = NotificationStore(max_per_user=count)
+    timed("load", lambda: store.load(notifications), count)
+    timed("list a user's notifications", lambda: [store.all(user) for user in user_sample], len(user_sample))
+    timed("list a user's unread", lambda: [store.all(user, unread_only=True) for user in user_sample],
+          len(user_sample))
+    timed("mark read", lambda: [store.mark_read(nid) for nid in sample], len(sample))
+    timed("delete", lambda: [store.remove(nid) for nid in sample], len(sample))
+
+    print("Previous global list (first 20 ops)")
+    legacy = LegacyNotifications(make_notifications(count, users))
+    legacy_ids = [notification['id'] for notification in legacy.active_notifications]
+    legacy_sample = random.sample(legacy_ids, 20)
+    timed("list (everyone's) unread", lambda: [legacy.get_notifications(unread_only=True) for _ in range(20)], 20)
+    timed("mark read", lambda: [legacy.mark_as_read(nid) for nid in legacy_sample], 20)
+    timed("delete", lambda: [legacy.clear_notification(nid) for nid in legacy_sample], 20)
+
+    print("-" * 60)
+    cap = 100
+    evicted = []
+    bounded = NotificationStore(max_per_user=cap, on_evict=evicted.extend)
+    start = time.perf_counter()
+    for notification in make_notifications(count, users // 10):
+        bounded.add(notification)
+    elapsed = time.perf_counter() - start
+    print(f"Retention: {count:,d} adds to {users // 10:,d} users, {cap} kept per user")
+    print(f"  {elapsed / count * 1e6:.2f} us/add   stored {len(bounded):,d}   evicted {len(evicted):,d}")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,104 @@
+"""
+Notification stream benchmark
+Measures publish-to-client latency for stream subscribers (one reader thread
+per client, like the SSE route), fan-out cost with many connected clients,
+and that a client that stops reading is dropped without slowing anyone else.
+For comparison, a client polling GET /api/notifications every N seconds sees
+a new notification N/2 seconds late on average.
+
+Usage: python bench_notification_stream.py [clients] [notifications]
+"""
+
+import sys
+import threading
+import time
+
+from notification_stream import NotificationBroker
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def bench_latency(clients, notifications, users=10):
+    broker = NotificationBroker(max_queue=notifications + 1)
+    lags = []
+    lock = threading.Lock()
+
+    def reader(subscriber):
+        for _ in range(notifications):
+            notification = subscriber.get(5)
+            with lock:
+                lags.append(time.perf_counter() - notification['sent_at'])
+
+    readers = []
+    for n in range(clients):
+        thread = threading.Thread(target=reader, args=(broker.subscribe(f'user_{n % users}'),), daemon=True)
+        thread.start()
+        readers.append(thread)
+
+    for n in range(notifications):
+        for user in range(users):
+            broker.fan_out({'id': f'{n}_{user}', 'user_id': f'user_{user}', 'sent_at': time.perf_counter()})
+        time.sleep(0.01)
+    for thread in readers:
+        thread.join()
+
+    print(f"Latency, {clients} clients over {users} users, {notifications} notifications per user")
+    print(f"  p50 {percentile(lags, 0.5) * 1000:.2f} ms   p99 {percentile(lags, 0.99) * 1000:.2f} ms   "
+          f"(polling every 5 s: ~2500 ms average)")
+
+
+def bench_fan_out(clients, rounds=200):
+    broker = NotificationBroker(max_queue=rounds + 1)
+    for _ in range(clients):
+        broker.subscribe('user_0')
+    start = time.perf_counter()
+    for n in range(rounds):
+        broker.fan_out({'id': str(n), 'user_id': 'user_0'})
+    elapsed = time.perf_counter() - start
+    print(f"Fan-out to {clients} clients of one user")
+    print(f"  {elapsed / rounds * 1000:.2f} ms per notification   {elapsed / (rounds * clients) * 1e6:.2f} us per client")
+
+
+def bench_slow_consumer(max_queue=100, notifications=1000):
+    broker = NotificationBroker(max_queue=max_queue)
+    stalled = broker.subscribe('user_0')
+    healthy = broker.subscribe('user_0')
+    received = []
+
+    def reader():
+        while len(received) < notifications and not healthy.dropped:
+            notification = healthy.get(1)
+            if notification:
+                received.append(notification)
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    start = time.perf_counter()
+    for n in range(notifications):
+        broker.fan_out({'id': str(n), 'user_id': 'user_0'})
+        if n % 10 == 9:
+            time.sleep(0.001)  # a realistic burst rate that the healthy client keeps up with
+    elapsed = time.perf_counter() - start
+    thread.join()
+
+    print(f"Stalled client with a {max_queue}-notification queue, {notifications} notifications")
+    print(f"  stalled dropped: {stalled.dropped}   healthy received {len(received)}   "
+          f"publishing took {elapsed * 1000:.1f} ms")
+
+
+def run():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    notifications = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    print("=" * 60)
+    bench_latency(clients, notifications)
+    print("-" * 60)
+    bench_fan_out(10000)
+    print("-" * 60)
+    bench_slow_consumer()
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,158 @@
+"""
+Ollama client benchmark against a local stub Ollama server
+Compares a bare requests.post per call (new TCP connection each time) with the
+pooled keep-alive session, and checks the concurrency limiter bounds in-flight
+generations.
+
+Usage: python bench_ollama.py [requests] [concurrent_clients]
+"""
+
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from ai_model_ollama import JarvisAIOllama
+
+TOKENS = ["Good ", "evening, ", "sir. ", "All ", "systems ", "operational."]
+TOKEN_DELAY = 0.005
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Speaks just enough of the Ollama API: /api/tags and streaming /api/generate"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        body = json.dumps({'models': [{'name': 'llama3.1'}]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with self.server.lock:
+            self.server.active += 1
+            self.server.peak_active = max(self.server.peak_active, self.server.active)
+        try:
+            if payload.get('stream', True):
+                self._stream()
+            else:
+                time.sleep(TOKEN_DELAY * len(TOKENS))
+                body = json.dumps({'response': ''.join(TOKENS), 'done': True}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        finally:
+            with self.server.lock:
+                self.server.active -= 1
+
+    def _stream(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        lines = [{'response': token, 'done': False} for token in TOKENS] + [{'response': '', 'done': True}]
+        for line in lines:
+            time.sleep(TOKEN_DELAY)
+            data = (json.dumps(line) + '\n').encode()
+            self.wfile.write(f'{len(data):X}\r\n'.encode() + data + b'\r\n')
+            self.wfile.flush()
+        self.wfile.write(b'0\r\n\r\n')
+
+
+def start_stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubOllamaHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.active = 0
+    server.peak_active = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def reset(server):
+    with server.lock:
+        server.connections = 0
+        server.peak_active = 0
+
+
+def bare_call(url):
+    """The old client: a fresh connection and a blocking, non-streamed generation per call"""
+    response = requests.post(
+        f'{url}/api/generate',
+        json={'model': 'llama3.1', 'prompt': 'hi', 'stream': False},
+        headers={'Connection': 'close'},
+        timeout=30
+    )
+    return response.json()['response']
+
+
+def run():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    server = start_stub_server()
+    url = f'http://127.0.0.1:{server.server_address[1]}'
+
+    print("=" * 60)
+    print(f"Stub Ollama at {url}, {count} sequential requests")
+    print("=" * 60)
+
+    reset(server)
+    start = time.perf_counter()
+    for _ in range(count):
+        bare_call(url)
+    elapsed = time.perf_counter() - start
+    print(f"bare requests.post: {elapsed / count * 1000:7.2f} ms/req, {server.connections} connections")
+
+    jarvis = JarvisAIOllama(base_url=url, max_concurrent=2, queue_timeout=30)
+    reset(server)
+    start = time.perf_counter()
+    first_token_ms = []
+    for _ in range(count):
+        t0 = time.perf_counter()
+        for i, _token in enumerate(jarvis.process_command_stream('hi')):
+            if i == 0:
+                first_token_ms.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - start
+    print(f"pooled + streaming: {elapsed / count * 1000:7.2f} ms/req, {server.connections} connections, "
+          f"first token {sum(first_token_ms) / len(first_token_ms):.2f} ms")
+
+    print("-" * 60)
+    reset(server)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(lambda _: jarvis.process_command('hi'), range(count)))
+    elapsed = time.perf_counter() - start
+    print(f"{clients} concurrent clients, limit {jarvis.max_concurrent}: {count / elapsed:.1f} req/s, "
+          f"peak in-flight at server {server.peak_active}, {server.connections} connections")
+
+    busy = JarvisAIOllama(base_url=url, max_concurrent=1, queue_timeout=0)
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        replies = list(pool.map(lambda _: busy.process_command('hi'), range(clients * 4)))
+    print(f"backpressure with limit 1 and no queueing: {busy.get_pool_stats()['rejected']} of {len(replies)} rejected")
+
+    jarvis.close()
+    busy.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    run()
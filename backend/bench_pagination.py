@@ -0,0 +1,107 @@
+"""
+Task listing benchmark: full list vs keyset pages vs projected pages
+Measures response bytes and latency at 10k tasks per user for the SQLite
+local database and the in-memory file task store.
+
+Usage: python bench_pagination.py [tasks_per_user]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from local_database import LocalDatabaseService
+from pagination import LIST_COLUMNS, clamp_limit, decode_cursor, parse_fields, page_result
+from task_store import TaskStore
+
+PAGE = 50
+FIELDS = 'id,text,completed'
+REPEAT = 20
+
+
+def measure(label, fetch):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        body = json.dumps({'tasks': fetch()}, default=str)
+    elapsed = (time.perf_counter() - start) / REPEAT
+    print(f"  {label:<34} {len(body):>10,d} bytes  {elapsed * 1000:8.2f} ms")
+
+
+def walk(fetch_page):
+    """Follow cursors to the end; returns (pages, ms per page)"""
+    cursor, pages = None, 0
+    start = time.perf_counter()
+    while True:
+        page = fetch_page(cursor)
+        pages += 1
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    return pages, (time.perf_counter() - start) / pages * 1000
+
+
+def store_page(store, limit, cursor=None, fields=None):
+    """What TaskManager.get_tasks_page does for file tasks"""
+    columns = parse_fields(fields, LIST_COLUMNS['tasks'], required=('id',))
+    before_id = int(decode_cursor(cursor, size=1)[0]) if cursor else None
+    tasks = store.page(None, clamp_limit(limit) + 1, before_id)
+    if columns:
+        tasks = [{column: task.get(column) for column in columns} for task in tasks]
+    return page_result(tasks, limit, lambda task: (task['id'],))
+
+
+def run():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    now = datetime.now()
+
+    with tempfile.TemporaryDirectory() as directory:
+        local_db = LocalDatabaseService(os.path.join(directory, 'jarvis.db'))
+        user_id = local_db.create_user('tony@stark.com', 'password', 'Tony Stark')['id']
+        conn = local_db._connection()
+        with conn:
+            conn.executemany(
+                'INSERT INTO tasks (id, user_id, text, completed, scheduled_for, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(f'task-{n:06d}', user_id, f'Task number {n}: pick up the suit from the workshop', n % 3 == 0,
+                  (now + timedelta(hours=n)).isoformat(), (now + timedelta(seconds=n)).isoformat(), now.isoformat())
+                 for n in range(count)]
+            )
+
+        print("=" * 72)
+        print(f"SQLite local database, {count} tasks for one user")
+        print("=" * 72)
+        measure("full list", lambda: local_db.get_user_tasks(user_id))
+        measure(f"first page (limit={PAGE})", lambda: local_db.get_user_tasks_page(user_id, PAGE)['items'])
+        measure(f"first page, fields={FIELDS}",
+                lambda: local_db.get_user_tasks_page(user_id, PAGE, fields=FIELDS)['items'])
+        deep = local_db.get_user_tasks_page(user_id, 200)
+        for _ in range(count // 400):
+            deep = local_db.get_user_tasks_page(user_id, 200, deep['next_cursor'])
+        measure("page from the middle", lambda: local_db.get_user_tasks_page(user_id, PAGE, deep['next_cursor'])['items'])
+        pages, per_page = walk(lambda cursor: local_db.get_user_tasks_page(user_id, PAGE, cursor))
+        print(f"  walked {pages} pages, {per_page:.2f} ms/page")
+        local_db.close()
+
+    store = TaskStore([{
+        'id': n,
+        'text': f'Task number {n}: pick up the suit from the workshop',
+        'completed': n % 3 == 0,
+        'createdAt': (now + timedelta(seconds=n)).isoformat(),
+        'scheduledFor': (now + timedelta(hours=n)).isoformat()
+    } for n in range(1, count + 1)])
+
+    print("=" * 72)
+    print(f"File task store, {count} tasks")
+    print("=" * 72)
+    measure("full list", lambda: store.all(None))
+    measure(f"first page (limit={PAGE})", lambda: store_page(store, PAGE)['items'])
+    measure(f"first page, fields={FIELDS}", lambda: store_page(store, PAGE, fields=FIELDS)['items'])
+    pages, per_page = walk(lambda cursor: store_page(store, PAGE, cursor))
+    print(f"  walked {pages} pages, {per_page:.3f} ms/page")
+
+
+if __name__ == '__main__':
+    run()
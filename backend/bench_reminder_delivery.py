@@ -0,0 +1,118 @@
+"""
+Reminder delivery benchmark (headless)
+Fires a burst of reminders the old way (a thread and a TTS engine per alarm)
+and through the ReminderDelivery pool, with a fake engine that takes a fixed
+time to start and to speak. Reports peak threads, engines created,
+announcements made and how long the burst took to deliver.
+
+Usage: python bench_reminder_delivery.py [reminders] [speak_ms] [engine_init_ms]
+"""
+
+import sys
+import threading
+import time
+
+from reminder_delivery import ReminderDelivery, RecordingSink, announcement
+
+
+class FakeEngine:
+    created = 0
+    lock = threading.Lock()
+
+    def __init__(self, init_delay, speak_delay):
+        time.sleep(init_delay)
+        self.speak_delay = speak_delay
+        with FakeEngine.lock:
+            FakeEngine.created += 1
+
+    def say(self, text):
+        time.sleep(self.speak_delay)
+
+
+class FakeAudioSink(RecordingSink):
+    """RecordingSink with one shared FakeEngine spoken through one at a time, like AudioSink"""
+
+    def __init__(self, init_delay, speak_delay):
+        super().__init__()
+        self.init_delay = init_delay
+        self.speak_delay = speak_delay
+        self._engine = None
+        self._speak_lock = threading.Lock()
+
+    def deliver(self, tasks, text):
+        with self._speak_lock:
+            if self._engine is None:
+                self._engine = FakeEngine(self.init_delay, self.speak_delay)
+            self._engine.say(text)
+        super().deliver(tasks, text)
+
+
+def watch_threads(stop, peak):
+    while not stop.is_set():
+        peak[0] = max(peak[0], threading.active_count())
+        time.sleep(0.001)
+
+
+def bench_thread_per_alarm(tasks, init_delay, speak_delay):
+    """What _play_alarm_and_speak used to do"""
+    FakeEngine.created = 0
+    threads = []
+
+    def alarm_thread(task):
+        engine = FakeEngine(init_delay, speak_delay)
+        engine.say(announcement([task]))
+
+    start = time.perf_counter()
+    for task in tasks:
+        thread = threading.Thread(target=alarm_thread, args=(task,), daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, FakeEngine.created, len(tasks)
+
+
+def bench_pool(tasks, init_delay, speak_delay, workers=2, coalesce_window=0.25):
+    FakeEngine.created = 0
+    sink = FakeAudioSink(init_delay, speak_delay)
+    delivery = ReminderDelivery([sink], workers=workers, coalesce_window=coalesce_window)
+    delivery.start()
+
+    start = time.perf_counter()
+    for task in tasks:
+        delivery.submit(task)
+    delivery.stop(timeout=60)
+    elapsed = time.perf_counter() - start
+    stats = delivery.get_stats()
+    assert stats['delivered'] == len(tasks), stats
+    return elapsed, FakeEngine.created, stats['announcements'], stats
+
+
+def measure(label, func, *args):
+    stop, peak = threading.Event(), [threading.active_count()]
+    watcher = threading.Thread(target=watch_threads, args=(stop, peak), daemon=True)
+    watcher.start()
+    result = func(*args)
+    stop.set()
+    watcher.join()
+    elapsed, engines, announcements = result[:3]
+    print(f"  {label:<18} {elapsed:7.2f} s   peak threads {peak[0] - 1:5d}   "
+          f"engines {engines:5d}   announcements {announcements:5d}")
+    return result
+
+
+def run():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    speak_delay = (int(sys.argv[2]) if len(sys.argv) > 2 else 500) / 1000
+    init_delay = (int(sys.argv[3]) if len(sys.argv) > 3 else 100) / 1000
+    tasks = [{'id': n, 'text': f'Reminder {n}'} for n in range(count)]
+
+    print("=" * 60)
+    print(f"{count} reminders due at once, speaking {speak_delay * 1000:.0f} ms, engine init {init_delay * 1000:.0f} ms")
+    measure("thread per alarm", bench_thread_per_alarm, tasks, init_delay, speak_delay)
+    stats = measure("delivery pool", bench_pool, tasks, init_delay, speak_delay)[3]
+    print(f"  pool: max queue depth {stats['max_queue_depth']}, p99 delivery lag {stats['p99_lag_ms']} ms")
+
+
+if __name__ == '__main__':
+    run()
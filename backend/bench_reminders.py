@@ -0,0 +1,135 @@
+"""
+Reminder scheduler benchmark
+Schedules 1M reminders on the heap scheduler, reschedules and cancels a slice
+of them, drains the heap, times persisting and restoring the queue in SQLite,
+measures firing lag on a live timer thread, and the extra lag for reminders
+forwarded from a follower process to the dispatching one.
+
+Usage: python bench_reminders.py [reminders]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from local_database import LocalDatabaseService
+from reminder_scheduler import FileLease, ReminderScheduler
+
+
+def timed(label, func, count):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<36} {elapsed:8.2f} s   {elapsed / count * 1e6:8.2f} us/op")
+    return result
+
+
+def bench_heap(count):
+    scheduler = ReminderScheduler(lambda payload: None)
+    now = time.time()
+    payload = {'id': 0, 'text': 'Reminder'}
+    tenth = count // 10
+
+    print(f"Heap scheduler, {count:,d} reminders")
+    timed("schedule", lambda: [scheduler.schedule(f'task_{n}', now + n % 86400, payload) for n in range(count)], count)
+    timed(f"reschedule {tenth:,d}", lambda: [scheduler.schedule(f'task_{n}', now + 3600, payload)
+                                             for n in range(0, count, 10)], tenth)
+    timed(f"cancel {tenth:,d}", lambda: [scheduler.cancel(f'task_{n}') for n in range(5, count, 10)], tenth)
+    due = timed("drain (pop every due reminder)", lambda: scheduler.pop_due(now + 86400), count)
+    assert len(due) == count - tenth, len(due)
+    assert all(due[i][1] <= due[i + 1][1] for i in range(len(due) - 1))
+
+
+def bench_persistence(count):
+    with tempfile.TemporaryDirectory() as directory:
+        queue = LocalDatabaseService(os.path.join(directory, 'jarvis.db'))
+        now = time.time()
+        payload = {'id': 0, 'text': 'Reminder'}
+        print(f"Persistent queue (SQLite), {count:,d} reminders")
+
+        scheduler = ReminderScheduler(lambda payload: None, queue=queue)
+        timed("schedule_many + persist", lambda: scheduler.schedule_many(
+            (f'task_{n}', now + 3600 + n % 86400, payload) for n in range(count)), count)
+
+        restored = ReminderScheduler(lambda payload: None, queue=queue)
+        timed("restore at startup", restored.start, count)
+        restored.stop()
+        assert len(restored) == count
+        queue.close()
+
+
+def bench_lag(count=2000, spread=2.0):
+    fired = threading.Event()
+    lags = []
+
+    def callback(payload):
+        lags.append(time.time() - payload['due_at'])
+        if len(lags) == count:
+            fired.set()
+
+    scheduler = ReminderScheduler(callback)
+    scheduler.start()
+    start = time.time() + 0.2
+    for n in range(count):
+        due_at = start + spread * n / count
+        scheduler.schedule(f'task_{n}', due_at, {'due_at': due_at})
+    fired.wait(spread + 5)
+    scheduler.stop()
+
+    lags.sort()
+    print(f"Firing lag, {count} reminders over {spread:.0f} s on one timer thread")
+    print(f"  p50 {lags[len(lags) // 2] * 1000:.2f} ms   p99 {lags[int(len(lags) * 0.99)] * 1000:.2f} ms   "
+          f"max {lags[-1] * 1000:.2f} ms")
+
+
+def bench_forwarding(count=500, spread=2.0, poll_interval=0.1):
+    """Two schedulers sharing a queue and lease stand in for two gunicorn workers"""
+    with tempfile.TemporaryDirectory() as directory:
+        fired = threading.Event()
+        lags = []
+
+        def callback(payload):
+            lags.append(time.time() - payload['due_at'])
+            if len(lags) == count:
+                fired.set()
+
+        def worker(callback):
+            queue = LocalDatabaseService(os.path.join(directory, 'jarvis.db'))
+            lease = FileLease(os.path.join(directory, 'reminders.lock'))
+            return ReminderScheduler(callback, queue=queue, lease=lease, poll_interval=poll_interval)
+
+        dispatcher, follower = worker(callback), worker(lambda payload: None)
+        dispatcher.start()
+        follower.start()
+        assert dispatcher.leader and not follower.leader
+
+        start = time.time() + 0.2
+        for n in range(count):
+            due_at = start + spread * n / count
+            follower.schedule(f'task_{n}', due_at, {'due_at': due_at})
+        fired.wait(spread + 5)
+        follower.stop()
+        dispatcher.stop()
+
+        lags.sort()
+        print(f"Forwarded from a follower, {count} reminders, {poll_interval * 1000:.0f} ms poll interval")
+        print(f"  fired {len(lags)}   p50 {lags[len(lags) // 2] * 1000:.2f} ms   "
+              f"p99 {lags[int(len(lags) * 0.99)] * 1000:.2f} ms   max {lags[-1] * 1000:.2f} ms")
+
+
+def run():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    print("=" * 60)
+    bench_heap(count)
+    print("-" * 60)
+    bench_persistence(count)
+    print("-" * 60)
+    bench_lag()
+    print("-" * 60)
+    bench_forwarding()
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,80 @@
+"""
+Streaming benchmark for JARVIS
+Compares time-to-first-token of process_command_stream against the
+blocking process_command, using a local fake Groq client (no API key needed)
+"""
+
+import time
+from types import SimpleNamespace
+
+from ai_model_groq import JarvisAIGroq
+
+
+class FakeGroqClient:
+    """Minimal stand-in for groq.Groq that yields chunks with a fixed delay"""
+
+    def __init__(self, response, chunk_delay=0.02, first_token_delay=0.15):
+        self.response = response
+        self.chunk_delay = chunk_delay
+        self.first_token_delay = first_token_delay
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _pieces(self):
+        words = self.response.split(' ')
+        return [word + (' ' if i < len(words) - 1 else '') for i, word in enumerate(words)]
+
+    def _create(self, messages, stream=False, **kwargs):
+        if not stream:
+            time.sleep(self.first_token_delay + self.chunk_delay * len(self._pieces()))
+            message = SimpleNamespace(content=self.response)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+        return self._stream()
+
+    def _stream(self):
+        time.sleep(self.first_token_delay)
+        for i, piece in enumerate(self._pieces()):
+            if i:
+                time.sleep(self.chunk_delay)
+            delta = SimpleNamespace(content=piece)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+def run():
+    conversation = ("Good evening, sir. I was just running some diagnostics. "
+                    "Turns out, I'm still smarter than your average toaster.")
+    task = "TASK_CREATE: call John | TIME: 3 PM"
+
+    print("=" * 50)
+    print("Streaming vs blocking (fake Groq client)")
+    print("=" * 50)
+
+    jarvis = JarvisAIGroq(client=FakeGroqClient(conversation))
+
+    start = time.perf_counter()
+    jarvis.process_command("Hello JARVIS")
+    blocking_ms = (time.perf_counter() - start) * 1000
+
+    streamed = []
+    done = None
+    for event in jarvis.process_command_stream("Hello JARVIS"):
+        if event['type'] == 'token':
+            streamed.append(event['content'])
+        elif event['type'] == 'done':
+            done = event
+
+    assert ''.join(streamed) == conversation, "streamed text does not match response"
+    print(f"Blocking first word:  {blocking_ms:8.1f} ms")
+    print(f"Streaming first word: {done['ttft_ms']:8.1f} ms  (total {done['total_ms']:.1f} ms, {done['tokens']} chunks)")
+
+    # Task markers must be detected and never streamed as text
+    jarvis = JarvisAIGroq(client=FakeGroqClient(task, chunk_delay=0))
+    events = list(jarvis.process_command_stream("Remind me to call John at 3 PM"))
+    tokens = [e for e in events if e['type'] == 'token']
+    tasks = [e for e in events if e['type'] == 'task']
+    assert not tokens, "task marker leaked into token stream"
+    assert tasks == [{'type': 'task', 'text': 'call John', 'time': '3 PM'}], tasks
+    print("Task marker detection: OK")
+
+
+if __name__ == '__main__':
+    run()
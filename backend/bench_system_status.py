@@ -0,0 +1,54 @@
+"""
+System status benchmark
+Compares the old inline psutil.cpu_percent(interval=1) status check with
+reading the background sampler's latest snapshot, and measures what one
+sample costs the sampler thread.
+
+Usage: python bench_system_status.py [requests]
+"""
+
+import sys
+import time
+
+import psutil
+
+from system_monitor import SystemMonitor
+
+
+def legacy_status():
+    return {'cpu': psutil.cpu_percent(interval=1), 'memory': psutil.virtual_memory().percent}
+
+
+def run():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    monitor = SystemMonitor(interval=0.05, history=300)
+    monitor.start()
+    time.sleep(1)
+
+    print("=" * 60)
+    start = time.perf_counter()
+    legacy_status()
+    print(f"Inline cpu_percent(interval=1):   {(time.perf_counter() - start) * 1000:10.2f} ms/request")
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        monitor.latest()
+    print(f"Sampler latest():                 {(time.perf_counter() - start) / requests * 1e6:10.2f} us/request")
+
+    start = time.perf_counter()
+    for _ in range(requests // 100):
+        monitor.history(60)
+    print(f"Sampler history(60):              {(time.perf_counter() - start) / (requests // 100) * 1e6:10.2f} us/request")
+
+    monitor.stop()
+    samples = 200
+    start = time.perf_counter()
+    for _ in range(samples):
+        monitor._record(monitor.sample())
+    print(f"Cost of one background sample:    {(time.perf_counter() - start) / samples * 1000:10.2f} ms")
+    print(f"Samples buffered: {len(monitor.history(1000))}, latest: cpu {monitor.latest()['cpu']}%, "
+          f"memory {monitor.latest()['memory']}%")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,102 @@
+"""
+Task persistence benchmark
+Compares rewriting the whole tasks.json (indent=2) on every change with the
+append-only TaskJournal, and measures startup recovery (snapshot + replay).
+
+Usage: python bench_task_journal.py [task counts...]   e.g. 10000 100000 1000000
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from task_journal import TaskJournal
+from task_store import TaskStore
+
+WRITES = 2000
+WRITERS = 8
+
+
+def make_tasks(count):
+    now = datetime.now()
+    return [{
+        'id': task_id,
+        'text': f'Task number {task_id}',
+        'completed': False,
+        'createdAt': now.isoformat(),
+        'scheduledFor': (now + timedelta(minutes=task_id % 10000)).isoformat(),
+        'userId': None
+    } for task_id in range(1, count + 1)]
+
+
+def bench_rewrite(path, tasks):
+    """The old _save_tasks: one full pretty-printed rewrite per change"""
+    repeat = max(1, min(20, 200000 // len(tasks)))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        with open(path, 'w') as f:
+            json.dump({'tasks': tasks, 'counter': len(tasks) + 1}, f, indent=2, default=str)
+    per_write = (time.perf_counter() - start) / repeat
+    print(f"  rewrite tasks.json      {per_write * 1000:10.2f} ms/change   {1 / per_write:10.0f} changes/s")
+
+
+def bench_journal(directory, tasks, sync_interval, writers, label):
+    snapshot = os.path.join(directory, f'journal_{label}.json')
+    journal = TaskJournal(snapshot, sync_interval=sync_interval, compact_every=10 ** 9)
+    journal.load()
+    journal.compact(tasks, len(tasks) + 1)
+
+    def write(n):
+        journal.log_update(tasks[n % len(tasks)]['id'], {'completed': True, 'text': f'Updated {n}'})
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=writers) as pool:
+        list(pool.map(write, range(WRITES)))
+    journal.flush()
+    elapsed = time.perf_counter() - start
+    fsyncs = journal.fsyncs
+    journal.close()
+    print(f"  journal {label:<15} {elapsed / WRITES * 1000:10.3f} ms/change   {WRITES / elapsed:10.0f} changes/s"
+          f"   ({fsyncs} fsyncs)")
+
+
+def bench_recovery(directory, tasks):
+    snapshot = os.path.join(directory, 'recovery.json')
+    journal = TaskJournal(snapshot, sync_interval=1.0, compact_every=10 ** 9)
+    journal.load()
+    journal.compact(tasks, len(tasks) + 1)
+    replay = min(len(tasks), 100000)
+    for n in range(replay):
+        journal.log_update(tasks[n]['id'], {'completed': True})
+    journal.close()
+
+    start = time.perf_counter()
+    loaded, counter = TaskJournal(snapshot).load()
+    store = TaskStore(loaded)
+    elapsed = time.perf_counter() - start
+    assert len(store) == len(tasks) and counter == len(tasks) + 1
+    assert all(task['completed'] for task in loaded[:replay])
+    print(f"  recovery (snapshot + {replay} replayed) {elapsed * 1000:10.0f} ms")
+
+
+def run():
+    counts = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+    with tempfile.TemporaryDirectory() as directory:
+        for count in counts:
+            tasks = make_tasks(count)
+            print("=" * 60)
+            print(f"{count} tasks, {WRITES} changes")
+            print("=" * 60)
+            bench_rewrite(os.path.join(directory, 'rewrite.json'), tasks)
+            bench_journal(directory, tasks, 0, 1, 'fsync each')
+            bench_journal(directory, tasks, 0, WRITERS, f'group x{WRITERS}')
+            bench_journal(directory, tasks, 0.05, WRITERS, 'fsync 50ms')
+            bench_recovery(directory, tasks)
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,118 @@
+"""
+Task store benchmark
+Compares the old list-of-dicts approach (linear scans, re-parsing every
+scheduledFor on each upcoming query) with the indexed TaskStore at 100k tasks.
+
+Usage: python bench_task_store.py [tasks]
+"""
+
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from dateutil import parser
+
+from task_store import TaskStore
+
+USERS = [None] + [f'user_{n}' for n in range(50)]
+
+
+def make_tasks(count):
+    now = datetime.now()
+    rng = random.Random(42)
+    tasks = []
+    for task_id in range(1, count + 1):
+        scheduled = now + timedelta(minutes=rng.randint(-60 * 24 * 30, 60 * 24 * 30))
+        tasks.append({
+            'id': task_id,
+            'text': f'Task number {task_id}',
+            'completed': rng.random() < 0.3,
+            'createdAt': now.isoformat(),
+            'scheduledFor': scheduled.isoformat() if rng.random() < 0.8 else None,
+            'userId': rng.choice(USERS)
+        })
+    return tasks
+
+
+class ListTasks:
+    """The previous TaskManager storage: a plain list scanned on every call"""
+
+    def __init__(self, tasks):
+        self.tasks = tasks
+
+    def get(self, task_id):
+        for task in self.tasks:
+            if task['id'] == task_id:
+                return task
+        return None
+
+    def update(self, task_id, updates):
+        for i, task in enumerate(self.tasks):
+            if task['id'] == task_id:
+                self.tasks[i].update(updates)
+                return self.tasks[i]
+        return None
+
+    def remove(self, task_id):
+        self.tasks = [task for task in self.tasks if task['id'] != task_id]
+
+    def all(self, user_id):
+        return [task for task in self.tasks if task.get('userId') == user_id]
+
+    def upcoming(self, now, cutoff):
+        upcoming = []
+        for task in self.tasks:
+            if task.get('scheduledFor') and not task['completed']:
+                scheduled = parser.parse(task['scheduledFor'])
+                if now <= scheduled <= cutoff:
+                    upcoming.append(task)
+        return sorted(upcoming, key=lambda x: x['scheduledFor'])
+
+
+def timed(label, func, repeat):
+    start = time.perf_counter()
+    for n in range(repeat):
+        func(n)
+    per_call = (time.perf_counter() - start) / repeat
+    unit, scale = ('ms', 1e3) if per_call >= 1e-3 else ('us', 1e6)
+    print(f"  {label:<22} {per_call * scale:10.2f} {unit}")
+    return per_call
+
+
+def bench(name, store, count, rng, repeat):
+    print(f"{name}:")
+    ids = [rng.randint(1, count) for _ in range(repeat)]
+    now = datetime.now()
+    timed("get by id", lambda n: store.get(ids[n]), repeat)
+    timed("update", lambda n: store.update(ids[n], {'completed': True}), repeat)
+    timed("list for one user", lambda n: store.all(USERS[n % len(USERS)]), max(1, repeat // 10))
+    upcoming = timed("upcoming 24h", lambda n: store.upcoming(now, now + timedelta(hours=24)), max(1, repeat // 100))
+    timed("delete", lambda n: store.remove(ids[n]), max(1, repeat // 10))
+    return upcoming
+
+
+def run():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print("=" * 60)
+    print(f"Task storage with {count} tasks")
+    print("=" * 60)
+
+    old = bench("list scan", ListTasks(make_tasks(count)), count, random.Random(1), 100)
+
+    tasks = make_tasks(count)
+    start = time.perf_counter()
+    store = TaskStore(tasks)
+    print(f"index build: {(time.perf_counter() - start) * 1000:.0f} ms")
+    new = bench("TaskStore", store, count, random.Random(1), 100)
+
+    now = datetime.now()
+    expected = ListTasks(make_tasks(count)).upcoming(now, now + timedelta(hours=24))
+    actual = TaskStore(make_tasks(count)).upcoming(now, now + timedelta(hours=24))
+    assert [task['id'] for task in expected] == [task['id'] for task in actual], "upcoming results differ"
+    print("-" * 60)
+    print(f"upcoming query speedup: {old / new:.0f}x, {len(actual)} tasks in window (results identical)")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,188 @@
+"""
+Time parser benchmark
+Checks parse_task_command against a corpus of task commands (with a fixed
+"now"), then compares its per-command latency with the previous
+pattern-by-pattern parser from TaskManager.
+
+Usage: python bench_time_parser.py [iterations]
+"""
+
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+from time_parser import parse_task_command
+
+# Wednesday morning
+NOW = datetime(2026, 10, 14, 10, 0, 0)
+
+
+def at(days, hour, minute=0):
+    return (NOW + timedelta(days=days)).replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+# (command, expected task text, expected datetime or None)
+CORPUS = [
+    ("Remind me to call John at 3 PM", "Call John", at(0, 15)),
+    ("remind me to call mom at 5:30pm", "Call mom", at(0, 17, 30)),
+    ("Remind me to take pills at 8am", "Take pills", at(1, 8)),
+    ("remind me to stretch at 9:15 a.m.", "Stretch", at(1, 9, 15)),
+    ("Schedule a meeting tomorrow at 10 AM", "A meeting", at(1, 10)),
+    ("schedule a meeting at 10am tomorrow", "A meeting", at(1, 10)),
+    ("remind me to submit the report tomorrow at 5", "Submit the report", at(1, 5)),
+    ("remind me to water the plants tomorrow", "Water the plants", at(1, 9)),
+    ("Set reminder to check emails in 30 minutes", "Check emails", NOW + timedelta(minutes=30)),
+    ("remind me to stand up in 2 hours 30 minutes", "Stand up", NOW + timedelta(hours=2, minutes=30)),
+    ("remind me to leave in 1 hour and 15 minutes", "Leave", NOW + timedelta(hours=1, minutes=15)),
+    ("remind me to check the oven in an hour", "Check the oven", NOW + timedelta(hours=1)),
+    ("remind me to call back after 45 secs", "Call back", NOW + timedelta(seconds=45)),
+    ("remind me to renew the lease in 3 weeks", "Renew the lease", NOW + timedelta(weeks=3)),
+    ("add a task to pay rent in 2 days", "Pay rent", NOW + timedelta(days=2)),
+    ("remind me to book flights next week", "Book flights", at(5, 9)),
+    ("remind me to go to the gym next monday", "Go to the gym", at(5, 9)),
+    ("remind me to go to the gym on friday at 6pm", "Go to the gym", at(2, 18)),
+    ("remind me to plan the sprint this wednesday", "Plan the sprint", at(7, 9)),
+    ("remind me to visit grandma the day after tomorrow", "Visit grandma", at(2, 9)),
+    ("remind me to file taxes on 2026-11-02", "File taxes", datetime(2026, 11, 2, 9, 0)),
+    ("remind me to deploy at 2026-10-20T14:30", "Deploy", datetime(2026, 10, 20, 14, 30)),
+    ("remind me to deploy 2026-10-20 14:30", "Deploy", datetime(2026, 10, 20, 14, 30)),
+    ("remind me to eat lunch at noon", "Eat lunch", at(0, 12)),
+    ("remind me to lock up at midnight", "Lock up", at(1, 0)),
+    ("remind me to review PRs at 17:45", "Review PRs", at(0, 17, 45)),
+    ("remind me to watch the game tonight at 9pm", "Watch the game", at(0, 21)),
+    ("remind me to clean my room today", "Clean my room", NOW + timedelta(hours=1)),
+    ("remind me at 5pm to call mom", "Call mom", at(0, 17)),
+    ("take the 5 pm train at 4 pm", "Take the 5 pm train", at(0, 16)),
+    ("remind me to catch the 7:30 am bus by 7am tomorrow", "Catch the 7:30 am bus", at(1, 7)),
+    ("remind me the 6 pm show starts, leave 5 pm", "The 6 pm show starts, leave", at(0, 17)),
+    ("create a task to buy 2 apples", "Buy 2 apples", None),
+    ("task: buy groceries please", "Buy groceries", None),
+    ("add task to finish the slides for me", "Finish the slides", None),
+    ("remind me to meet Sam at 5", "Meet Sam at 5", None),
+    ("buy milk", "Buy milk", None),
+]
+
+
+# ==================== PREVIOUS PARSER ====================
+
+def legacy_parse_task_command(command):
+    """TaskManager._parse_task_command before the single-pass parser"""
+    command_lower = command.lower()
+    time_patterns = [
+        (r'at (\d{1,2}):(\d{2})\s*(am|pm)?', 'time'),
+        (r'at (\d{1,2})\s*(am|pm)', 'time'),
+        (r'(\d{1,2}):(\d{2})\s*(am|pm)', 'time'),
+        (r'(\d{1,2})\s*(am|pm)', 'time'),
+        (r'in (\d+)\s*(second|minute|hour|day)s?', 'relative'),
+        (r'after (\d+)\s*(second|minute|hour|day)s?', 'relative'),
+        (r'tomorrow\s+at\s+(\d{1,2}):?(\d{2})?\s*(am|pm)?', 'tomorrow_time'),
+        (r'tomorrow', 'tomorrow'),
+        (r'next (monday|tuesday|wednesday|thursday|friday|saturday|sunday)', 'day_of_week'),
+        (r'(today|tonight)', 'today')
+    ]
+    scheduled_time = None
+    time_match = None
+    for pattern, time_type in time_patterns:
+        match = re.search(pattern, command_lower)
+        if match:
+            time_match = match
+            scheduled_time = legacy_parse_time(match, time_type)
+            break
+
+    task_text = command
+    if time_match:
+        task_text = command[:time_match.start()] + command[time_match.end():]
+    trigger_patterns = [
+        r'^remind me to\s+', r'^remind me\s+', r'^set a reminder to\s+', r'^set a reminder for\s+',
+        r'^set reminder to\s+', r'^create a task to\s+', r'^create task to\s+', r'^add a task to\s+',
+        r'^add task to\s+', r'^schedule\s+', r'^task:\s+', r'^task\s+', r'\s+for me$', r'\s+please$'
+    ]
+    for pattern in trigger_patterns:
+        task_text = re.sub(pattern, '', task_text, flags=re.IGNORECASE)
+    task_text = ' '.join(task_text.split()).strip()
+    if task_text:
+        task_text = task_text[0].upper() + task_text[1:]
+    return task_text, scheduled_time.isoformat() if scheduled_time else None
+
+
+def legacy_parse_time(match, time_type):
+    now = datetime.now()
+    if time_type == 'time':
+        if len(match.groups()) == 3:
+            hour, minute, period = int(match.group(1)), int(match.group(2)), match.group(3)
+        else:
+            hour, minute, period = int(match.group(1)), 0, match.group(2)
+        if period and period.lower() == 'pm' and hour != 12:
+            hour += 12
+        elif period and period.lower() == 'am' and hour == 12:
+            hour = 0
+        scheduled = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if scheduled < now:
+            scheduled += timedelta(days=1)
+        return scheduled
+    elif time_type == 'relative':
+        amount, unit = int(match.group(1)), match.group(2)
+        seconds = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}[unit]
+        return now + timedelta(seconds=amount * seconds)
+    elif time_type == 'tomorrow':
+        return (now + timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+    elif time_type == 'tomorrow_time':
+        hour = int(match.group(1))
+        minute = int(match.group(2)) if match.group(2) else 0
+        period = match.group(3)
+        if period and period.lower() == 'pm' and hour != 12:
+            hour += 12
+        elif period and period.lower() == 'am' and hour == 12:
+            hour = 0
+        return (now + timedelta(days=1)).replace(hour=hour, minute=minute, second=0, microsecond=0)
+    elif time_type == 'today':
+        return now + timedelta(hours=1)
+    elif time_type == 'day_of_week':
+        days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+        days_ahead = days.index(match.group(1)) - now.weekday()
+        if days_ahead <= 0:
+            days_ahead += 7
+        return (now + timedelta(days=days_ahead)).replace(hour=9, minute=0, second=0, microsecond=0)
+    return None
+
+
+# ==================== BENCHMARK ====================
+
+def check_corpus():
+    failures = 0
+    for command, expected_text, expected_time in CORPUS:
+        text, scheduled = parse_task_command(command, now=NOW)
+        if (text, scheduled) != (expected_text, expected_time):
+            failures += 1
+            print(f"  FAIL {command!r}: got ({text!r}, {scheduled}), expected ({expected_text!r}, {expected_time})")
+    print(f"Corpus: {len(CORPUS) - failures}/{len(CORPUS)} commands parsed as expected")
+    return failures
+
+
+def bench(label, parse, iterations):
+    commands = [command for command, _, _ in CORPUS]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for command in commands:
+            parse(command)
+    elapsed = time.perf_counter() - start
+    per_call = elapsed / (iterations * len(commands)) * 1e6
+    print(f"  {label:<24} {per_call:8.2f} us/command")
+    return per_call
+
+
+def run():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print("=" * 60)
+    failures = check_corpus()
+    print("-" * 60)
+    print(f"Latency over the corpus, {iterations} iterations")
+    legacy = bench("previous parser", legacy_parse_task_command, iterations)
+    current = bench("single-pass parser", parse_task_command, iterations)
+    print(f"  speedup: {legacy / current:.1f}x")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    run()
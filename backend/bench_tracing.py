@@ -0,0 +1,58 @@
+"""
+Tracing benchmark
+Measures the cost of a span inside a traced request and outside one (where
+it is a no-op), of starting and ending a whole request trace with a few
+stages, and of building the Server-Timing header.
+
+Usage: python bench_tracing.py [iterations]
+"""
+
+import sys
+import time
+
+import tracing
+from tracing import span, start_trace, end_trace
+
+
+def per_op(label, func, ops):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<40} {elapsed / ops * 1e6:8.3f} us/op")
+
+
+def request(stages):
+    trace, token = start_trace('POST /api/voice-command')
+    for name in stages:
+        with span(name):
+            pass
+    end_trace(trace, token, status_code=200)
+    return trace
+
+
+def run():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    tracing.trace_exporter.sample_rate = 0  # measure the request path, not file writes
+    tracing.trace_exporter.slow_ms = 0
+
+    print("=" * 60)
+    print(f"{count:,d} iterations")
+    per_op("span outside a request (no-op)", lambda: [span('stage').__enter__() for _ in range(count)], count)
+
+    def spans_in_request():
+        trace, token = start_trace('bench')
+        for _ in range(count):
+            with span('stage'):
+                pass
+        end_trace(trace, token)
+    per_op("span inside a request", spans_in_request, count)
+
+    stages = ['voice.pending', 'voice.intent', 'tasks.get_all_tasks', 'supabase.get_user_tasks']
+    per_op("request trace with 4 spans", lambda: [request(stages) for _ in range(count // 10)], count // 10)
+    trace = request(stages)
+    per_op("Server-Timing header", lambda: [trace.server_timing() for _ in range(count // 10)], count // 10)
+    print(f"  {trace.server_timing()}")
+
+
+if __name__ == '__main__':
+    run()
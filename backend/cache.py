@@ -0,0 +1,136 @@
+"""
+In-memory caching for JARVIS
+Thread-safe LRU cache with per-entry TTL, entry and memory limits, and hit/miss counters
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """LRU cache whose entries expire after a TTL, bounded by entry count and approximate bytes"""
+
+    def __init__(self, max_entries=512, ttl=300, max_bytes=1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        """Get a value, refreshing its LRU position; expired entries count as misses"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value, size = entry
+            if expires_at <= time.monotonic():
+                self._remove(key, size)
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store a value, evicting least recently used entries to stay within limits"""
+        size = self._sizeof(key) + self._sizeof(value)
+        if size > self.max_bytes:
+            return False
+
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+
+            self._entries[key] = (expires_at, value, size)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                old_key, (_, _, old_size) = self._entries.popitem(last=False)
+                self._bytes -= old_size
+                self.evictions += 1
+        return True
+
+    def delete(self, key):
+        """Remove a key if present"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            self._remove(key, entry[2])
+            return True
+
+    def delete_matching(self, predicate):
+        """Remove every key for which predicate(key, value) is true; returns how many were removed"""
+        with self._lock:
+            keys = [key for key, (_, value, _) in self._entries.items() if predicate(key, value)]
+            for key in keys:
+                self._remove(key, self._entries[key][2])
+            return len(keys)
+
+    def update(self, key, update):
+        """Replace an unexpired value with update(value), keeping its expiry; returns whether it was there"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                return False
+            expires_at, value, size = entry
+            value = update(value)
+            new_size = self._sizeof(key) + self._sizeof(value)
+            self._entries[key] = (expires_at, value, new_size)
+            self._bytes += new_size - size
+            return True
+
+    def clear(self):
+        """Remove all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Get cache counters and current usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key, size):
+        del self._entries[key]
+        self._bytes -= size
+
+    @staticmethod
+    def _sizeof(obj):
+        """Approximate memory footprint of cached keys and values"""
+        if isinstance(obj, (list, tuple)):
+            return sys.getsizeof(obj) + sum(TTLCache._sizeof(item) for item in obj)
+        if isinstance(obj, dict):
+            return sys.getsizeof(obj) + sum(
+                TTLCache._sizeof(k) + TTLCache._sizeof(v) for k, v in obj.items()
+            )
+        return sys.getsizeof(obj)
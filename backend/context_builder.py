@@ -0,0 +1,120 @@
+"""
+Context Builder for JARVIS
+Fits the system prompt and conversation history into a token budget before
+each LLM call, summarizing or dropping the oldest turns when they don't fit
+"""
+
+import re
+from functools import lru_cache
+
+# Chat templates add a few tokens around every message (role markers, separators)
+MESSAGE_OVERHEAD = 4
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text):
+    """Estimate the token count of a string without a model tokenizer
+
+    Words are split into ~4-character sub-word pieces and punctuation counts
+    as one token each, which tracks Llama-family tokenizers closely enough for
+    budgeting. Results are cached, so repeated history messages are free.
+    """
+    tokens = 0
+    for piece in _TOKEN_PATTERN.findall(text):
+        tokens += (len(piece) + 3) // 4
+    return tokens
+
+
+def count_message_tokens(message):
+    """Estimate the tokens a chat message takes in the prompt"""
+    return count_tokens(message['content']) + MESSAGE_OVERHEAD
+
+
+class ContextBuilder:
+    """Build the message list for a chat completion within a token budget"""
+
+    def __init__(self, system_prompt, budget=1200, summary_budget=120, summary_words=12):
+        self.budget = budget
+        self.summary_budget = summary_budget
+        self.summary_words = summary_words
+        self.set_system_prompt(system_prompt)
+
+    def set_system_prompt(self, system_prompt):
+        """Set the system prompt and cache its message and token count"""
+        self.system_message = {'role': 'system', 'content': system_prompt}
+        self.system_tokens = count_message_tokens(self.system_message)
+
+    def build(self, history):
+        """Build messages from history (oldest first); returns (messages, stats)
+
+        The newest message is always included. Older messages are added newest
+        first while they fit; whatever is left over is condensed into a short
+        summary if there is room for one, otherwise dropped.
+        """
+        remaining = self.budget - self.system_tokens
+        kept = []
+
+        for index in range(len(history) - 1, -1, -1):
+            tokens = count_message_tokens(history[index])
+            if kept and tokens > remaining:
+                break
+            kept.append(history[index])
+            remaining -= tokens
+        kept.reverse()
+
+        dropped = history[:len(history) - len(kept)]
+        messages = [self.system_message]
+        summary = None
+        summary_tokens = 0
+
+        if dropped:
+            summary = self._summarize(dropped)
+            summary_tokens = count_message_tokens(summary)
+            # Make room for the summary by giving up the oldest kept turns
+            while summary_tokens > remaining and len(kept) > 1:
+                oldest = kept.pop(0)
+                remaining += count_message_tokens(oldest)
+                dropped.append(oldest)
+                summary = self._summarize(dropped)
+                summary_tokens = count_message_tokens(summary)
+            if summary_tokens > min(remaining, self.summary_budget):
+                summary = None
+                summary_tokens = 0
+
+        if summary:
+            messages.append(summary)
+        messages.extend(kept)
+
+        stats = {
+            'prompt_tokens': self.budget - remaining + summary_tokens,
+            'system_tokens': self.system_tokens,
+            'history_messages': len(kept),
+            'dropped_messages': len(dropped),
+            'summarized': summary_tokens > 0,
+            'budget': self.budget
+        }
+        return messages, stats
+
+    def _summarize(self, messages):
+        """Condense old turns into one system message, keeping the start of the latest user turns"""
+        prefix = "Earlier in this conversation the user said: "
+        used = count_tokens(prefix) + MESSAGE_OVERHEAD
+        topics = []
+        for message in reversed(messages):
+            if message['role'] != 'user':
+                continue
+            words = message['content'].split()
+            topic = ' '.join(words[:self.summary_words])
+            if len(words) > self.summary_words:
+                topic += '...'
+            topic = f'"{topic}"'
+            used += count_tokens(topic) + 1
+            if used > self.summary_budget:
+                break
+            topics.append(topic)
+
+        if not topics:
+            return {'role': 'system', 'content': "Earlier parts of this conversation were omitted."}
+        return {'role': 'system', 'content': prefix + '; '.join(reversed(topics))}
@@ -0,0 +1,153 @@
+"""
+Conversation Store for JARVIS
+Keeps a bounded message history per session, with idle-session eviction.
+Backends: in-process (default) or Redis, so context is shared across gunicorn workers.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from logger import get_logger
+
+logger = get_logger('conversations')
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+class InMemoryConversationStore:
+    """Per-session ring buffers held in this process"""
+
+    def __init__(self, max_messages=10, idle_timeout=1800, max_sessions=10000):
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # session_id -> (last_access, deque), oldest access first
+        self._lock = threading.Lock()
+        self.evicted_sessions = 0
+
+    def get(self, session_id):
+        """Get a session's messages, oldest first"""
+        with self._lock:
+            entry = self._touch(session_id, create=False)
+            return list(entry[1]) if entry else []
+
+    def append(self, session_id, *messages):
+        """Append messages to a session, dropping the oldest beyond max_messages"""
+        with self._lock:
+            history = self._touch(session_id, create=True)[1]
+            history.extend(messages)
+            self._evict(time.monotonic())
+
+    def clear(self, session_id):
+        """Forget a session"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def evict_idle(self):
+        """Drop sessions idle for longer than idle_timeout; returns how many were dropped"""
+        with self._lock:
+            return self._evict(time.monotonic())
+
+    def session_count(self):
+        """Number of live sessions"""
+        return len(self._sessions)
+
+    def _touch(self, session_id, create):
+        now = time.monotonic()
+        entry = self._sessions.pop(session_id, None)
+        if entry is None:
+            if not create:
+                return None
+            entry = (now, deque(maxlen=self.max_messages))
+        entry = (now, entry[1])
+        self._sessions[session_id] = entry
+        return entry
+
+    def _evict(self, now):
+        evicted = 0
+        # Sessions are kept in access order, so idle ones are always at the front
+        while self._sessions:
+            session_id, (last_access, _) = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and now - last_access <= self.idle_timeout:
+                break
+            del self._sessions[session_id]
+            evicted += 1
+        self.evicted_sessions += evicted
+        return evicted
+
+
+class RedisConversationStore:
+    """Per-session capped lists in Redis (or any Redis-compatible server)"""
+
+    def __init__(self, url, max_messages=10, idle_timeout=1800, prefix='jarvis:conversation:'):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis package not installed. Run: pip install redis")
+        self.client = redis.Redis.from_url(url)
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.prefix = prefix
+
+    def get(self, session_id):
+        """Get a session's messages, oldest first"""
+        key = self.prefix + session_id
+        pipe = self.client.pipeline()
+        pipe.lrange(key, 0, -1)
+        pipe.expire(key, self.idle_timeout)
+        raw, _ = pipe.execute()
+        return [json.loads(item) for item in raw]
+
+    def append(self, session_id, *messages):
+        """Append messages to a session, dropping the oldest beyond max_messages"""
+        if not messages:
+            return
+        key = self.prefix + session_id
+        pipe = self.client.pipeline()
+        pipe.rpush(key, *(json.dumps(message) for message in messages))
+        pipe.ltrim(key, -self.max_messages, -1)
+        pipe.expire(key, self.idle_timeout)
+        pipe.execute()
+
+    def clear(self, session_id):
+        """Forget a session"""
+        self.client.delete(self.prefix + session_id)
+
+    def evict_idle(self):
+        """Idle sessions expire in Redis on their own"""
+        return 0
+
+    def session_count(self):
+        """Number of live sessions"""
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + '*'))
+
+
+def create_conversation_store():
+    """Build the store configured by CONVERSATION_STORE / REDIS_URL, falling back to in-process"""
+    max_messages = int(os.getenv('CONVERSATION_MAX_MESSAGES', '10'))
+    idle_timeout = int(os.getenv('CONVERSATION_IDLE_TIMEOUT', '1800'))
+    redis_url = os.getenv('REDIS_URL')
+
+    if os.getenv('CONVERSATION_STORE', 'memory' if not redis_url else 'redis') == 'redis':
+        try:
+            store = RedisConversationStore(
+                redis_url or 'redis://localhost:6379/0',
+                max_messages=max_messages,
+                idle_timeout=idle_timeout
+            )
+            store.client.ping()
+            logger.info("Conversation store: Redis")
+            return store
+        except Exception as e:
+            logger.warning("Redis conversation store unavailable (%s), using in-process store", e)
+
+    return InMemoryConversationStore(
+        max_messages=max_messages,
+        idle_timeout=idle_timeout,
+        max_sessions=int(os.getenv('CONVERSATION_MAX_SESSIONS', '10000'))
+    )
@@ -4,10 +4,32 @@ Handles all database operations for users, tasks, notes, calendar events, etc.
 """
 
 import os
+import threading
+import uuid
 from supabase import create_client, Client
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 import bcrypt
+from cache import TTLCache
+from logger import get_logger
+from metrics import DEPENDENCY_LATENCY, instrument_methods
+from pagination import LIST_COLUMNS, clamp_limit, decode_cursor, parse_fields, page_result
+
+logger = get_logger('database')
+
+def _filter_literal(value: str) -> str:
+    """Double-quote a value for a PostgREST logic filter (or=/and=), escaping quotes and backslashes"""
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+def _keyset_after(cursor: str):
+    """Decode a (timestamp, uuid) page cursor into quoted filter literals; raises ValueError if it is malformed"""
+    value, last_id = decode_cursor(cursor)
+    try:
+        datetime.fromisoformat(value)
+        last_id = str(uuid.UUID(last_id))
+    except (TypeError, ValueError, AttributeError):
+        raise ValueError('Invalid cursor')
+    return _filter_literal(value), _filter_literal(last_id)
 
 class DatabaseService:
     def __init__(self):
@@ -16,15 +38,27 @@ class DatabaseService:
         supabase_key = os.getenv('SUPABASE_KEY')
         
         if not supabase_url or not supabase_key:
-            print("⚠️  Warning: Supabase credentials not found. Database features will be limited.")
+            logger.warning("Supabase credentials not found. Database features will be limited.")
             self.client = None
         else:
             try:
                 self.client: Client = create_client(supabase_url, supabase_key)
-                print("✅ Supabase database connected successfully")
+                logger.info("Supabase database connected successfully")
             except Exception as e:
-                print(f"❌ Error connecting to Supabase: {e}")
+                logger.error("Error connecting to Supabase: %s", e)
                 self.client = None
+        
+        # Read-through cache for per-user reads, invalidated by our own writes.
+        # It is per process: with several gunicorn workers, a write handled by one
+        # worker leaves the others' copies stale for up to DB_CACHE_TTL seconds.
+        self.cache = TTLCache(
+            max_entries=int(os.getenv('DB_CACHE_SIZE', '1024')),
+            ttl=int(os.getenv('DB_CACHE_TTL', '60')),
+            max_bytes=int(os.getenv('DB_CACHE_MAX_BYTES', str(4 * 1024 * 1024)))
+        )
+        # task id -> user_id for tasks in cached lists, so one task is found without scanning every list
+        self.task_owners = {}
+        self.max_task_owners = int(os.getenv('DB_CACHE_TASK_INDEX_SIZE', '50000'))
     
     def is_connected(self) -> bool:
         """Check if database is connected"""
@@ -39,7 +73,8 @@ class DatabaseService:
         
         try:
             # Hash password
-            password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            with DEPENDENCY_LATENCY.time('bcrypt', 'hashpw'):
+                password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
             
             # Create user
             response = self.client.table('users').insert({
@@ -57,7 +92,7 @@ class DatabaseService:
                 return user
             return None
         except Exception as e:
-            print(f"Error creating user: {e}")
+            logger.error("Error creating user: %s", e)
             return None
     
     def authenticate_user(self, email: str, password: str) -> Optional[Dict]:
@@ -76,13 +111,15 @@ class DatabaseService:
             password_hash = user.get('password_hash')
             
             # Verify password
-            if bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8')):
+            with DEPENDENCY_LATENCY.time('bcrypt', 'checkpw'):
+                valid = bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+            if valid:
                 # Don't return password hash
                 user.pop('password_hash', None)
                 return user
             return None
         except Exception as e:
-            print(f"Error authenticating user: {e}")
+            logger.error("Error authenticating user: %s", e)
             return None
     
     def get_user(self, user_id: str) -> Optional[Dict]:
@@ -90,15 +127,20 @@ class DatabaseService:
         if not self.client:
             return None
         
+        cached = self.cache.get(('user', user_id))
+        if cached is not None:
+            return dict(cached)
+        
         try:
             response = self.client.table('users').select('*').eq('id', user_id).execute()
             if response.data:
                 user = response.data[0]
                 user.pop('password_hash', None)
+                self.cache.set(('user', user_id), dict(user))
                 return user
             return None
         except Exception as e:
-            print(f"Error getting user: {e}")
+            logger.error("Error getting user: %s", e)
             return None
     
     # ==================== TASK MANAGEMENT ====================
@@ -118,11 +160,12 @@ class DatabaseService:
                 'updated_at': datetime.now().isoformat()
             }).execute()
             
+            self._invalidate_tasks(user_id=user_id)
             if response.data:
                 return response.data[0]
             return None
         except Exception as e:
-            print(f"Error creating task: {e}")
+            logger.error("Error creating task: %s", e)
             return None
     
     def get_user_tasks(self, user_id: str) -> List[Dict]:
@@ -130,13 +173,42 @@ class DatabaseService:
         if not self.client:
             return []
         
+        cached = self.cache.get(('tasks', user_id))
+        if cached is not None:
+            return [dict(task) for task in cached]
+        
         try:
             response = self.client.table('tasks').select('*').eq('user_id', user_id).order('created_at', desc=True).execute()
-            return response.data if response.data else []
+            tasks = response.data if response.data else []
+            self._cache_tasks(user_id, tasks)
+            return tasks
         except Exception as e:
-            print(f"Error getting tasks: {e}")
+            logger.error("Error getting tasks: %s", e)
             return []
     
+    def get_user_tasks_page(self, user_id: str, limit: int = None, cursor: str = None,
+                            fields=None) -> Dict:
+        """Get one page of a user's tasks, newest first: {'items': [...], 'next_cursor': str or None}"""
+        return self._get_page('tasks', user_id, 'created_at', True, limit, cursor, fields)
+    
+    def get_task(self, task_id: str) -> Optional[Dict]:
+        """Get a task by id, from a cached task list when one holds it"""
+        if not self.client:
+            return None
+        
+        owner = self.task_owners.get(task_id)
+        cached = self.cache.get(('tasks', owner)) if owner else None
+        for task in cached or []:
+            if task.get('id') == task_id:
+                return dict(task)
+        
+        try:
+            response = self.client.table('tasks').select('*').eq('id', task_id).execute()
+            return response.data[0] if response.data else None
+        except Exception as e:
+            logger.error("Error getting task: %s", e)
+            return None
+    
     def update_task(self, task_id: str, updates: Dict) -> Optional[Dict]:
         """Update a task"""
         if not self.client:
@@ -145,12 +217,13 @@ class DatabaseService:
         try:
             updates['updated_at'] = datetime.now().isoformat()
             response = self.client.table('tasks').update(updates).eq('id', task_id).execute()
+            self._invalidate_tasks(response.data, [task_id])
             
             if response.data:
                 return response.data[0]
             return None
         except Exception as e:
-            print(f"Error updating task: {e}")
+            logger.error("Error updating task: %s", e)
             return None
     
     def delete_task(self, task_id: str) -> bool:
@@ -159,10 +232,63 @@ class DatabaseService:
             return False
         
         try:
-            self.client.table('tasks').delete().eq('id', task_id).execute()
+            response = self.client.table('tasks').delete().eq('id', task_id).execute()
+            self._invalidate_tasks(response.data, [task_id])
+            return True
+        except Exception as e:
+            logger.error("Error deleting task: %s", e)
+            return False
+    
+    def create_tasks(self, tasks: List[Dict]) -> List[Dict]:
+        """Create many tasks in one request; each dict needs user_id and text, scheduled_for is optional"""
+        if not self.client or not tasks:
+            return []
+        
+        try:
+            now = datetime.now().isoformat()
+            rows = [{
+                'user_id': task['user_id'],
+                'text': task['text'],
+                'completed': task.get('completed', False),
+                'scheduled_for': task.get('scheduled_for'),
+                'created_at': now,
+                'updated_at': now
+            } for task in tasks]
+            response = self.client.table('tasks').insert(rows).execute()
+            for user_id in {row['user_id'] for row in rows}:
+                self._invalidate_tasks(user_id=user_id)
+            return response.data if response.data else []
+        except Exception as e:
+            logger.error("Error creating tasks: %s", e)
+            return []
+    
+    def update_tasks(self, task_ids: List[str], updates: Dict) -> List[Dict]:
+        """Apply the same updates to many tasks in one request"""
+        if not self.client or not task_ids:
+            return []
+        
+        try:
+            updates = dict(updates, updated_at=datetime.now().isoformat())
+            response = self.client.table('tasks').update(updates).in_('id', list(task_ids)).execute()
+            self._invalidate_tasks(response.data, task_ids)
+            return response.data if response.data else []
+        except Exception as e:
+            logger.error("Error updating tasks: %s", e)
+            return []
+    
+    def delete_tasks(self, task_ids: List[str]) -> bool:
+        """Delete many tasks in one request"""
+        if not self.client:
+            return False
+        if not task_ids:
+            return True
+        
+        try:
+            response = self.client.table('tasks').delete().in_('id', list(task_ids)).execute()
+            self._invalidate_tasks(response.data, task_ids)
             return True
         except Exception as e:
-            print(f"Error deleting task: {e}")
+            logger.error("Error deleting tasks: %s", e)
             return False
     
     # ==================== NOTES MANAGEMENT ====================
@@ -186,7 +312,7 @@ class DatabaseService:
                 return response.data[0]
             return None
         except Exception as e:
-            print(f"Error creating note: {e}")
+            logger.error("Error creating note: %s", e)
             return None
     
     def get_user_notes(self, user_id: str) -> List[Dict]:
@@ -198,9 +324,14 @@ class DatabaseService:
             response = self.client.table('notes').select('*').eq('user_id', user_id).order('updated_at', desc=True).execute()
             return response.data if response.data else []
         except Exception as e:
-            print(f"Error getting notes: {e}")
+            logger.error("Error getting notes: %s", e)
             return []
     
+    def get_user_notes_page(self, user_id: str, limit: int = None, cursor: str = None,
+                            fields=None) -> Dict:
+        """Get one page of a user's notes, newest first"""
+        return self._get_page('notes', user_id, 'created_at', True, limit, cursor, fields)
+    
     def update_note(self, note_id: str, updates: Dict) -> Optional[Dict]:
         """Update a note"""
         if not self.client:
@@ -214,7 +345,7 @@ class DatabaseService:
                 return response.data[0]
             return None
         except Exception as e:
-            print(f"Error updating note: {e}")
+            logger.error("Error updating note: %s", e)
             return None
     
     def delete_note(self, note_id: str) -> bool:
@@ -226,7 +357,7 @@ class DatabaseService:
             self.client.table('notes').delete().eq('id', note_id).execute()
             return True
         except Exception as e:
-            print(f"Error deleting note: {e}")
+            logger.error("Error deleting note: %s", e)
             return False
     
     # ==================== CALENDAR EVENTS ====================
@@ -253,7 +384,7 @@ class DatabaseService:
                 return response.data[0]
             return None
         except Exception as e:
-            print(f"Error creating event: {e}")
+            logger.error("Error creating event: %s", e)
             return None
     
     def get_user_events(self, user_id: str, start_date: str = None, end_date: str = None) -> List[Dict]:
@@ -272,9 +403,21 @@ class DatabaseService:
             response = query.order('start_time', desc=False).execute()
             return response.data if response.data else []
         except Exception as e:
-            print(f"Error getting events: {e}")
+            logger.error("Error getting events: %s", e)
             return []
     
+    def get_user_events_page(self, user_id: str, start_date: str = None, end_date: str = None,
+                             limit: int = None, cursor: str = None, fields=None) -> Dict:
+        """Get one page of a user's calendar events, earliest first"""
+        def date_range(query):
+            if start_date:
+                query = query.gte('start_time', start_date)
+            if end_date:
+                query = query.lte('start_time', end_date)
+            return query
+        
+        return self._get_page('calendar_events', user_id, 'start_time', False, limit, cursor, fields, date_range)
+    
     def update_event(self, event_id: str, updates: Dict) -> Optional[Dict]:
         """Update a calendar event"""
         if not self.client:
@@ -288,7 +431,7 @@ class DatabaseService:
                 return response.data[0]
             return None
         except Exception as e:
-            print(f"Error updating event: {e}")
+            logger.error("Error updating event: %s", e)
             return None
     
     def delete_event(self, event_id: str) -> bool:
@@ -300,7 +443,7 @@ class DatabaseService:
             self.client.table('calendar_events').delete().eq('id', event_id).execute()
             return True
         except Exception as e:
-            print(f"Error deleting event: {e}")
+            logger.error("Error deleting event: %s", e)
             return False
     
     # ==================== USER PREFERENCES ====================
@@ -310,13 +453,18 @@ class DatabaseService:
         if not self.client:
             return None
         
+        cached = self.cache.get(('preferences', user_id))
+        if cached is not None:
+            return dict(cached)
+        
         try:
             response = self.client.table('user_preferences').select('*').eq('user_id', user_id).execute()
             if response.data:
+                self.cache.set(('preferences', user_id), dict(response.data[0]))
                 return response.data[0]
             return None
         except Exception as e:
-            print(f"Error getting preferences: {e}")
+            logger.error("Error getting preferences: %s", e)
             return None
     
     def update_user_preferences(self, user_id: str, preferences: Dict) -> Optional[Dict]:
@@ -325,27 +473,236 @@ class DatabaseService:
             return None
         
         try:
-            # Check if preferences exist
-            existing = self.get_user_preferences(user_id)
-            
-            if existing:
-                # Update existing
-                preferences['updated_at'] = datetime.now().isoformat()
-                response = self.client.table('user_preferences').update(preferences).eq('user_id', user_id).execute()
-            else:
-                # Create new
-                preferences['user_id'] = user_id
-                preferences['created_at'] = datetime.now().isoformat()
-                preferences['updated_at'] = datetime.now().isoformat()
-                response = self.client.table('user_preferences').insert(preferences).execute()
+            # Insert or update in one request, keyed on the unique user_id
+            preferences = dict(preferences, user_id=user_id, updated_at=datetime.now().isoformat())
+            response = self.client.table('user_preferences').upsert(preferences, on_conflict='user_id').execute()
             
             if response.data:
+                self.cache.set(('preferences', user_id), dict(response.data[0]))
                 return response.data[0]
+            self.cache.delete(('preferences', user_id))
             return None
         except Exception as e:
-            print(f"Error updating preferences: {e}")
+            logger.error("Error updating preferences: %s", e)
             return None
+    
+    # ==================== PAGINATION ====================
+    
+    def _get_page(self, table: str, user_id: str, order_column: str, descending: bool,
+                  limit: int, cursor: str, fields, filters=None) -> Dict:
+        """Keyset pagination on (order_column, id) with optional column projection
+        
+        Raises ValueError for a malformed cursor or unknown fields.
+        """
+        limit = clamp_limit(limit)
+        columns = parse_fields(fields, LIST_COLUMNS[table], required=('id', order_column))
+        # Every paged table orders on a timestamp column, with the uuid id as tie-breaker
+        after = _keyset_after(cursor) if cursor else None
+        
+        if not self.client:
+            return {'items': [], 'next_cursor': None}
+        
+        try:
+            query = self.client.table(table).select(','.join(columns) if columns else '*').eq('user_id', user_id)
+            if filters:
+                query = filters(query)
+            if after:
+                value, last_id = after
+                op = 'lt' if descending else 'gt'
+                query = query.or_(f'{order_column}.{op}.{value},and({order_column}.eq.{value},id.{op}.{last_id})')
+            
+            response = (query.order(order_column, desc=descending)
+                        .order('id', desc=descending)
+                        .limit(limit + 1)
+                        .execute())
+            return page_result(response.data or [], limit, lambda row: (row[order_column], row['id']))
+        except Exception as e:
+            logger.error("Error getting %s page: %s", table, e)
+            return {'items': [], 'next_cursor': None}
+    
+    # ==================== CACHE ====================
+    
+    def _cache_tasks(self, user_id, tasks):
+        """Cache a user's task list and index its tasks by id"""
+        if len(self.task_owners) >= self.max_task_owners:
+            # Entries are re-added as lists are cached again
+            self.task_owners.clear()
+        self.task_owners.update((task['id'], user_id) for task in tasks if task.get('id'))
+        self.cache.set(('tasks', user_id), [dict(task) for task in tasks])
+    
+    def _invalidate_tasks(self, rows=None, task_ids=(), user_id=None):
+        """Drop cached task lists touched by a write
+        
+        Uses the user_id of the changed rows when the write returned them,
+        otherwise the owners of the task ids in the cached-task index.
+        """
+        if user_id is not None:
+            self.cache.delete(('tasks', user_id))
+            return
+        
+        owners = {row.get('user_id') for row in rows or []}
+        for owner in owners:
+            self.cache.delete(('tasks', owner))
+        if not owners and task_ids:
+            for owner in {self.task_owners.get(task_id) for task_id in task_ids} - {None}:
+                self.cache.delete(('tasks', owner))
+    
+    def patch_cached_task(self, task_id: str, updates: Dict = None) -> Optional[Dict]:
+        """Apply a queued update to cached task lists holding the task, or drop it from them for a delete
+        
+        Returns the row as patched (or as removed), or None if no cached list holds the task.
+        """
+        found = []
+        
+        def patch(tasks):
+            patched = []
+            for task in tasks:
+                if task.get('id') == task_id:
+                    task = task if updates is None else dict(task, **updates)
+                    found.append(task)
+                    if updates is None:
+                        continue
+                patched.append(task)
+            return patched
+        
+        owner = self.task_owners.get(task_id)
+        if owner:
+            self.cache.update(('tasks', owner), patch)
+        return dict(found[0]) if found else None
+    
+    def get_cache_stats(self) -> Dict:
+        """Get read-through cache hit ratio and usage"""
+        return self.cache.stats()
+
+
+# Latency of every DatabaseService call, as jarvis_dependency_duration_seconds{dependency="supabase"}
+instrument_methods(DatabaseService, DEPENDENCY_LATENCY, 'supabase', skip=('is_connected', 'get_cache_stats', 'patch_cached_task'))
+
+
+class WriteBuffer:
+    """Coalesces task writes and sends them as bulk requests
+    
+    Creates are batched into one insert, repeated updates to a task are
+    merged, updates to a task that is then deleted are dropped, and tasks
+    sharing the same updates go out in one request. Flushes when max_size
+    writes are pending or max_delay seconds after the first pending write.
+    
+    Queued updates and deletes are applied to cached task lists right away;
+    if their flush fails, the owners' cached lists are dropped so reads go
+    back to the database.
+    """
+    
+    def __init__(self, database: DatabaseService, max_size: int = 50, max_delay: float = 0.5):
+        self.database = database
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.creates = []
+        self.updates = {}
+        self.deletes = set()
+        self.owners = {}  # task_id -> user_id of tasks whose cached row was patched
+        self.pending = 0
+        self.flushes = 0
+        self.lock = threading.Lock()
+        self.send_lock = threading.Lock()  # keeps batches in order when the timer and a writer flush together
+        self.timer = None
+    
+    def create_task(self, user_id: str, text: str, scheduled_for: str = None):
+        """Queue a task insert"""
+        self._add(lambda: self.creates.append({'user_id': user_id, 'text': text, 'scheduled_for': scheduled_for}))
+    
+    def update_task(self, task_id: str, updates: Dict) -> Optional[Dict]:
+        """Queue a task update, merged with any pending update to the same task
+        
+        Returns the cached row with the update applied, or None if no cached task list holds it.
+        """
+        def queue():
+            self.updates.setdefault(task_id, {}).update(updates)
+            return self._patch_cache(task_id, updates)
+        return self._add(queue)
+    
+    def delete_task(self, task_id: str):
+        """Queue a task delete, dropping any pending update to it"""
+        def queue():
+            self.updates.pop(task_id, None)
+            self.deletes.add(task_id)
+            self._patch_cache(task_id)
+        self._add(queue)
+    
+    def _patch_cache(self, task_id, updates=None):
+        """Let reads before the flush see a queued write (caller holds the lock)"""
+        task = self.database.patch_cached_task(task_id, updates)
+        if task and task.get('user_id'):
+            self.owners[task_id] = task['user_id']
+        return task
+    
+    def _add(self, queue):
+        with self.lock:
+            result = queue()
+            self.pending += 1
+            if self.pending >= self.max_size:
+                batch = self._take()
+            else:
+                batch = None
+                if self.timer is None:
+                    self.timer = threading.Timer(self.max_delay, self.flush)
+                    self.timer.daemon = True
+                    self.timer.start()
+        if batch:
+            self._send(*batch)
+        return result
+    
+    def _take(self):
+        """Swap out the pending writes (caller holds the lock)"""
+        batch = (self.creates, self.updates, self.deletes, self.owners)
+        self.creates, self.updates, self.deletes, self.owners = [], {}, set(), {}
+        self.pending = 0
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+        return batch
+    
+    def flush(self):
+        """Send all pending writes now"""
+        with self.lock:
+            batch = self._take()
+        self._send(*batch)
+    
+    def _send(self, creates, updates, deletes, owners):
+        if not (creates or updates or deletes):
+            return
+        
+        with self.send_lock:
+            self.flushes += 1
+            
+            if creates:
+                self.database.create_tasks(creates)
+            
+            # One request per distinct set of updates
+            groups = {}
+            for task_id, task_updates in updates.items():
+                key = tuple(sorted((field, repr(value)) for field, value in task_updates.items()))
+                groups.setdefault(key, (task_updates, []))[1].append(task_id)
+            failed = set()
+            for task_updates, task_ids in groups.values():
+                if not self.database.update_tasks(task_ids, task_updates):
+                    failed.update(task_ids)
+            
+            if deletes and not self.database.delete_tasks(list(deletes)):
+                failed.update(deletes)
+            
+            # The cache already shows these writes; drop it so readers don't see what was never saved
+            for user_id in {owners[task_id] for task_id in failed if task_id in owners}:
+                self.database._invalidate_tasks(user_id=user_id)
 
 
 # Global database instance
 db = DatabaseService()
+
+# Optional write coalescing for fire-and-forget task writes (DB_WRITE_BUFFER_SIZE > 0 enables it)
+write_buffer = None
+if db.is_connected() and int(os.getenv('DB_WRITE_BUFFER_SIZE', '0')) > 0:
+    write_buffer = WriteBuffer(
+        db,
+        max_size=int(os.getenv('DB_WRITE_BUFFER_SIZE')),
+        max_delay=float(os.getenv('DB_WRITE_BUFFER_DELAY', '0.5'))
+    )
@@ -0,0 +1,109 @@
+"""
+Intent Router for JARVIS
+Classifies commands locally with precompiled patterns so trivial requests
+(time, date, greetings, task management, system commands) never reach the LLM
+"""
+
+import re
+
+# Intent names
+TASK_DELETE = 'task_delete'
+TASK_EDIT = 'task_edit'
+TASK_COMPLETE = 'task_complete'
+TASK_CREATE = 'task_create'
+SYSTEM = 'system'
+TIME = 'time'
+DATE = 'date'
+GREETING = 'greeting'
+STATUS = 'status'
+CONVERSATION = 'conversation'
+
+TASK_INTENTS = {TASK_DELETE, TASK_EDIT, TASK_COMPLETE, TASK_CREATE}
+LOCAL_INTENTS = {TIME, DATE, GREETING, STATUS}
+
+
+class IntentRouter:
+    """Route commands to an intent with a single compiled keyword scan"""
+
+    # Keyword phrases per intent, in priority order (first matching intent wins)
+    KEYWORDS = [
+        (TASK_DELETE, ['delete task', 'remove task', 'delete the task', 'remove the task', 'cancel task']),
+        (TASK_EDIT, ['edit task', 'update task', 'change task', 'modify task']),
+        (TASK_COMPLETE, ['complete task', 'finish task', 'mark task complete', 'task done', 'mark as done']),
+        (SYSTEM, [
+            'open', 'launch', 'start', 'run',  # Open apps
+            'play', 'music', 'song',  # Play music
+            'search', 'google', 'find', 'look up',  # Web search
+            'website', 'go to', 'navigate',  # Open website
+            'volume', 'mute', 'unmute',  # Volume control
+            'screenshot', 'screen shot',  # Screenshot
+            'lock computer', 'shutdown', 'restart'  # System operations
+        ]),
+        (TASK_CREATE, ['remind', 'schedule', 'task', 'meeting', 'reminder', 'create task', 'add task', 'set reminder']),
+        (TIME, ['what time', 'the time', 'time is it', 'current time', 'time now']),
+        (DATE, ['what date', 'the date', "today's date", 'date today', 'what day', 'which day', 'what is today']),
+    ]
+
+    # An explicit task trigger leading the command makes it a new task, even if
+    # the task text mentions a system word ("remind me to open the door")
+    TASK_TRIGGER_PATTERN = re.compile(
+        r"(?:(?:please|jarvis|hey jarvis) )*"
+        r"(?:remind|set (?:a |up a )?reminder|schedule|create (?:a |new )?task|add (?:a |new )?task)\b"
+    )
+
+    # Commands that are nothing but a greeting or a status check
+    GREETING_PATTERN = re.compile(
+        r"(?:hello|hi|hey|greetings|good (?:morning|afternoon|evening)|yo)"
+        r"(?: there)?(?: jarvis)?(?: sir)?"
+    )
+    STATUS_PATTERN = re.compile(
+        r"(?:how are you(?: doing)?|how's it going|status(?: report)?|system status)(?: jarvis)?"
+    )
+    PUNCTUATION = re.compile(r"[^\w\s']+")
+
+    def __init__(self):
+        groups = []
+        for intent, phrases in self.KEYWORDS:
+            # Longest phrases first so multi-word phrases win over their prefixes
+            alternation = '|'.join(re.escape(p) for p in sorted(phrases, key=len, reverse=True))
+            groups.append(f'(?P<{intent}>{alternation})')
+        self.keyword_pattern = re.compile(r'\b(?:' + '|'.join(groups) + r')\b')
+        self.priority = {intent: rank for rank, (intent, _) in enumerate(self.KEYWORDS)}
+
+    def route(self, command, skip=()):
+        """Classify a command, returning one of the intent names
+
+        skip: keyword intents the caller does not handle (e.g. chat has no
+        system commands), so a lower-priority match can win instead
+        """
+        text = ' '.join(self.PUNCTUATION.sub(' ', command.lower()).split())
+        if not text:
+            return CONVERSATION
+        if TASK_CREATE not in skip and self.TASK_TRIGGER_PATTERN.match(text):
+            return TASK_CREATE
+
+        best = None
+        for match in self.keyword_pattern.finditer(text):
+            intent = match.lastgroup
+            if intent in skip:
+                continue
+            if best is None or self.priority[intent] < self.priority[best]:
+                best = intent
+                if self.priority[best] == 0:
+                    break
+        if best:
+            return best
+
+        if self.GREETING_PATTERN.fullmatch(text):
+            return GREETING
+        if self.STATUS_PATTERN.fullmatch(text):
+            return STATUS
+        return CONVERSATION
+
+    def needs_llm(self, intent):
+        """Whether an intent has to be answered by the AI model"""
+        return intent == CONVERSATION
+
+
+# Global instance
+intent_router = IntentRouter()
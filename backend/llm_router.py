@@ -0,0 +1,306 @@
+"""
+LLM Router for JARVIS
+Sends each command to the healthiest of several AI backends (Groq, Ollama,
+rule-based), tracking rolling latency and error rates, hedging slow requests
+to a second backend and circuit-breaking backends that keep failing
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from logger import get_logger
+
+logger = get_logger('ai.router')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class BackendState:
+    """Rolling latency/error window and circuit breaker for one backend"""
+
+    def __init__(self, name, call, call_async=None, window=100, failure_threshold=3, error_rate_threshold=0.5,
+                 cooldown=30):
+        self.name = name
+        self.call = call
+        self.call_async = call_async
+        self.samples = deque(maxlen=window)  # (latency_seconds, ok)
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def available(self):
+        """Whether the breaker would let a request through right now"""
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                return time.monotonic() - self.opened_at >= self.cooldown
+            return not self.trial_in_flight
+
+    def begin(self):
+        """Claim permission to send a request; after cooldown only one trial goes through"""
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record(self, latency, ok):
+        """Record the outcome of a request and update the breaker"""
+        with self.lock:
+            self.samples.append((latency, ok))
+            self.trial_in_flight = False
+            if ok:
+                self.consecutive_failures = 0
+                self.state = CLOSED
+                return
+
+            self.consecutive_failures += 1
+            errors = sum(1 for _, sample_ok in self.samples if not sample_ok)
+            error_rate = errors / len(self.samples)
+            if (self.state == HALF_OPEN
+                    or self.consecutive_failures >= self.failure_threshold
+                    or (len(self.samples) >= 10 and error_rate >= self.error_rate_threshold)):
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def latency_percentile(self, pct):
+        """Latency percentile (seconds) over successful requests, or None without enough data"""
+        with self.lock:
+            latencies = sorted(latency for latency, ok in self.samples if ok)
+        if len(latencies) < 10:
+            return None
+        return latencies[min(len(latencies) - 1, int(pct / 100 * len(latencies)))]
+
+    def stats(self):
+        """Get a snapshot of this backend's health"""
+        with self.lock:
+            samples = list(self.samples)
+            state = self.state
+        latencies = sorted(latency for latency, ok in samples if ok)
+        errors = sum(1 for _, ok in samples if not ok)
+
+        def pct(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000, 1)
+
+        return {
+            'state': state,
+            'requests': len(samples),
+            'error_rate': round(errors / len(samples), 3) if samples else 0.0,
+            'p50_ms': pct(50),
+            'p95_ms': pct(95)
+        }
+
+
+class LLMRouter:
+    """Route commands across AI backends with latency-aware failover
+
+    Backends are tried in priority order. If the chosen backend has not
+    answered by its rolling p95 latency, the request is hedged: the next
+    healthy backend is started too and whichever succeeds first wins.
+    The last backend is the final fallback: it is never circuit-broken or
+    hedged to, and only answers once every other backend has failed or the
+    timeout has passed.
+    """
+
+    def __init__(self, backends, default_hedge_delay=2.0, min_hedge_delay=0.3, timeout=30.0, max_workers=16):
+        """backends: list of (name, callable(command, session_id, superseded) -> str) in priority
+        order, optionally with a third coroutine function used by process_command_async.
+        superseded() turns true once the request has been answered, so a losing call can
+        skip side effects such as recording the exchange in conversation history."""
+        self.backends = [BackendState(*backend) for backend in backends]
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm-router')
+        self.hedged = 0
+        self.failovers = 0
+
+    def process_command(self, command, session_id='default'):
+        """Get a response from the best available backend"""
+        candidates = self._candidates()
+        deadline = time.monotonic() + self.timeout
+        answered = threading.Event()
+        pending = {}
+        next_index = 0
+
+        def launch():
+            nonlocal next_index
+            while next_index < len(candidates):
+                backend = candidates[next_index]
+                next_index += 1
+                if backend.begin():
+                    # Run in a copy of this context so the call's spans join the request trace
+                    future = self.executor.submit(contextvars.copy_context().run,
+                                                  self._timed_call, backend, command, session_id, answered.is_set)
+                    pending[future] = backend
+                    return
+
+        try:
+            launch()
+            while pending:
+                primary = next(iter(pending.values()))
+                hedge_delay = self._hedge_delay(primary) if next_index < len(candidates) and len(pending) == 1 else None
+                wait_for = max(0.0, deadline - time.monotonic())
+                if hedge_delay is not None:
+                    wait_for = min(wait_for, hedge_delay)
+
+                done, _ = wait(list(pending), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+                if not done:
+                    if time.monotonic() >= deadline:
+                        break
+                    # Primary is slower than usual - hedge with the next healthy backend
+                    self.hedged += 1
+                    launch()
+                    continue
+
+                for future in done:
+                    pending.pop(future)
+                    ok, result = future.result()
+                    if ok:
+                        return result
+
+                # Every finished backend failed - fail over if nothing else is running
+                if not pending and next_index < len(candidates):
+                    self.failovers += 1
+                    launch()
+
+            # Every backend failed or nothing answered in time: answer from the final fallback
+            return self._fallback(command, session_id)
+        finally:
+            answered.set()
+
+    async def process_command_async(self, command, session_id='default'):
+        """process_command for the event loop: same hedging, failover and breakers
+
+        Backends with an async call run on the loop; the others run on the
+        router's executor, so no request holds a thread while it waits.
+        """
+        loop = asyncio.get_running_loop()
+        candidates = self._candidates()
+        deadline = loop.time() + self.timeout
+        answered = threading.Event()
+        pending = {}
+        next_index = 0
+
+        def launch():
+            nonlocal next_index
+            while next_index < len(candidates):
+                backend = candidates[next_index]
+                next_index += 1
+                if backend.begin():
+                    if backend.call_async:
+                        task = asyncio.ensure_future(
+                            self._timed_call_async(backend, command, session_id, answered.is_set))
+                    else:
+                        task = loop.run_in_executor(self.executor, contextvars.copy_context().run,
+                                                    self._timed_call, backend, command, session_id, answered.is_set)
+                    pending[task] = backend
+                    return
+
+        try:
+            launch()
+            while pending:
+                primary = next(iter(pending.values()))
+                hedge_delay = self._hedge_delay(primary) if next_index < len(candidates) and len(pending) == 1 else None
+                wait_for = max(0.0, deadline - loop.time())
+                if hedge_delay is not None:
+                    wait_for = min(wait_for, hedge_delay)
+
+                done, _ = await asyncio.wait(list(pending), timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    if loop.time() >= deadline:
+                        break
+                    self.hedged += 1
+                    launch()
+                    continue
+
+                for task in done:
+                    pending.pop(task)
+                    ok, result = task.result()
+                    if ok:
+                        return result
+
+                if not pending and next_index < len(candidates):
+                    self.failovers += 1
+                    launch()
+
+            return self._fallback(command, session_id)
+        finally:
+            answered.set()
+
+    def _candidates(self):
+        """Backends allowed by their circuit breakers, in priority order, without the final fallback"""
+        return [backend for backend in self.backends[:-1] if backend.available()]
+
+    def _fallback(self, command, session_id):
+        return self.backends[-1].call(command, session_id, lambda: False)
+
+    def _hedge_delay(self, backend):
+        p95 = backend.latency_percentile(95)
+        if p95 is None:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, p95)
+
+    def _timed_call(self, backend, command, session_id, superseded):
+        start = time.perf_counter()
+        try:
+            result = backend.call(command, session_id, superseded)
+            ok = bool(result)
+        except Exception as e:
+            logger.warning("LLM backend '%s' failed: %s", backend.name, e)
+            result, ok = None, False
+        backend.record(time.perf_counter() - start, ok)
+        return ok, result
+
+    async def _timed_call_async(self, backend, command, session_id, superseded):
+        start = time.perf_counter()
+        try:
+            result = await backend.call_async(command, session_id, superseded)
+            ok = bool(result)
+        except Exception as e:
+            logger.warning("LLM backend '%s' failed: %s", backend.name, e)
+            result, ok = None, False
+        backend.record(time.perf_counter() - start, ok)
+        return ok, result
+
+    def get_stats(self):
+        """Get per-backend health and routing counters"""
+        return {
+            'backends': {backend.name: backend.stats() for backend in self.backends},
+            'hedged': self.hedged,
+            'failovers': self.failovers
+        }
+
+
+def create_llm_router(groq_ai, ollama_ai, rule_ai):
+    """Build the default Groq -> Ollama -> rule-based router"""
+    return LLMRouter(
+        [
+            ('groq', groq_ai.complete, groq_ai.complete_async),
+            ('ollama', lambda command, session_id, superseded: ollama_ai.complete(command)),
+            ('rules', lambda command, session_id, superseded: rule_ai.process_command(command)),
+        ],
+        default_hedge_delay=float(os.getenv('LLM_HEDGE_DELAY', '2.0')),
+        timeout=float(os.getenv('LLM_TIMEOUT', '30'))
+    )
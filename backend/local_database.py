@@ -0,0 +1,667 @@
+"""
+Local database service for JARVIS - embedded SQLite storage
+Mirrors the DatabaseService API (users, tasks, notes, calendar events,
+preferences) plus notifications, for when Supabase is not configured.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from typing import Optional, List, Dict
+import bcrypt
+from metrics import DEPENDENCY_LATENCY
+from pagination import LIST_COLUMNS, clamp_limit, decode_cursor, parse_fields, page_result
+from logger import get_logger
+
+logger = get_logger('database.local')
+
+# Same tables and indexes as schema.sql, in SQLite types
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+  id TEXT PRIMARY KEY,
+  email TEXT UNIQUE NOT NULL,
+  password_hash TEXT NOT NULL,
+  name TEXT,
+  created_at TEXT,
+  updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
+
+CREATE TABLE IF NOT EXISTS tasks (
+  id TEXT PRIMARY KEY,
+  user_id TEXT REFERENCES users(id) ON DELETE CASCADE,
+  text TEXT NOT NULL,
+  completed INTEGER DEFAULT 0,
+  scheduled_for TEXT,
+  created_at TEXT,
+  updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_id ON tasks(user_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_scheduled_for ON tasks(scheduled_for);
+CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks(completed);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_created ON tasks(user_id, created_at, id);
+
+CREATE TABLE IF NOT EXISTS notes (
+  id TEXT PRIMARY KEY,
+  user_id TEXT REFERENCES users(id) ON DELETE CASCADE,
+  title TEXT NOT NULL,
+  content TEXT,
+  category TEXT,
+  created_at TEXT,
+  updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_notes_user_id ON notes(user_id);
+CREATE INDEX IF NOT EXISTS idx_notes_category ON notes(category);
+CREATE INDEX IF NOT EXISTS idx_notes_user_created ON notes(user_id, created_at, id);
+
+CREATE TABLE IF NOT EXISTS calendar_events (
+  id TEXT PRIMARY KEY,
+  user_id TEXT REFERENCES users(id) ON DELETE CASCADE,
+  title TEXT NOT NULL,
+  description TEXT,
+  start_time TEXT NOT NULL,
+  end_time TEXT NOT NULL,
+  location TEXT,
+  recurring INTEGER DEFAULT 0,
+  recurrence_rule TEXT,
+  created_at TEXT,
+  updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_events_user_id ON calendar_events(user_id);
+CREATE INDEX IF NOT EXISTS idx_events_start_time ON calendar_events(start_time);
+CREATE INDEX IF NOT EXISTS idx_events_user_start ON calendar_events(user_id, start_time, id);
+
+CREATE TABLE IF NOT EXISTS user_preferences (
+  id TEXT PRIMARY KEY,
+  user_id TEXT UNIQUE REFERENCES users(id) ON DELETE CASCADE,
+  voice_enabled INTEGER DEFAULT 1,
+  voice_speed REAL DEFAULT 0.9,
+  volume REAL DEFAULT 0.8,
+  theme TEXT DEFAULT 'dark',
+  location TEXT,
+  news_sources TEXT,
+  created_at TEXT,
+  updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_preferences_user_id ON user_preferences(user_id);
+
+CREATE TABLE IF NOT EXISTS notifications (
+  id TEXT PRIMARY KEY,
+  user_id TEXT,
+  type TEXT,
+  payload TEXT NOT NULL,
+  read INTEGER DEFAULT 0,
+  created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_notifications_user_id ON notifications(user_id, created_at);
+
+CREATE TABLE IF NOT EXISTS reminders (
+  key TEXT PRIMARY KEY,
+  due_at REAL NOT NULL,
+  payload TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_reminders_due_at ON reminders(due_at);
+
+CREATE TABLE IF NOT EXISTS reminder_changes (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  key TEXT NOT NULL,
+  due_at REAL,
+  payload TEXT
+);
+"""
+
+# Columns callers may update, per table (also keeps column names out of reach of user input)
+UPDATABLE = {
+    'tasks': {'text', 'completed', 'scheduled_for'},
+    'notes': {'title', 'content', 'category'},
+    'calendar_events': {'title', 'description', 'start_time', 'end_time', 'location', 'recurring', 'recurrence_rule'},
+    'user_preferences': {'voice_enabled', 'voice_speed', 'volume', 'theme', 'location', 'news_sources'}
+}
+
+# Local task dicts use camelCase keys; accept them in updates too
+COLUMN_ALIASES = {'scheduledFor': 'scheduled_for', 'createdAt': 'created_at'}
+
+BOOLEAN_COLUMNS = {'completed', 'recurring', 'voice_enabled', 'read'}
+
+
+class LocalDatabaseService:
+    def __init__(self, path=None):
+        """Open (or create) the SQLite database file"""
+        self.path = path or os.getenv('LOCAL_DB_PATH', 'jarvis.db')
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+        try:
+            with self._connection() as conn:
+                conn.executescript(SCHEMA)
+        except Exception as e:
+            logger.error("Error opening local database %s: %s", self.path, e)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread, opened on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, cached_statements=256, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        """Close every thread's connection"""
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._connections = []
+        self._local = threading.local()
+
+    @staticmethod
+    def _row(row) -> Optional[Dict]:
+        if row is None:
+            return None
+        record = dict(row)
+        for column in BOOLEAN_COLUMNS & record.keys():
+            if record[column] is not None:
+                record[column] = bool(record[column])
+        if record.get('news_sources'):
+            record['news_sources'] = json.loads(record['news_sources'])
+        return record
+
+    def _insert(self, table: str, values: Dict) -> Optional[Dict]:
+        values = dict(values, id=values.get('id') or str(uuid.uuid4()))
+        columns = ', '.join(values)
+        placeholders = ', '.join('?' for _ in values)
+        conn = self._connection()
+        with conn:
+            conn.execute(f'INSERT INTO {table} ({columns}) VALUES ({placeholders})', list(values.values()))
+        return self._get(table, 'id', values['id'])
+
+    def _get(self, table: str, column: str, value) -> Optional[Dict]:
+        row = self._connection().execute(f'SELECT * FROM {table} WHERE {column} = ?', (value,)).fetchone()
+        return self._row(row)
+
+    def _update(self, table: str, column: str, value, updates: Dict) -> Optional[Dict]:
+        allowed = UPDATABLE[table]
+        values = {}
+        for key, new_value in updates.items():
+            key = COLUMN_ALIASES.get(key, key)
+            if key in allowed:
+                values[key] = json.dumps(new_value) if key == 'news_sources' else new_value
+        values['updated_at'] = datetime.now().isoformat()
+
+        assignments = ', '.join(f'{key} = ?' for key in values)
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(f'UPDATE {table} SET {assignments} WHERE {column} = ?', [*values.values(), value])
+        if cursor.rowcount == 0:
+            return None
+        return self._get(table, column, value)
+
+    def _delete(self, table: str, record_id: str) -> bool:
+        conn = self._connection()
+        with conn:
+            conn.execute(f'DELETE FROM {table} WHERE id = ?', (record_id,))
+        return True
+
+    def _select(self, sql: str, params=()) -> List[Dict]:
+        return [self._row(row) for row in self._connection().execute(sql, params)]
+
+    def _get_page(self, table: str, user_id: str, order_column: str, descending: bool,
+                  limit: int, cursor: str, fields, where: str = '', params=()) -> Dict:
+        """Keyset pagination on (order_column, id) with optional column projection"""
+        limit = clamp_limit(limit)
+        columns = parse_fields(fields, LIST_COLUMNS[table], required=('id', order_column))
+        after = decode_cursor(cursor) if cursor else None
+
+        sql = f"SELECT {', '.join(columns) if columns else '*'} FROM {table} WHERE user_id = ?{where}"
+        params = [user_id, *params]
+        if after:
+            sql += f" AND ({order_column}, id) {'<' if descending else '>'} (?, ?)"
+            params.extend(after)
+        direction = 'DESC' if descending else 'ASC'
+        sql += f' ORDER BY {order_column} {direction}, id {direction} LIMIT ?'
+        params.append(limit + 1)
+
+        try:
+            return page_result(self._select(sql, params), limit, lambda row: (row[order_column], row['id']))
+        except Exception as e:
+            logger.error("Error getting %s page: %s", table, e)
+            return {'items': [], 'next_cursor': None}
+
+    # ==================== USER MANAGEMENT ====================
+
+    def create_user(self, email: str, password: str, name: str = None) -> Optional[Dict]:
+        """Create a new user"""
+        try:
+            with DEPENDENCY_LATENCY.time('bcrypt', 'hashpw'):
+                password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            now = datetime.now().isoformat()
+            user = self._insert('users', {
+                'email': email,
+                'password_hash': password_hash,
+                'name': name,
+                'created_at': now,
+                'updated_at': now
+            })
+            if user:
+                user.pop('password_hash', None)
+            return user
+        except sqlite3.IntegrityError:
+            return None
+        except Exception as e:
+            logger.error("Error creating user: %s", e)
+            return None
+
+    def authenticate_user(self, email: str, password: str) -> Optional[Dict]:
+        """Authenticate user with email and password"""
+        try:
+            user = self._get('users', 'email', email)
+            if not user:
+                return None
+            with DEPENDENCY_LATENCY.time('bcrypt', 'checkpw'):
+                valid = bcrypt.checkpw(password.encode('utf-8'), user['password_hash'].encode('utf-8'))
+            if valid:
+                user.pop('password_hash', None)
+                return user
+            return None
+        except Exception as e:
+            logger.error("Error authenticating user: %s", e)
+            return None
+
+    def get_user(self, user_id: str) -> Optional[Dict]:
+        """Get user by ID"""
+        try:
+            user = self._get('users', 'id', user_id)
+            if user:
+                user.pop('password_hash', None)
+            return user
+        except Exception as e:
+            logger.error("Error getting user: %s", e)
+            return None
+
+    # ==================== TASK MANAGEMENT ====================
+
+    def create_task(self, user_id: str, text: str, scheduled_for: str = None) -> Optional[Dict]:
+        """Create a new task for a user"""
+        try:
+            now = datetime.now().isoformat()
+            return self._insert('tasks', {
+                'user_id': user_id,
+                'text': text,
+                'completed': False,
+                'scheduled_for': scheduled_for,
+                'created_at': now,
+                'updated_at': now
+            })
+        except Exception as e:
+            logger.error("Error creating task: %s", e)
+            return None
+
+    def get_user_tasks(self, user_id: str) -> List[Dict]:
+        """Get all tasks for a user"""
+        try:
+            return self._select('SELECT * FROM tasks WHERE user_id = ? ORDER BY created_at DESC', (user_id,))
+        except Exception as e:
+            logger.error("Error getting tasks: %s", e)
+            return []
+
+    def get_user_tasks_page(self, user_id: str, limit: int = None, cursor: str = None,
+                            fields=None) -> Dict:
+        """Get one page of a user's tasks, newest first: {'items': [...], 'next_cursor': str or None}"""
+        return self._get_page('tasks', user_id, 'created_at', True, limit, cursor, fields)
+
+    def get_task(self, task_id: str) -> Optional[Dict]:
+        """Get a task by id"""
+        try:
+            return self._get('tasks', 'id', task_id)
+        except Exception as e:
+            logger.error("Error getting task: %s", e)
+            return None
+
+    def update_task(self, task_id: str, updates: Dict) -> Optional[Dict]:
+        """Update a task"""
+        try:
+            return self._update('tasks', 'id', task_id, updates)
+        except Exception as e:
+            logger.error("Error updating task: %s", e)
+            return None
+
+    def delete_task(self, task_id: str) -> bool:
+        """Delete a task"""
+        try:
+            return self._delete('tasks', task_id)
+        except Exception as e:
+            logger.error("Error deleting task: %s", e)
+            return False
+
+    # ==================== NOTES MANAGEMENT ====================
+
+    def create_note(self, user_id: str, title: str, content: str = "", category: str = None) -> Optional[Dict]:
+        """Create a new note"""
+        try:
+            now = datetime.now().isoformat()
+            return self._insert('notes', {
+                'user_id': user_id,
+                'title': title,
+                'content': content,
+                'category': category,
+                'created_at': now,
+                'updated_at': now
+            })
+        except Exception as e:
+            logger.error("Error creating note: %s", e)
+            return None
+
+    def get_user_notes(self, user_id: str) -> List[Dict]:
+        """Get all notes for a user"""
+        try:
+            return self._select('SELECT * FROM notes WHERE user_id = ? ORDER BY updated_at DESC', (user_id,))
+        except Exception as e:
+            logger.error("Error getting notes: %s", e)
+            return []
+
+    def get_user_notes_page(self, user_id: str, limit: int = None, cursor: str = None,
+                            fields=None) -> Dict:
+        """Get one page of a user's notes, newest first"""
+        return self._get_page('notes', user_id, 'created_at', True, limit, cursor, fields)
+
+    def update_note(self, note_id: str, updates: Dict) -> Optional[Dict]:
+        """Update a note"""
+        try:
+            return self._update('notes', 'id', note_id, updates)
+        except Exception as e:
+            logger.error("Error updating note: %s", e)
+            return None
+
+    def delete_note(self, note_id: str) -> bool:
+        """Delete a note"""
+        try:
+            return self._delete('notes', note_id)
+        except Exception as e:
+            logger.error("Error deleting note: %s", e)
+            return False
+
+    # ==================== CALENDAR EVENTS ====================
+
+    def create_event(self, user_id: str, title: str, start_time: str, end_time: str,
+                     description: str = None, location: str = None) -> Optional[Dict]:
+        """Create a calendar event"""
+        try:
+            now = datetime.now().isoformat()
+            return self._insert('calendar_events', {
+                'user_id': user_id,
+                'title': title,
+                'description': description,
+                'start_time': start_time,
+                'end_time': end_time,
+                'location': location,
+                'created_at': now,
+                'updated_at': now
+            })
+        except Exception as e:
+            logger.error("Error creating event: %s", e)
+            return None
+
+    def get_user_events(self, user_id: str, start_date: str = None, end_date: str = None) -> List[Dict]:
+        """Get calendar events for a user"""
+        try:
+            sql = 'SELECT * FROM calendar_events WHERE user_id = ?'
+            params = [user_id]
+            if start_date:
+                sql += ' AND start_time >= ?'
+                params.append(start_date)
+            if end_date:
+                sql += ' AND start_time <= ?'
+                params.append(end_date)
+            return self._select(sql + ' ORDER BY start_time ASC', params)
+        except Exception as e:
+            logger.error("Error getting events: %s", e)
+            return []
+
+    def get_user_events_page(self, user_id: str, start_date: str = None, end_date: str = None,
+                             limit: int = None, cursor: str = None, fields=None) -> Dict:
+        """Get one page of a user's calendar events, earliest first"""
+        where, params = '', []
+        if start_date:
+            where += ' AND start_time >= ?'
+            params.append(start_date)
+        if end_date:
+            where += ' AND start_time <= ?'
+            params.append(end_date)
+        return self._get_page('calendar_events', user_id, 'start_time', False, limit, cursor, fields, where, params)
+
+    def update_event(self, event_id: str, updates: Dict) -> Optional[Dict]:
+        """Update a calendar event"""
+        try:
+            return self._update('calendar_events', 'id', event_id, updates)
+        except Exception as e:
+            logger.error("Error updating event: %s", e)
+            return None
+
+    def delete_event(self, event_id: str) -> bool:
+        """Delete a calendar event"""
+        try:
+            return self._delete('calendar_events', event_id)
+        except Exception as e:
+            logger.error("Error deleting event: %s", e)
+            return False
+
+    # ==================== USER PREFERENCES ====================
+
+    def get_user_preferences(self, user_id: str) -> Optional[Dict]:
+        """Get user preferences"""
+        try:
+            return self._get('user_preferences', 'user_id', user_id)
+        except Exception as e:
+            logger.error("Error getting preferences: %s", e)
+            return None
+
+    def update_user_preferences(self, user_id: str, preferences: Dict) -> Optional[Dict]:
+        """Update user preferences"""
+        try:
+            existing = self._update('user_preferences', 'user_id', user_id, preferences)
+            if existing:
+                return existing
+
+            now = datetime.now().isoformat()
+            values = {key: value for key, value in preferences.items() if key in UPDATABLE['user_preferences']}
+            if 'news_sources' in values:
+                values['news_sources'] = json.dumps(values['news_sources'])
+            return self._insert('user_preferences', dict(values, user_id=user_id, created_at=now, updated_at=now))
+        except Exception as e:
+            logger.error("Error updating preferences: %s", e)
+            return None
+
+    # ==================== NOTIFICATIONS ====================
+
+    def add_notification(self, notification: Dict, user_id: str = None) -> bool:
+        """Persist a notification (its full dict is kept as JSON)"""
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO notifications (id, user_id, type, payload, read, created_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (notification['id'], user_id, notification.get('type'),
+                     json.dumps(notification, default=str), notification.get('read', False),
+                     notification.get('timestamp'))
+                )
+            return True
+        except Exception as e:
+            logger.error("Error saving notification: %s", e)
+            return False
+
+    def get_notifications(self, user_id: str = None, unread_only: bool = False,
+                          limit: Optional[int] = 500) -> List[Dict]:
+        """Get stored notifications, oldest first (the newest limit of them; None for all)"""
+        try:
+            sql = 'SELECT payload, read FROM notifications'
+            clauses, params = [], []
+            if user_id is not None:
+                clauses.append('user_id = ?')
+                params.append(user_id)
+            if unread_only:
+                clauses.append('read = 0')
+            if clauses:
+                sql += ' WHERE ' + ' AND '.join(clauses)
+            sql += ' ORDER BY created_at DESC'
+            if limit is not None:
+                sql += ' LIMIT ?'
+                params.append(limit)
+
+            notifications = []
+            for row in self._connection().execute(sql, params):
+                notification = json.loads(row['payload'])
+                notification['read'] = bool(row['read'])
+                notifications.append(notification)
+            notifications.reverse()
+            return notifications
+        except Exception as e:
+            logger.error("Error getting notifications: %s", e)
+            return []
+
+    def mark_notification_read(self, notification_id: str) -> bool:
+        """Mark a stored notification as read"""
+        try:
+            conn = self._connection()
+            with conn:
+                cursor = conn.execute('UPDATE notifications SET read = 1 WHERE id = ?', (notification_id,))
+            return cursor.rowcount > 0
+        except Exception as e:
+            logger.error("Error updating notification: %s", e)
+            return False
+
+    def delete_notification(self, notification_id: str) -> bool:
+        """Delete a stored notification"""
+        try:
+            return self._delete('notifications', notification_id)
+        except Exception as e:
+            logger.error("Error deleting notification: %s", e)
+            return False
+
+    def delete_notifications(self, notification_ids) -> bool:
+        """Delete many stored notifications in one transaction"""
+        try:
+            conn = self._connection()
+            with conn:
+                conn.executemany('DELETE FROM notifications WHERE id = ?', ((nid,) for nid in notification_ids))
+            return True
+        except Exception as e:
+            logger.error("Error deleting notifications: %s", e)
+            return False
+
+    def clear_notifications(self, user_id: str = None, all_users: bool = False) -> bool:
+        """Delete one user's stored notifications (anonymous ones for None), or everyone's"""
+        try:
+            conn = self._connection()
+            with conn:
+                if all_users:
+                    conn.execute('DELETE FROM notifications')
+                elif user_id is None:
+                    conn.execute('DELETE FROM notifications WHERE user_id IS NULL')
+                else:
+                    conn.execute('DELETE FROM notifications WHERE user_id = ?', (user_id,))
+            return True
+        except Exception as e:
+            logger.error("Error clearing notifications: %s", e)
+            return False
+
+    # ==================== REMINDER QUEUE ====================
+
+    def save_reminder(self, key: str, due_at: float, payload: Dict = None, forward: bool = False) -> bool:
+        """Insert or replace a pending reminder"""
+        return self.save_reminders([(key, due_at, payload)], forward=forward)
+
+    def save_reminders(self, reminders, forward: bool = False) -> bool:
+        """Insert or replace many pending reminders in one transaction
+
+        forward: also append them to reminder_changes for the dispatching process
+        """
+        rows = [(key, due_at, json.dumps(payload, default=str)) for key, due_at, payload in reminders]
+        try:
+            conn = self._connection()
+            with conn:
+                conn.executemany('INSERT OR REPLACE INTO reminders (key, due_at, payload) VALUES (?, ?, ?)', rows)
+                if forward:
+                    conn.executemany('INSERT INTO reminder_changes (key, due_at, payload) VALUES (?, ?, ?)', rows)
+            return True
+        except Exception as e:
+            logger.error("Error saving reminders: %s", e)
+            return False
+
+    def delete_reminder(self, key: str, due_at: float = None, forward: bool = False) -> bool:
+        """Remove a reminder that fired or was cancelled
+
+        due_at: only remove it if it is still due then (it may have been rescheduled)
+        forward: also record the cancellation in reminder_changes
+        """
+        try:
+            conn = self._connection()
+            with conn:
+                if due_at is None:
+                    conn.execute('DELETE FROM reminders WHERE key = ?', (key,))
+                else:
+                    conn.execute('DELETE FROM reminders WHERE key = ? AND due_at = ?', (key, due_at))
+                if forward:
+                    conn.execute('INSERT INTO reminder_changes (key, due_at, payload) VALUES (?, NULL, NULL)', (key,))
+            return True
+        except Exception as e:
+            logger.error("Error deleting reminder: %s", e)
+            return False
+
+    def get_reminder_changes(self, after_id: int, limit: int = 1000) -> List:
+        """Forwarded changes after after_id as (id, key, due_at, payload); due_at None means cancelled"""
+        try:
+            rows = self._connection().execute(
+                'SELECT id, key, due_at, payload FROM reminder_changes WHERE id > ? ORDER BY id LIMIT ?',
+                (after_id, limit)
+            )
+            return [(row['id'], row['key'], row['due_at'], json.loads(row['payload']) if row['payload'] else None)
+                    for row in rows]
+        except Exception as e:
+            logger.error("Error loading reminder changes: %s", e)
+            return []
+
+    def last_reminder_change(self) -> int:
+        """Id of the newest forwarded change, 0 if there are none"""
+        try:
+            row = self._connection().execute('SELECT MAX(id) AS id FROM reminder_changes').fetchone()
+            return row['id'] or 0
+        except Exception as e:
+            logger.error("Error reading reminder changes: %s", e)
+            return 0
+
+    def prune_reminder_changes(self, up_to_id: int) -> bool:
+        """Drop forwarded changes that have been applied"""
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute('DELETE FROM reminder_changes WHERE id <= ?', (up_to_id,))
+            return True
+        except Exception as e:
+            logger.error("Error pruning reminder changes: %s", e)
+            return False
+
+    def get_reminders(self) -> List:
+        """All pending reminders as (key, due_at, payload), earliest first"""
+        try:
+            rows = self._connection().execute('SELECT key, due_at, payload FROM reminders ORDER BY due_at')
+            return [(row['key'], row['due_at'], json.loads(row['payload'])) for row in rows]
+        except Exception as e:
+            logger.error("Error loading reminders: %s", e)
+            return []
+
+
+# Global local database instance
+local_db = LocalDatabaseService()
@@ -0,0 +1,166 @@
+"""
+Structured logging for JARVIS
+Log records go onto a bounded queue and are written as JSON lines by a
+background thread (QueueHandler + QueueListener), so request threads never
+block on stdout or interleave output. Each record carries the current
+request's correlation id, and DEBUG records on hot paths can be sampled.
+
+LOG_LEVEL              minimum level (INFO)
+LOG_FORMAT             json or text (json)
+LOG_DEBUG_SAMPLE_RATE  fraction of DEBUG records kept (1.0); a record can
+                       override it with extra={'sample_rate': ...}
+LOG_QUEUE_SIZE         records waiting to be written before new ones are dropped (10000)
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+
+_request_id = contextvars.ContextVar('jarvis_request_id', default=None)
+
+# LogRecord attributes that are not user-supplied extras
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'request_id', 'sample_rate'}
+
+
+def set_request_id(request_id):
+    """Set the correlation id for the current context; returns a token for reset_request_id"""
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token):
+    try:
+        _request_id.reset(token)
+    except ValueError:
+        _request_id.set(None)
+
+
+def get_request_id():
+    return _request_id.get()
+
+
+class CorrelationFilter(logging.Filter):
+    """Stamp records with the correlation id of the request that logged them"""
+
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of DEBUG records; other levels always pass"""
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        rate = getattr(record, 'sample_rate', self.rate)
+        return rate >= 1 or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'thread': record.threadName
+        }
+        if getattr(record, 'request_id', None):
+            entry['request_id'] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s')
+
+    def format(self, record):
+        record.request_id = getattr(record, 'request_id', None) or '-'
+        return super().format(record)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Render the message and traceback here, while args and exc_info are
+        # still valid, but leave the final formatting to the writer thread
+        prepared = logging.makeLogRecord(vars(record))
+        prepared.msg = record.getMessage()
+        prepared.args = None
+        if record.exc_info:
+            prepared.exc_text = logging.Formatter().formatException(record.exc_info)
+        prepared.exc_info = None
+        return prepared
+
+
+_handler = None
+_listener = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging():
+    """Configure the 'jarvis' logger hierarchy once per process"""
+    global _handler, _listener
+    if _handler is not None:
+        return
+    with _setup_lock:
+        if _handler is not None:
+            return
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(TextFormatter() if os.getenv('LOG_FORMAT', 'json') == 'text' else JsonFormatter())
+
+        handler = DroppingQueueHandler(queue.Queue(maxsize=int(os.getenv('LOG_QUEUE_SIZE', '10000'))))
+        handler.addFilter(SamplingFilter(float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '1.0'))))
+        handler.addFilter(CorrelationFilter())
+
+        root = logging.getLogger('jarvis')
+        root.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+        root.addHandler(handler)
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(handler.queue, output)
+        _listener.start()
+        atexit.register(_listener.stop)
+        _handler = handler
+
+
+def get_logger(name):
+    """Logger under the 'jarvis' hierarchy, e.g. get_logger('database')"""
+    setup_logging()
+    return logging.getLogger(f'jarvis.{name}')
+
+
+def get_logging_stats():
+    return {
+        'level': logging.getLevelName(logging.getLogger('jarvis').level),
+        'queued': _handler.queue.qsize() if _handler else 0,
+        'dropped': _handler.dropped if _handler else 0
+    }
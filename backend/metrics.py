@@ -0,0 +1,287 @@
+"""
+Metrics for JARVIS
+Prometheus-style counters, gauges and latency histograms, exposed as text
+at /api/metrics. Each thread records into its own shard without taking a
+lock; shards are only summed when the metrics are scraped. Timings of a
+histogram created with trace=True also show up as spans of the request trace.
+"""
+
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+from tracing import span
+
+# Latency buckets in seconds (upper bounds)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Shards:
+    """Per-thread lists of numbers; a thread only ever writes its own list"""
+
+    def __init__(self, size):
+        self.size = size
+        self._local = threading.local()
+        self._shards = []                # (thread, values)
+        self._retired = [0] * size       # folded-in shards of finished threads
+        self._lock = threading.Lock()
+
+    def mine(self):
+        shard = getattr(self._local, 'values', None)
+        if shard is None:
+            shard = self._local.values = [0] * self.size
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+                if len(self._shards) > 64:
+                    self._retire()
+        return shard
+
+    def totals(self):
+        with self._lock:
+            self._retire()
+            totals = list(self._retired)
+            for _, shard in self._shards:
+                for index, value in enumerate(shard):
+                    totals[index] += value
+        return totals
+
+    def _retire(self):
+        # Threads come and go (e.g. the dev server's thread per request)
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                for index, value in enumerate(shard):
+                    self._retired[index] += value
+        self._shards = live
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def labels(self, *values):
+        """The child for one combination of label values"""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child(values)
+        return child
+
+    def _new_child(self, values):
+        raise NotImplementedError
+
+    def _label_text(self, values, le=None):
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values)]
+        if le is not None:
+            pairs.append(f'le="{le}"')
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, child in children:
+            lines.extend(self._sample_lines(values, child))
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self._shards = _Shards(1)
+
+    def inc(self, amount=1):
+        self._shards.mine()[0] += amount
+
+    def value(self):
+        return self._shards.totals()[0]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self, values):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def _sample_lines(self, values, child):
+        return [f'{self.name}{self._label_text(values)} {_format(child.value())}']
+
+
+class _HistogramChild:
+    def __init__(self, buckets, span_name=None):
+        self.buckets = buckets
+        self.span_name = span_name
+        # One count per bucket, then +Inf, then the sum
+        self._shards = _Shards(len(buckets) + 2)
+
+    def observe(self, value):
+        shard = self._shards.mine()
+        shard[bisect_left(self.buckets, value)] += 1
+        shard[-1] += value
+
+    def time(self):
+        return _Timer(self)
+
+    def snapshot(self):
+        """(cumulative bucket counts including +Inf, count, sum)"""
+        totals = self._shards.totals()
+        cumulative, running = [], 0
+        for count in totals[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, running, totals[-1]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None, trace=False):
+        self.buckets = tuple(sorted(buckets))
+        self.trace = trace
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self, values):
+        return _HistogramChild(self.buckets, '.'.join(values) if self.trace else None)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def time(self, *values):
+        """Context manager that observes the duration of its block"""
+        return _Timer(self.labels(*values))
+
+    def _sample_lines(self, values, child):
+        cumulative, count, total = child.snapshot()
+        bounds = [_format(bound) for bound in self.buckets] + ['+Inf']
+        lines = [f'{self.name}_bucket{self._label_text(values, bound)} {bucket_count}'
+                 for bound, bucket_count in zip(bounds, cumulative)]
+        lines.append(f'{self.name}_sum{self._label_text(values)} {_format(total)}')
+        lines.append(f'{self.name}_count{self._label_text(values)} {count}')
+        return lines
+
+
+class Gauge(_Metric):
+    """A value read when metrics are scraped, from set() or a callback"""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, func=None, registry=None):
+        self.func = func
+        self._value = 0
+        super().__init__(name, documentation, (), registry)
+
+    def set(self, value):
+        self._value = value
+
+    def value(self):
+        if self.func is None:
+            return self._value
+        try:
+            return self.func()
+        except Exception:
+            return float('nan')
+
+    def expose(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} gauge',
+                f'{self.name} {_format(self.value())}']
+
+
+class _Timer:
+    __slots__ = ('child', 'start', 'span')
+
+    def __init__(self, child):
+        self.child = child
+        self.span = None
+
+    def __enter__(self):
+        if self.child.span_name:
+            self.span = span(self.child.span_name)
+            self.span.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+        if self.span is not None:
+            self.span.__exit__(*exc)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def exposition(self):
+        """All metrics in the Prometheus text format"""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.expose())
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format(value):
+    if isinstance(value, float):
+        return repr(value) if value == value else 'NaN'
+    return str(value)
+
+
+def timed(histogram, *values):
+    """Decorator: observe each call's duration in histogram (with label values)"""
+    def decorator(func):
+        child = histogram.labels(*values)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Timer(child):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_methods(cls, histogram, dependency, skip=()):
+    """Time every public method of cls (except skip) as histogram{dependency, operation=<method>}"""
+    for name, attribute in list(vars(cls).items()):
+        if inspect.isfunction(attribute) and not name.startswith('_') and name not in skip:
+            setattr(cls, name, timed(histogram, dependency, name)(attribute))
+    return cls
+
+
+REGISTRY = Registry()
+
+# Shared metrics
+REQUEST_LATENCY = Histogram(
+    'jarvis_http_request_duration_seconds',
+    'HTTP request latency by route',
+    ('method', 'route', 'status')
+)
+DEPENDENCY_LATENCY = Histogram(
+    'jarvis_dependency_duration_seconds',
+    'Latency of calls to outbound dependencies and expensive local steps',
+    ('dependency', 'operation'),
+    trace=True
+)
@@ -3,23 +3,35 @@ Notification Manager for JARVIS
 Handles reminders and notifications
 """
 
-import json
+import os
 from datetime import datetime
 from collections import defaultdict
+from local_database import local_db
+from notification_store import NotificationStore, new_notification_id
+from logger import get_logger
+
+logger = get_logger('notifications')
 
 class NotificationManager:
     """Manages notifications and reminders"""
     
     def __init__(self):
-        self.active_notifications = []
+        # Notifications survive restarts in the local database; retention applies to both
+        self.store = NotificationStore(
+            max_per_user=int(os.getenv('NOTIFICATION_MAX_PER_USER', '500')),
+            max_age=float(os.getenv('NOTIFICATION_MAX_AGE', str(30 * 86400))),
+            on_evict=local_db.delete_notifications
+        )
+        self.store.load(local_db.get_notifications(limit=None))
         self.notification_callbacks = defaultdict(list)
     
     def add_notification(self, notification):
         """Add a notification to the queue"""
-        notification['id'] = f"notif_{datetime.now().timestamp()}"
+        notification['id'] = new_notification_id()
         notification['timestamp'] = datetime.now().isoformat()
         notification['read'] = False
-        self.active_notifications.append(notification)
+        local_db.add_notification(notification, notification.get('user_id'))
+        self.store.add(notification)
         
         # Trigger callbacks
         self._trigger_callbacks(notification)
@@ -34,50 +46,55 @@ class NotificationManager:
             'message': f"Reminder: {task['text']}",
             'task_id': task.get('id'),
             'task': task,
+            'user_id': task.get('user_id') or task.get('userId'),
             'priority': 'high'
         }
         return self.add_notification(notification)
     
-    def get_notifications(self, user_id=None, unread_only=False):
-        """Get all notifications, optionally filtered"""
-        notifications = self.active_notifications
-        
-        if unread_only:
-            notifications = [n for n in notifications if not n.get('read')]
-        
-        return notifications
+    def get_notifications(self, user_id=None, unread_only=False, limit=None):
+        """Get a user's notifications (anonymous ones for None), oldest first"""
+        return self.store.all(user_id, unread_only=unread_only, limit=limit)
+    
+    def _owned_by(self, notification_id, user_id):
+        notification = self.store.get(notification_id)
+        return notification is not None and notification.get('user_id') == user_id
+    
+    def mark_as_read(self, notification_id, user_id=None):
+        """Mark one of a user's notifications as read"""
+        if not self._owned_by(notification_id, user_id) or not self.store.mark_read(notification_id):
+            return False
+        local_db.mark_notification_read(notification_id)
+        return True
     
-    def mark_as_read(self, notification_id):
-        """Mark a notification as read"""
-        for notif in self.active_notifications:
-            if notif.get('id') == notification_id:
-                notif['read'] = True
-                return True
-        return False
+    def clear_notification(self, notification_id, user_id=None):
+        """Remove one of a user's notifications"""
+        if not self._owned_by(notification_id, user_id):
+            return False
+        self.store.remove(notification_id)
+        local_db.delete_notification(notification_id)
+        return True
     
-    def clear_notification(self, notification_id):
-        """Remove a notification"""
-        self.active_notifications = [
-            n for n in self.active_notifications 
-            if n.get('id') != notification_id
-        ]
+    def clear_all_notifications(self, user_id=None):
+        """Clear all of a user's notifications (anonymous ones for None)"""
+        self.store.clear(user_id)
+        local_db.clear_notifications(user_id)
     
-    def clear_all_notifications(self):
-        """Clear all notifications"""
-        self.active_notifications = []
+    def get_stats(self):
+        """Get stored and evicted notification counts"""
+        return {'stored': len(self.store), 'evicted': self.store.evicted}
     
     def register_callback(self, event_type, callback):
-        """Register a callback for notification events"""
+        """Register a callback for notification events ('*' for every type)"""
         self.notification_callbacks[event_type].append(callback)
     
     def _trigger_callbacks(self, notification):
         """Trigger registered callbacks"""
         event_type = notification.get('type', 'general')
-        for callback in self.notification_callbacks[event_type]:
+        for callback in self.notification_callbacks[event_type] + self.notification_callbacks['*']:
             try:
                 callback(notification)
             except Exception as e:
-                print(f"Error in notification callback: {e}")
+                logger.exception("Error in notification callback")
 
 # Global instance
 notification_manager = NotificationManager()
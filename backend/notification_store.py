@@ -0,0 +1,170 @@
+"""
+Indexed in-memory notification store for JARVIS
+O(1) lookups by id, per-user partitions in arrival order, a per-user unread
+index, and retention by count and age so the store stops growing forever
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+
+
+def new_notification_id():
+    """Collision-free notification id"""
+    return f"notif_{uuid.uuid4().hex}"
+
+
+def _created_at(notification):
+    """Epoch seconds a notification was created, from its ISO timestamp"""
+    try:
+        return datetime.fromisoformat(notification['timestamp']).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return time.time()
+
+
+class NotificationStore:
+    """Notifications keyed by id, partitioned by user, with an unread index
+
+    max_per_user: keep at most this many notifications per user (oldest go first)
+    max_age: drop notifications older than this many seconds (0 keeps them)
+    on_evict: called with the list of ids dropped by retention
+    """
+
+    def __init__(self, max_per_user=500, max_age=0, sweep_interval=60, on_evict=None):
+        self.max_per_user = max_per_user
+        self.max_age = max_age
+        self.sweep_interval = sweep_interval
+        self.on_evict = on_evict
+        self._notifications = {}                       # id -> notification
+        self._by_user = defaultdict(OrderedDict)       # user_id -> {id: created_at}, oldest first
+        self._unread = defaultdict(dict)               # user_id -> {id: None}, oldest first
+        self._lock = threading.RLock()
+        self._last_sweep = time.time()
+        self.evicted = 0
+
+    def load(self, notifications):
+        """Replace the contents of the store (notifications oldest first)"""
+        with self._lock:
+            self._notifications = {}
+            self._by_user = defaultdict(OrderedDict)
+            self._unread = defaultdict(dict)
+            for notification in notifications:
+                self._insert(notification)
+            self._sweep(time.time())
+
+    def add(self, notification):
+        """Add a notification, evicting what falls outside retention"""
+        with self._lock:
+            self._insert(notification)
+            now = time.time()
+            self._trim(notification.get('user_id'), now)
+            if now - self._last_sweep >= self.sweep_interval:
+                self._sweep(now)
+            return notification
+
+    def get(self, notification_id):
+        """Get a notification by id, or None"""
+        return self._notifications.get(notification_id)
+
+    def all(self, user_id=None, unread_only=False, limit=None):
+        """A user's notifications, oldest first (the newest limit of them if given)"""
+        with self._lock:
+            if self.max_age:
+                self._trim(user_id, time.time())
+            ids = self._unread.get(user_id, {}) if unread_only else self._by_user.get(user_id, {})
+            ids = list(ids)
+            if limit is not None:
+                ids = ids[-limit:] if limit else []
+            return [self._notifications[notification_id] for notification_id in ids]
+
+    def mark_read(self, notification_id):
+        """Mark a notification read; returns False if it does not exist"""
+        with self._lock:
+            notification = self._notifications.get(notification_id)
+            if notification is None:
+                return False
+            notification['read'] = True
+            user_id = notification.get('user_id')
+            unread = self._unread.get(user_id)
+            if unread is not None:
+                unread.pop(notification_id, None)
+                if not unread:
+                    del self._unread[user_id]
+            return True
+
+    def remove(self, notification_id):
+        """Remove a notification; returns it, or None if it did not exist"""
+        with self._lock:
+            notification = self._notifications.pop(notification_id, None)
+            if notification is None:
+                return None
+            self._unindex(notification.get('user_id'), notification_id)
+            return notification
+
+    def clear(self, user_id=None, all_users=False):
+        """Remove one user's notifications, or everyone's"""
+        with self._lock:
+            if all_users:
+                self._notifications = {}
+                self._by_user = defaultdict(OrderedDict)
+                self._unread = defaultdict(dict)
+                return
+            for notification_id in self._by_user.pop(user_id, {}):
+                del self._notifications[notification_id]
+            self._unread.pop(user_id, None)
+
+    def unread_count(self, user_id=None):
+        """Number of a user's unread notifications"""
+        return len(self._unread.get(user_id, ()))
+
+    def __len__(self):
+        return len(self._notifications)
+
+    def __contains__(self, notification_id):
+        return notification_id in self._notifications
+
+    def _insert(self, notification):
+        notification_id = notification['id']
+        if notification_id in self._notifications:
+            self.remove(notification_id)
+        user_id = notification.get('user_id')
+        self._notifications[notification_id] = notification
+        self._by_user[user_id][notification_id] = _created_at(notification)
+        if not notification.get('read'):
+            self._unread[user_id][notification_id] = None
+
+    def _unindex(self, user_id, notification_id):
+        partition = self._by_user.get(user_id)
+        if partition is not None:
+            partition.pop(notification_id, None)
+            if not partition:
+                del self._by_user[user_id]
+        unread = self._unread.get(user_id)
+        if unread is not None:
+            unread.pop(notification_id, None)
+            if not unread:
+                del self._unread[user_id]
+
+    def _trim(self, user_id, now):
+        """Evict a user's oldest notifications beyond the count or age limit"""
+        partition = self._by_user.get(user_id)
+        evicted = []
+        while partition:
+            notification_id, created_at = next(iter(partition.items()))
+            if len(partition) <= self.max_per_user and not (self.max_age and now - created_at > self.max_age):
+                break
+            del self._notifications[notification_id]
+            self._unindex(user_id, notification_id)
+            evicted.append(notification_id)
+        if evicted:
+            self.evicted += len(evicted)
+            if self.on_evict:
+                self.on_evict(evicted)
+
+    def _sweep(self, now):
+        """Apply retention to every user, for users who have gone quiet"""
+        self._last_sweep = now
+        for user_id in list(self._by_user):
+            self._trim(user_id, now)
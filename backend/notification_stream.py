@@ -0,0 +1,229 @@
+"""
+Notification Stream for JARVIS
+Pushes new notifications to connected clients (Server-Sent Events) instead of
+making them poll GET /api/notifications. Each client gets a bounded queue;
+one that falls too far behind is disconnected and can reconnect with
+Last-Event-ID to pick up what it missed.
+Relay: in-process (default) or Redis pub/sub, so a reminder fired in one
+gunicorn worker reaches clients connected to the others.
+
+An open stream holds a worker thread in the Flask app: run it under threaded
+workers (the Procfile uses gthread), or serve streams from app_async. Flask
+streams also close after NOTIFICATION_STREAM_MAX_AGE seconds and the client
+reconnects with Last-Event-ID, so a thread is never held indefinitely.
+"""
+
+import asyncio
+import json
+import os
+import queue
+import threading
+from collections import defaultdict, deque
+
+from logger import get_logger
+
+logger = get_logger('notifications.stream')
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_INTERVAL = float(os.getenv('NOTIFICATION_STREAM_HEARTBEAT', '15'))
+
+# Seconds a stream from the sync (WSGI) app stays open before the client is made to reconnect
+STREAM_MAX_AGE = float(os.getenv('NOTIFICATION_STREAM_MAX_AGE', '300'))
+
+KEEPALIVE = ': keepalive\n\n'
+DROPPED = 'event: dropped\ndata: {}\n\n'
+
+
+def format_event(notification):
+    """Format a notification as a Server-Sent Event"""
+    return f"id: {notification.get('id')}\nevent: notification\ndata: {json.dumps(notification, default=str)}\n\n"
+
+
+class Subscriber:
+    """A streaming client's bounded queue of notifications"""
+
+    def __init__(self, user_id, max_queue):
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = False
+
+    def offer(self, notification):
+        """Queue a notification; returns False if the client has fallen behind"""
+        try:
+            self.queue.put_nowait(notification)
+            return True
+        except queue.Full:
+            return False
+
+    def get(self, timeout):
+        """Next notification, or None after timeout seconds"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class AsyncSubscriber(Subscriber):
+    """Subscriber read from an asyncio event loop (the async serving mode)"""
+
+    def __init__(self, user_id, max_queue, loop):
+        self.user_id = user_id
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.loop = loop
+        self.dropped = False
+
+    def offer(self, notification):
+        if self.queue.qsize() >= self.queue.maxsize:
+            return False
+        self.loop.call_soon_threadsafe(self._put, notification)
+        return True
+
+    def _put(self, notification):
+        try:
+            self.queue.put_nowait(notification)
+        except asyncio.QueueFull:
+            self.dropped = True
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class NotificationBroker:
+    """Fan notifications out to the subscribers of the user they belong to"""
+
+    def __init__(self, max_queue=100, replay=200):
+        self.max_queue = max_queue
+        self.relay = None
+        self._subscribers = defaultdict(set)   # user_id -> subscribers
+        self._recent = deque(maxlen=replay)     # for Last-Event-ID replay
+        self._lock = threading.Lock()
+
+        self.published = 0
+        self.delivered = 0
+        self.dropped_subscribers = 0
+
+    def subscribe(self, user_id=None, last_event_id=None, loop=None):
+        """Register a client; with last_event_id, queue what it missed since then"""
+        if loop:
+            subscriber = AsyncSubscriber(user_id, self.max_queue, loop)
+        else:
+            subscriber = Subscriber(user_id, self.max_queue)
+
+        with self._lock:
+            self._subscribers[user_id].add(subscriber)
+            missed = []
+            if last_event_id:
+                ids = [notification.get('id') for notification in self._recent]
+                if last_event_id in ids:
+                    missed = [notification for notification in list(self._recent)[ids.index(last_event_id) + 1:]
+                              if notification.get('user_id') == user_id]
+        for notification in missed[-self.max_queue:]:
+            subscriber.offer(notification)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[subscriber.user_id]
+
+    def publish(self, notification):
+        """Send a notification to its user's clients in every worker"""
+        self.published += 1
+        if self.relay:
+            try:
+                self.relay.publish(notification)
+                return
+            except Exception as e:
+                logger.warning("Notification relay failed (%s), delivering locally", e)
+        self.fan_out(notification)
+
+    def fan_out(self, notification):
+        """Send a notification to its user's clients connected to this worker"""
+        user_id = notification.get('user_id')
+        with self._lock:
+            self._recent.append(notification)
+            subscribers = list(self._subscribers.get(user_id, ()))
+
+        for subscriber in subscribers:
+            if subscriber.offer(notification):
+                self.delivered += 1
+            else:
+                # Slow consumer: cut it loose rather than buffer without bound
+                self.unsubscribe(subscriber)
+                subscriber.dropped = True
+                self.dropped_subscribers += 1
+                logger.warning("Dropped slow notification subscriber (user %s)", user_id)
+
+    def get_stats(self):
+        """Get subscriber count and publish/deliver/drop counters"""
+        with self._lock:
+            subscribers = sum(len(group) for group in self._subscribers.values())
+        return {
+            'subscribers': subscribers,
+            'relay': type(self.relay).__name__ if self.relay else 'memory',
+            'published': self.published,
+            'delivered': self.delivered,
+            'dropped_subscribers': self.dropped_subscribers
+        }
+
+
+class RedisRelay:
+    """Carry notifications between workers over a Redis pub/sub channel"""
+
+    def __init__(self, url, broker, channel='jarvis:notifications'):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis package not installed. Run: pip install redis")
+        self.client = redis.Redis.from_url(url)
+        self.broker = broker
+        self.channel = channel
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self.pubsub.subscribe(channel)
+        self._thread = threading.Thread(target=self._listen, name='notification-relay', daemon=True)
+        self._thread.start()
+
+    def publish(self, notification):
+        self.client.publish(self.channel, json.dumps(notification, default=str))
+
+    def _listen(self):
+        for message in self.pubsub.listen():
+            try:
+                self.broker.fan_out(json.loads(message['data']))
+            except Exception as e:
+                logger.error("Error relaying notification: %s", e)
+
+
+def create_notification_broker():
+    """Build the broker configured by NOTIFICATION_RELAY / REDIS_URL, falling back to in-process"""
+    broker = NotificationBroker(
+        max_queue=int(os.getenv('NOTIFICATION_STREAM_QUEUE', '100')),
+        replay=int(os.getenv('NOTIFICATION_STREAM_REPLAY', '200'))
+    )
+    redis_url = os.getenv('REDIS_URL')
+
+    if os.getenv('NOTIFICATION_RELAY', 'memory' if not redis_url else 'redis') == 'redis':
+        try:
+            relay = RedisRelay(redis_url or 'redis://localhost:6379/0', broker)
+            relay.client.ping()
+            broker.relay = relay
+            logger.info("Notification relay: Redis")
+        except Exception as e:
+            logger.warning("Redis notification relay unavailable (%s), using in-process relay", e)
+
+    return broker
+
+
+# Global instance
+notification_broker = create_notification_broker()
@@ -0,0 +1,68 @@
+"""
+Pagination helpers for JARVIS
+Opaque keyset cursors, page-size limits and field projection shared by the
+Supabase, SQLite and in-memory task storage
+"""
+
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Columns that can be projected when listing, per table (mirrors schema.sql)
+LIST_COLUMNS = {
+    'tasks': {'id', 'user_id', 'text', 'completed', 'scheduled_for', 'created_at', 'updated_at'},
+    'notes': {'id', 'user_id', 'title', 'content', 'category', 'created_at', 'updated_at'},
+    'calendar_events': {'id', 'user_id', 'title', 'description', 'start_time', 'end_time', 'location',
+                        'recurring', 'recurrence_rule', 'created_at', 'updated_at'}
+}
+
+
+def clamp_limit(limit):
+    """Page size within 1..MAX_PAGE_SIZE, DEFAULT_PAGE_SIZE if not given"""
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def encode_cursor(*values):
+    """Encode the sort key of the last item on a page as an opaque cursor"""
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size=2):
+    """Decode a cursor into its sort key values; raises ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def parse_fields(fields, allowed, required=()):
+    """Validate a field projection ('a,b' or a list); returns None for all fields
+
+    Fields needed to build the next cursor are always included. Raises
+    ValueError for fields that don't exist.
+    """
+    if not fields:
+        return None
+    if isinstance(fields, str):
+        fields = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    selected = list(dict.fromkeys(list(required) + list(fields)))
+    return selected
+
+
+def page_result(rows, limit, cursor_key):
+    """Trim rows fetched with limit + 1 to a page and build the next cursor from the last item"""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return {'items': rows, 'next_cursor': encode_cursor(*cursor_key(rows[-1]))}
+    return {'items': rows, 'next_cursor': None}
@@ -0,0 +1,225 @@
+"""
+On-demand profiling for JARVIS
+Time-bounded stack sampling of every thread in the running process (request
+workers, the reminder scheduler, the speech thread...) returned as collapsed
+stacks or an SVG flamegraph, and tracemalloc snapshots diffed over a window
+to show which lines and tracked containers are growing. No restart needed.
+"""
+
+import html
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import types
+from collections import Counter
+
+MAX_SECONDS = float(os.getenv('PROFILER_MAX_SECONDS', '60'))
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a profile is already running in this process"""
+
+
+class Profiler:
+    """Runs one profile at a time; callers block for the profile's duration"""
+
+    def __init__(self, max_seconds=MAX_SECONDS, tracemalloc_frames=10):
+        self.max_seconds = max_seconds
+        self.tracemalloc_frames = tracemalloc_frames
+        self._busy = threading.Lock()
+        self._tracked = {}   # name -> callable returning the container to size
+
+    def track(self, name, getter):
+        """Report the length and approximate size of getter() in memory profiles"""
+        self._tracked[name] = getter
+
+    def sample_stacks(self, seconds=10, interval=0.01, idle=False):
+        """Sample all threads' stacks; returns (Counter of collapsed stack -> samples, rounds)
+
+        Stacks are 'thread;outer_func (file:line);...;inner_func (file:line)'.
+        Threads parked in a wait are skipped unless idle is set.
+        """
+        seconds = self._clamp(seconds)
+        self._acquire()
+        try:
+            stacks = Counter()
+            me = threading.get_ident()
+            rounds = 0
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == me:
+                        continue
+                    stack = _collapse(frame)
+                    if not idle and _is_idle(stack):
+                        continue
+                    stacks[names.get(ident, f'thread-{ident}') + ';' + ';'.join(stack)] += 1
+                rounds += 1
+                time.sleep(interval)
+            return stacks, rounds
+        finally:
+            self._busy.release()
+
+    def memory_growth(self, seconds=10, top=25):
+        """Allocation growth by source line over a window, plus tracked container sizes"""
+        seconds = self._clamp(seconds)
+        self._acquire()
+        started_here = not tracemalloc.is_tracing()
+        try:
+            if started_here:
+                tracemalloc.start(self.tracemalloc_frames)
+            before_sizes = self._container_sizes()
+            before = self._snapshot()
+            time.sleep(seconds)
+            after = self._snapshot()
+            after_sizes = self._container_sizes()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            if started_here:
+                tracemalloc.stop()
+            self._busy.release()
+
+        growth = []
+        for stat in after.compare_to(before, 'traceback')[:top]:
+            growth.append({
+                'size_diff': stat.size_diff,
+                'size': stat.size,
+                'count_diff': stat.count_diff,
+                'traceback': [f'{frame.filename}:{frame.lineno}' for frame in reversed(stat.traceback)]
+            })
+        containers = {
+            name: dict(after, bytes_diff=after['bytes'] - before_sizes.get(name, after)['bytes'])
+            for name, after in after_sizes.items()
+        }
+        return {
+            'seconds': seconds,
+            # Only allocations made while tracing are seen, so a fresh start under-counts older objects
+            'tracing_started_for_profile': started_here,
+            'traced_current': current,
+            'traced_peak': peak,
+            'growth': growth,
+            'containers': containers
+        }
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__, all_frames=True),
+        ))
+
+    def _container_sizes(self):
+        sizes = {}
+        for name, getter in list(self._tracked.items()):
+            try:
+                container = getter()
+                length = len(container) if hasattr(container, '__len__') else None
+                sizes[name] = {'length': length, 'bytes': _approximate_size(container)}
+            except Exception as e:
+                # e.g. the container changed size while being walked
+                sizes[name] = {'length': None, 'bytes': 0, 'error': str(e)}
+        return sizes
+
+    def _clamp(self, seconds):
+        return max(0.1, min(float(seconds), self.max_seconds))
+
+    def _acquire(self):
+        if not self._busy.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already running")
+
+
+IDLE_FUNCTIONS = {'wait', 'select', 'poll', 'accept', 'sleep', '_wait_for_tstate_lock', 'readinto', 'recv_into'}
+
+
+def _collapse(frame):
+    """Frames outermost first, as 'function (file:line)'"""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _is_idle(stack):
+    """A thread whose innermost frame is a blocking wait"""
+    return bool(stack) and stack[-1].split(' ', 1)[0] in IDLE_FUNCTIONS
+
+
+def _approximate_size(obj, depth=5, seen=None):
+    """sys.getsizeof over containers and plain objects' attributes, a few levels deep"""
+    seen = seen if seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if depth <= 0:
+        return size
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += _approximate_size(key, depth - 1, seen) + _approximate_size(value, depth - 1, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)) or type(obj).__name__ in ('deque', 'OrderedDict'):
+        for item in obj:
+            size += _approximate_size(item, depth - 1, seen)
+    elif hasattr(obj, '__dict__') and not isinstance(obj, (type, types.ModuleType, types.FunctionType, types.MethodType)):
+        size += _approximate_size(vars(obj), depth - 1, seen)
+    return size
+
+
+def collapsed_text(stacks):
+    """Brendan Gregg's collapsed format, one 'stack count' line per stack"""
+    return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+
+def flamegraph_svg(stacks, title='JARVIS CPU profile', width=1200, row_height=16):
+    """Render collapsed stacks as a self-contained SVG flamegraph"""
+    root = {'name': 'all', 'count': 0, 'children': {}}
+    for stack, count in stacks.items():
+        root['count'] += count
+        node = root
+        for frame in stack.split(';'):
+            node = node['children'].setdefault(frame, {'name': frame, 'count': 0, 'children': {}})
+            node['count'] += count
+
+    rects = []
+    total = max(root['count'], 1)
+
+    def layout(node, x, depth):
+        node_width = node['count'] / total * width
+        if node_width < 0.5:
+            return depth
+        rects.append((x, depth, node_width, node))
+        deepest = depth
+        child_x = x
+        for child in sorted(node['children'].values(), key=lambda child: child['name']):
+            deepest = max(deepest, layout(child, child_x, depth + 1))
+            child_x += child['count'] / total * width
+        return deepest
+
+    depth = layout(root, 0.0, 0)
+    height = (depth + 1) * row_height + 30
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="monospace" font-size="11">',
+        f'<text x="4" y="16">{html.escape(title)} ({root["count"]} samples)</text>'
+    ]
+    for x, level, rect_width, node in rects:
+        y = height - (level + 1) * row_height
+        hue = 10 + hash(node['name']) % 40
+        label = html.escape(node['name'])
+        percent = node['count'] / total * 100
+        visible = html.escape(node['name'][:int(rect_width / 7)]) if rect_width > 21 else ''
+        parts.append(
+            f'<g><title>{label} ({node["count"]} samples, {percent:.1f}%)</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{rect_width:.1f}" height="{row_height - 1}" '
+            f'fill="hsl({hue},80%,60%)"/>'
+            f'<text x="{x + 3:.1f}" y="{y + row_height - 4}">{visible}</text></g>'
+        )
+    parts.append('</svg>')
+    return '\n'.join(parts)
+
+
+# Global instance
+profiler = Profiler()
@@ -0,0 +1,236 @@
+"""
+Reminder Delivery for JARVIS
+A small pool of delivery workers between the reminder scheduler and the
+console, notifications and speakers. Reminders that come due together are
+coalesced into one announcement, and one shared TTS engine speaks them in
+turn instead of starting a thread and an engine per alarm.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+
+from logger import get_logger
+
+logger = get_logger('reminders')
+
+try:
+    import winsound
+except ImportError:  # not on Windows
+    winsound = None
+
+
+def reminder_text(task):
+    """A task's text, tolerating payloads without one"""
+    return (task.get('text') if isinstance(task, dict) else None) or 'your scheduled task'
+
+
+def announcement(tasks, max_items=5):
+    """What JARVIS says for a batch of reminders (reading out at most max_items)"""
+    if len(tasks) == 1:
+        return f"Sir, this is a reminder. {reminder_text(tasks[0])}"
+    texts = [reminder_text(task) for task in tasks[:max_items]]
+    if len(tasks) > max_items:
+        texts.append(f"{len(tasks) - max_items} more")
+    return f"Sir, you have {len(tasks)} reminders. " + ". ".join(texts[:-1]) + f". And {texts[-1]}."
+
+
+# ==================== SINKS ====================
+# A sink has deliver(tasks, text): tasks is the coalesced batch, text its announcement
+
+class ConsoleSink:
+    """Log each reminder"""
+
+    def deliver(self, tasks, text):
+        for task in tasks:
+            logger.info("REMINDER: %s", reminder_text(task), extra={'task_id': task.get('id')})
+
+
+class NotificationSink:
+    """Create a reminder notification for each task"""
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    def deliver(self, tasks, text):
+        for task in tasks:
+            notification = self.manager.create_reminder_notification(task)
+            logger.info("Notification created: %s", notification['message'])
+
+
+class AudioSink:
+    """Beep (on Windows) and speak the announcement
+
+    pyttsx3 hands out one engine per driver for the whole process and its run
+    loop is not re-entrant, so announcements from different workers are spoken
+    one at a time.
+    """
+
+    def __init__(self, beeps=3, rate=150, volume=1.0):
+        self.beeps = beeps
+        self.rate = rate
+        self.volume = volume
+        self._engine = None
+        self._lock = threading.Lock()
+
+    def _get_engine(self):
+        """The shared TTS engine (caller holds the lock)"""
+        if self._engine is None:
+            import pyttsx3
+            engine = pyttsx3.init()
+            engine.setProperty('rate', self.rate)
+            engine.setProperty('volume', self.volume)
+            # Try to use a female voice (usually index 1)
+            voices = engine.getProperty('voices')
+            if len(voices) > 1:
+                engine.setProperty('voice', voices[1].id)
+            self._engine = engine
+        return self._engine
+
+    def deliver(self, tasks, text):
+        with self._lock:
+            if winsound:
+                for _ in range(self.beeps):
+                    winsound.Beep(1000, 300)  # 1000 Hz for 300ms
+                    time.sleep(0.2)
+            engine = self._get_engine()
+            engine.say(text)
+            engine.runAndWait()
+
+
+class RecordingSink:
+    """Stand-in audio sink for headless runs: records announcements instead of playing them"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay  # simulated speaking time
+        self.deliveries = []
+        self._lock = threading.Lock()
+
+    def deliver(self, tasks, text):
+        if self.delay:
+            time.sleep(self.delay)
+        with self._lock:
+            self.deliveries.append((tasks, text))
+
+
+# ==================== DELIVERY POOL ====================
+
+class ReminderDelivery:
+    """Deliver reminders to sinks on a bounded pool of worker threads
+
+    One worker at a time collects a batch: it waits for a reminder, then for
+    coalesce_window seconds, and takes everything queued by then. Delivery of
+    batches runs in parallel across workers.
+    """
+
+    def __init__(self, sinks, workers=2, coalesce_window=0.25, max_queue=1000):
+        self.sinks = list(sinks)
+        self.workers = workers
+        self.coalesce_window = coalesce_window
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._collect_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._threads = []
+        self._running = False
+
+        self.submitted = 0
+        self.delivered = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.errors = {}
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self._lags = deque(maxlen=1000)
+
+    def start(self):
+        self._running = True
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'reminder-delivery-{n}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=5):
+        """Stop the workers once the queue is drained (or timeout passes)"""
+        deadline = time.time() + timeout
+        while not self._queue.empty() and time.time() < deadline:
+            time.sleep(0.05)
+        self._running = False
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.time()))
+        self._threads = []
+
+    def submit(self, task):
+        """Queue a reminder; blocks while the queue is full"""
+        self._queue.put((task, time.time()))
+        with self._stats_lock:
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, self._queue.qsize())
+
+    def _collect(self):
+        """Next batch of reminders, or [] if nothing arrived"""
+        with self._collect_lock:
+            try:
+                batch = [self._queue.get(timeout=0.5)]
+            except queue.Empty:
+                return []
+            if self.coalesce_window:
+                time.sleep(self.coalesce_window)
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    return batch
+
+    def _run(self):
+        while self._running or not self._queue.empty():
+            batch = self._collect()
+            if not batch:
+                continue
+            # A bad payload loses its batch, not the worker
+            try:
+                self._deliver(batch)
+            except Exception:
+                with self._stats_lock:
+                    self.errors['batch'] = self.errors.get('batch', 0) + 1
+                logger.exception("Error delivering reminder batch of %d", len(batch))
+
+    def _deliver(self, batch):
+        tasks = [task for task, _ in batch]
+        text = announcement(tasks)
+        for sink in self.sinks:
+            try:
+                sink.deliver(tasks, text)
+            except Exception as e:
+                name = type(sink).__name__
+                with self._stats_lock:
+                    self.errors[name] = self.errors.get(name, 0) + 1
+                logger.error("Error delivering reminder to %s: %s", name, e)
+
+        now = time.time()
+        with self._stats_lock:
+            self.batches += 1
+            self.delivered += len(batch)
+            for _, submitted_at in batch:
+                lag = now - submitted_at
+                self.lag_total += lag
+                self.lag_max = max(self.lag_max, lag)
+                self._lags.append(lag)
+
+    def get_stats(self):
+        """Get queue depth, delivery counters and lag from submit to delivered"""
+        with self._stats_lock:
+            lags = sorted(self._lags)
+            return {
+                'workers': self.workers,
+                'queue_depth': self._queue.qsize(),
+                'max_queue_depth': self.max_depth,
+                'submitted': self.submitted,
+                'delivered': self.delivered,
+                'announcements': self.batches,
+                'coalesced': self.delivered - self.batches,
+                'errors': dict(self.errors),
+                'avg_lag_ms': round(self.lag_total / self.delivered * 1000, 1) if self.delivered else 0.0,
+                'p99_lag_ms': round(lags[int(len(lags) * 0.99)] * 1000, 1) if lags else 0.0,
+                'max_lag_ms': round(self.lag_max * 1000, 1)
+            }
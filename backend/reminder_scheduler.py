@@ -0,0 +1,319 @@
+"""
+Reminder Scheduler for JARVIS
+One timer thread over a min-heap of due times, replacing a scheduler job per
+task. Reminders are written to a persistent queue so they survive restarts and
+are rebuilt at startup; ones that came due while JARVIS was down fire at once.
+
+With several gunicorn workers, only the process holding the lease dispatches.
+The others forward schedules and cancels through the queue and keep trying the
+lease, so one of them takes over if the dispatcher dies.
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from logger import get_logger
+
+logger = get_logger('reminders.scheduler')
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def to_timestamp(when):
+    """Epoch seconds for a datetime (naive = local time) or a number"""
+    if isinstance(when, datetime):
+        return when.timestamp()
+    return float(when)
+
+
+class FileLease:
+    """Exclusive lock on a file, held until release() or the process exits"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def acquire(self):
+        """Try to take the lock without blocking; returns whether it is held"""
+        if self._file:
+            return True
+        lock_file = open(self.path, 'a+')
+        try:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+class ReminderScheduler:
+    """Fire callback(payload) when each reminder comes due
+
+    Rescheduling pushes a new heap entry and cancelling just forgets the key;
+    stale heap entries are skipped when they surface and swept out when they
+    outnumber live ones, so both are O(log n) amortized.
+    """
+
+    def __init__(self, callback, queue=None, lease=None, poll_interval=1.0, missed_after=60.0):
+        """
+        queue: optional persistence (LocalDatabaseService reminder queue API)
+        lease: optional FileLease; without one this process always dispatches
+        poll_interval: how often the dispatcher checks for forwarded changes and
+            followers retry the lease, in seconds
+        missed_after: reminders that fire this many seconds late count as missed
+        """
+        self.callback = callback
+        self.queue = queue
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.missed_after = missed_after
+        self.leader = lease is None
+        self._change_id = 0
+        self._heap = []              # (due_at, seq, key)
+        self._entries = {}           # key -> (due_at, seq, payload) for the live entry
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+        self.fired = 0
+        self.cancelled = 0
+        self.forwarded = 0
+        self.missed = 0
+        self.elections = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self._lags = deque(maxlen=1000)
+
+    # ==================== SCHEDULING ====================
+
+    def schedule(self, key, when, payload=None, persist=True):
+        """Schedule (or reschedule) the reminder for key"""
+        due_at = to_timestamp(when)
+        if not self.leader:
+            self._forward([(key, due_at, payload)])
+            return
+        with self._cond:
+            self._push(key, due_at, payload)
+        if persist and self.queue:
+            self.queue.save_reminder(key, due_at, payload)
+
+    def schedule_many(self, reminders, persist=True):
+        """Schedule an iterable of (key, when, payload) in one go"""
+        rows = [(key, to_timestamp(when), payload) for key, when, payload in reminders]
+        if not self.leader:
+            self._forward(rows)
+            return
+        with self._cond:
+            for key, due_at, payload in rows:
+                self._push(key, due_at, payload, notify=False)
+            self._cond.notify()
+        if persist and self.queue:
+            self.queue.save_reminders(rows)
+
+    def cancel(self, key):
+        """Cancel the reminder for key; returns whether one was pending here"""
+        if not self.leader:
+            if self.queue:
+                self.queue.delete_reminder(key, forward=True)
+                self.forwarded += 1
+            return False
+        with self._cond:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.cancelled += 1
+                self._maybe_compact()
+        if self.queue:
+            self.queue.delete_reminder(key)
+        return entry is not None
+
+    def due_at(self, key):
+        """When the reminder for key is due (epoch seconds), or None"""
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _forward(self, rows):
+        """Hand reminders to the dispatching process through the queue"""
+        if self.queue and rows:
+            self.queue.save_reminders(rows, forward=True)
+            self.forwarded += len(rows)
+
+    def _push(self, key, due_at, payload, notify=True):
+        seq = next(self._seq)
+        self._entries[key] = (due_at, seq, payload)
+        heapq.heappush(self._heap, (due_at, seq, key))
+        self._maybe_compact()
+        # Wake the timer if this is now the earliest reminder
+        if notify and self._heap[0][1] == seq:
+            self._cond.notify()
+
+    def _maybe_compact(self):
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._entries):
+            self._heap = [(due_at, seq, key) for key, (due_at, seq, _) in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    # ==================== TIMER THREAD ====================
+
+    def start(self):
+        """Rebuild from the persistent queue (if dispatching) and start the timer thread"""
+        self._running = True
+        if not self.leader:
+            self._elect()
+        elif self.queue:
+            self._restore()
+        self._thread = threading.Thread(target=self._run, name='reminder-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self.lease and self.leader:
+            self.lease.release()
+            self.leader = False
+
+    def _elect(self):
+        """Try to become the dispatching process; returns whether this one is"""
+        if not self.lease.acquire():
+            return False
+        # Every change up to here is already reflected in the reminders table
+        self._change_id = self.queue.last_reminder_change() if self.queue else 0
+        if self.queue:
+            self._restore()
+        self.leader = True
+        self.elections += 1
+        logger.info("Reminder dispatch running in process %s", os.getpid())
+        return True
+
+    def _restore(self):
+        rows = self.queue.get_reminders()
+        with self._cond:
+            for key, due_at, payload in rows:
+                self._push(key, due_at, payload, notify=False)
+        if rows:
+            logger.info("Restored %d reminders", len(rows))
+
+    def _pull_changes(self):
+        """Apply schedules and cancels forwarded by other processes"""
+        changes = self.queue.get_reminder_changes(self._change_id)
+        if not changes:
+            return
+        with self._cond:
+            for change_id, key, due_at, payload in changes:
+                if due_at is None:
+                    if self._entries.pop(key, None) is not None:
+                        self.cancelled += 1
+                else:
+                    self._push(key, due_at, payload, notify=False)
+            self._maybe_compact()
+        self._change_id = changes[-1][0]
+        self.queue.prune_reminder_changes(self._change_id)
+
+    def pop_due(self, now=None):
+        """Remove and return [(key, due_at, payload)] for every reminder due by now"""
+        now = time.time() if now is None else now
+        due = []
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                due_at, seq, key = heapq.heappop(self._heap)
+                entry = self._entries.get(key)
+                if entry is None or entry[1] != seq:
+                    continue  # cancelled or rescheduled
+                del self._entries[key]
+                due.append((key, due_at, entry[2]))
+        return due
+
+    def _run(self):
+        # Only poll when other processes may forward changes or take the lease
+        poll = self.poll_interval if self.lease else None
+        while True:
+            if not self.leader and not self._elect():
+                with self._cond:
+                    if self._running:
+                        self._cond.wait(poll)
+                    if not self._running:
+                        return
+                continue
+
+            if self.lease and self.queue:
+                self._pull_changes()
+
+            with self._cond:
+                # Drop stale entries so the wait is for a live reminder
+                while self._heap and self._entries.get(self._heap[0][2], (None, None))[1] != self._heap[0][1]:
+                    heapq.heappop(self._heap)
+                if self._running and not (self._heap and self._heap[0][0] <= time.time()):
+                    timeout = self._heap[0][0] - time.time() if self._heap else None
+                    if poll is not None:
+                        timeout = poll if timeout is None else min(timeout, poll)
+                    self._cond.wait(timeout)
+                if not self._running:
+                    return
+
+            for key, due_at, payload in self.pop_due():
+                self._fire(key, due_at, payload)
+
+    def _fire(self, key, due_at, payload):
+        lag = max(0.0, time.time() - due_at)
+        self.fired += 1
+        self.lag_total += lag
+        self.lag_max = max(self.lag_max, lag)
+        self._lags.append(lag)
+        if lag > self.missed_after:
+            self.missed += 1
+        if self.queue:
+            self.queue.delete_reminder(key, due_at=due_at)
+        try:
+            self.callback(payload)
+        except Exception as e:
+            logger.error("Error sending reminder %s: %s", key, e)
+
+    def get_stats(self):
+        """Get dispatch role, pending count, counters and firing lag"""
+        lags = sorted(self._lags)
+        return {
+            'role': 'dispatcher' if self.leader else 'follower',
+            'pid': os.getpid(),
+            'pending': len(self._entries),
+            'heap_size': len(self._heap),
+            'fired': self.fired,
+            'cancelled': self.cancelled,
+            'forwarded': self.forwarded,
+            'missed': self.missed,
+            'elections': self.elections,
+            'avg_lag_ms': round(self.lag_total / self.fired * 1000, 1) if self.fired else 0.0,
+            'p99_lag_ms': round(lags[int(len(lags) * 0.99)] * 1000, 1) if lags else 0.0,
+            'max_lag_ms': round(self.lag_max * 1000, 1)
+        }
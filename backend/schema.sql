@@ -32,6 +32,7 @@ CREATE TABLE IF NOT EXISTS tasks (
 CREATE INDEX IF NOT EXISTS idx_tasks_user_id ON tasks(user_id);
 CREATE INDEX IF NOT EXISTS idx_tasks_scheduled_for ON tasks(scheduled_for);
 CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks(completed);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_created ON tasks(user_id, created_at, id);
 
 -- ==================== NOTES TABLE ====================
 CREATE TABLE IF NOT EXISTS notes (
@@ -47,6 +48,7 @@ CREATE TABLE IF NOT EXISTS notes (
 -- Indexes for faster queries
 CREATE INDEX IF NOT EXISTS idx_notes_user_id ON notes(user_id);
 CREATE INDEX IF NOT EXISTS idx_notes_category ON notes(category);
+CREATE INDEX IF NOT EXISTS idx_notes_user_created ON notes(user_id, created_at, id);
 
 -- ==================== CALENDAR EVENTS TABLE ====================
 CREATE TABLE IF NOT EXISTS calendar_events (
@@ -66,6 +68,7 @@ CREATE TABLE IF NOT EXISTS calendar_events (
 -- Indexes for faster queries
 CREATE INDEX IF NOT EXISTS idx_events_user_id ON calendar_events(user_id);
 CREATE INDEX IF NOT EXISTS idx_events_start_time ON calendar_events(start_time);
+CREATE INDEX IF NOT EXISTS idx_events_user_start ON calendar_events(user_id, start_time, id);
 
 -- ==================== USER PREFERENCES TABLE ====================
 CREATE TABLE IF NOT EXISTS user_preferences (
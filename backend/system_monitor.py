@@ -0,0 +1,118 @@
+"""
+System Monitor for JARVIS
+Samples CPU, memory, disk, network and this process's own usage on a
+background thread into a ring buffer, so status requests read the latest
+snapshot instead of blocking a worker in psutil.cpu_percent(interval=1).
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from itertools import islice
+
+from logger import get_logger
+
+logger = get_logger('system')
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class SystemMonitor:
+    """Keep the last `history` samples, taken every `interval` seconds"""
+
+    def __init__(self, interval=2.0, history=300, disk_path='/'):
+        self.interval = interval
+        self.disk_path = disk_path
+        self._samples = deque(maxlen=history)
+        self._latest = None
+        self._previous_io = None   # (time, disk counters, net counters) for rates
+        self._process = psutil.Process() if psutil else None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread or not psutil:
+            return
+        # cpu_percent(None) measures from the previous call, so prime both counters
+        psutil.cpu_percent(interval=None)
+        self._process.cpu_percent(interval=None)
+        self._previous_io = (time.monotonic(), psutil.disk_io_counters(), psutil.net_io_counters())
+        self._thread = threading.Thread(target=self._run, name='system-monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def latest(self):
+        """Most recent sample, or None before the first one"""
+        return self._latest
+
+    def history(self, count):
+        """Up to count most recent samples, oldest first"""
+        samples = list(islice(reversed(self._samples), max(0, count)))
+        samples.reverse()
+        return samples
+
+    def _run(self):
+        while not self._stop.wait(self.interval if self._latest else 0.1):
+            try:
+                self._record(self.sample())
+            except Exception as e:
+                logger.error("Error sampling system status: %s", e)
+
+    def _record(self, sample):
+        self._samples.append(sample)
+        self._latest = sample
+
+    def sample(self):
+        """Take one sample now (rates are since the previous sample)"""
+        now = time.monotonic()
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage(self.disk_path)
+        disk_io = psutil.disk_io_counters()
+        net_io = psutil.net_io_counters()
+
+        def rate(previous, current, field):
+            if previous is None or current is None:
+                return 0.0
+            return round((getattr(current, field) - getattr(previous, field)) / max(now - self._previous_io[0], 1e-6), 1)
+
+        _, previous_disk, previous_net = self._previous_io
+        with self._process.oneshot():
+            process = {
+                'pid': self._process.pid,
+                'cpu': self._process.cpu_percent(interval=None),
+                'memory_rss': self._process.memory_info().rss,
+                'threads': self._process.num_threads()
+            }
+        sample = {
+            'timestamp': datetime.now().isoformat(),
+            'cpu': psutil.cpu_percent(interval=None),
+            'cpu_count': os.cpu_count(),
+            'memory': memory.percent,
+            'memory_used': memory.used,
+            'memory_total': memory.total,
+            'disk': disk.percent,
+            'disk_read_bps': rate(previous_disk, disk_io, 'read_bytes'),
+            'disk_write_bps': rate(previous_disk, disk_io, 'write_bytes'),
+            'net_sent_bps': rate(previous_net, net_io, 'bytes_sent'),
+            'net_recv_bps': rate(previous_net, net_io, 'bytes_recv'),
+            'process': process
+        }
+        self._previous_io = (now, disk_io, net_io)
+        return sample
+
+
+# Global instance (started by the app)
+system_monitor = SystemMonitor(
+    interval=float(os.getenv('SYSTEM_MONITOR_INTERVAL', '2')),
+    history=int(os.getenv('SYSTEM_MONITOR_HISTORY', '300'))
+)
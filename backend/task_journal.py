@@ -0,0 +1,202 @@
+"""
+Task Journal for JARVIS
+Append-only write-ahead log of task mutations on top of the tasks.json snapshot.
+Each create/update/delete is one JSON line; fsyncs are shared between concurrent
+writers (group commit) and the log is periodically compacted into the snapshot.
+
+Replaying a record is idempotent (creates replace, updates set fields, deletes
+ignore missing ids), so a crash between writing a new snapshot and truncating
+the log is harmless.
+"""
+
+import json
+import os
+import threading
+
+from logger import get_logger
+
+logger = get_logger('tasks.journal')
+
+
+class TaskJournal:
+    """Snapshot + append-only log persistence for file-backed tasks"""
+
+    def __init__(self, snapshot_path='tasks.json', journal_path=None, sync_interval=0.0, compact_every=10000):
+        """sync_interval 0 makes every append durable before it returns (with
+        concurrent appends sharing one fsync); a positive interval returns
+        immediately and fsyncs in the background at most that many seconds later
+        """
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or f'{snapshot_path}.log'
+        self.sync_interval = sync_interval
+        self.compact_every = compact_every
+
+        self.records = 0          # records in the log since the last compaction
+        self.appended = 0         # sequence number of the last appended record
+        self.synced = 0           # sequence number covered by the last fsync
+        self.fsyncs = 0
+        self.compactions = 0
+
+        self._lock = threading.Lock()       # guards the log file and sequence numbers
+        self._sync_lock = threading.Lock()  # held by whichever writer is fsyncing for the group
+        self._file = None
+        self._closed = threading.Event()
+        self._flusher = None
+
+    def load(self):
+        """Read the snapshot and replay the log; returns (tasks, counter)"""
+        tasks = {}
+        counter = 1
+        try:
+            with open(self.snapshot_path, 'r') as f:
+                data = json.load(f)
+            for task in data.get('tasks', []):
+                tasks[task['id']] = task
+            counter = data.get('counter', 1)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            self._open()
+            raise
+
+        replayed = 0
+        try:
+            with open(self.journal_path, 'rb+') as f:
+                valid = 0
+                for line in f:
+                    try:
+                        if not line.endswith(b'\n'):
+                            raise ValueError('unterminated record')
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn final record from a crash mid-append - cut it off so new
+                        # records don't get glued onto it; everything before it is intact
+                        logger.warning("Discarding incomplete record at end of %s", self.journal_path)
+                        f.truncate(valid)
+                        break
+                    counter = self._apply(tasks, record, counter)
+                    valid += len(line)
+                    replayed += 1
+        except FileNotFoundError:
+            pass
+        finally:
+            self.records = replayed
+            self._open()
+        return list(tasks.values()), counter
+
+    def append(self, record, sync=True):
+        """Append a mutation record ({'op': 'create'|'update'|'delete', ...}); returns its sequence number
+
+        Pass sync=False to append while holding a caller's lock and call
+        sync(sequence) after releasing it, so the fsync can be shared.
+        """
+        line = json.dumps(record, default=str) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self.appended += 1
+            self.records += 1
+            sequence = self.appended
+
+        if sync:
+            self.sync(sequence)
+        return sequence
+
+    def log_create(self, task, counter, sync=True):
+        return self.append({'op': 'create', 'task': task, 'counter': counter}, sync)
+
+    def log_update(self, task_id, updates, sync=True):
+        return self.append({'op': 'update', 'id': task_id, 'updates': updates}, sync)
+
+    def log_delete(self, task_id, sync=True):
+        return self.append({'op': 'delete', 'id': task_id}, sync)
+
+    def sync(self, sequence):
+        """Wait until the record with this sequence number is durable (no-op in background sync mode)"""
+        if self.sync_interval <= 0:
+            self._sync(sequence)
+
+    def needs_compaction(self):
+        return self.records >= self.compact_every
+
+    def compact(self, tasks, counter):
+        """Write a new snapshot atomically and start an empty log"""
+        with self._sync_lock, self._lock:
+            temp_path = f'{self.snapshot_path}.tmp'
+            with open(temp_path, 'w') as f:
+                json.dump({'tasks': tasks, 'counter': counter}, f, default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.snapshot_path)
+
+            if self._file:
+                self._file.close()
+            self._file = open(self.journal_path, 'w')
+            self._fsync_file()
+            self.synced = self.appended
+            self.records = 0
+            self.compactions += 1
+
+    def flush(self):
+        """Make every appended record durable"""
+        self._sync(self.appended)
+
+    def close(self):
+        self._closed.set()
+        if self._file:
+            self.flush()
+            with self._lock:
+                self._file.close()
+                self._file = None
+
+    def get_stats(self):
+        return {
+            'records_since_compaction': self.records,
+            'appended': self.appended,
+            'fsyncs': self.fsyncs,
+            'compactions': self.compactions
+        }
+
+    def _open(self):
+        self._file = open(self.journal_path, 'a')
+        if self.sync_interval > 0 and self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flusher.start()
+
+    def _sync(self, sequence):
+        """Group commit: one writer fsyncs for everything appended so far, the rest just wait"""
+        with self._sync_lock:
+            if self.synced >= sequence:
+                return
+            with self._lock:
+                if self._file is None:
+                    return
+                self._file.flush()
+                target = self.appended
+            self._fsync_file()
+            self.synced = target
+
+    def _fsync_file(self):
+        os.fsync(self._file.fileno())
+        self.fsyncs += 1
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.sync_interval):
+            try:
+                self._sync(self.appended)
+            except Exception as e:
+                logger.error("Error syncing task journal: %s", e)
+
+    @staticmethod
+    def _apply(tasks, record, counter):
+        op = record.get('op')
+        if op == 'create':
+            task = record['task']
+            tasks[task['id']] = task
+            counter = max(counter, record.get('counter', counter))
+        elif op == 'update':
+            task = tasks.get(record['id'])
+            if task is not None:
+                task.update(record['updates'])
+        elif op == 'delete':
+            tasks.pop(record['id'], None)
+        return counter
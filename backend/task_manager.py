@@ -1,76 +1,137 @@
-import json
-import re
+import os
+import threading
 from datetime import datetime, timedelta
-from dateutil import parser
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.date import DateTrigger
-from database import db
+from database import db, write_buffer
+from local_database import local_db
+from task_store import TaskStore, parse_scheduled_for
+from reminder_scheduler import FileLease, ReminderScheduler
+from reminder_delivery import AudioSink, ConsoleSink, NotificationSink, ReminderDelivery
+from task_journal import TaskJournal
+from time_parser import parse_task_command
+from metrics import DEPENDENCY_LATENCY
+from tracing import span
+from logger import get_logger
+from pagination import LIST_COLUMNS, clamp_limit, decode_cursor, parse_fields, page_result
 from notification_manager import notification_manager
 
+logger = get_logger('tasks')
+
+class TaskStoreError(Exception):
+    """Raised when a logged-in user's task could not be saved"""
+
+# File tasks use camelCase keys; listing accepts the database column names for them
+FILE_TASK_KEYS = {'created_at': 'createdAt', 'scheduled_for': 'scheduledFor', 'user_id': 'userId'}
+
 class TaskManager:
     """Manages tasks, reminders, and scheduling"""
     
     def __init__(self, user_id=None):
         self.user_id = user_id  # Current user ID (if logged in)
-        self.tasks = []
+        self.store = TaskStore()
         self.task_id_counter = 1
-        self.scheduler = BackgroundScheduler()
-        self.scheduler.start()
+        sinks = [ConsoleSink(), NotificationSink(notification_manager)]
+        if os.getenv('REMINDER_AUDIO', '1') != '0':
+            sinks.append(AudioSink())
+        self.delivery = ReminderDelivery(
+            sinks,
+            workers=int(os.getenv('REMINDER_DELIVERY_WORKERS', '2')),
+            coalesce_window=float(os.getenv('REMINDER_COALESCE_WINDOW', '0.25'))
+        )
+        # One process dispatches reminders; other gunicorn workers forward to it
+        self.scheduler = ReminderScheduler(
+            self._send_reminder,
+            queue=local_db,
+            lease=FileLease(os.getenv('REMINDER_LOCK_PATH', local_db.path + '.reminders.lock')),
+            poll_interval=float(os.getenv('REMINDER_POLL_INTERVAL', '1')),
+            missed_after=float(os.getenv('REMINDER_MISSED_AFTER', '60'))
+        )
         self.tasks_file = 'tasks.json'
+        self.journal = TaskJournal(
+            self.tasks_file,
+            sync_interval=float(os.getenv('TASK_JOURNAL_SYNC_INTERVAL', '0')),
+            compact_every=int(os.getenv('TASK_JOURNAL_COMPACT_EVERY', '10000'))
+        )
+        self._write_lock = threading.Lock()
         self._load_tasks()
+        self._start_reminders()
+    
+    def _start_reminders(self):
+        """Restore persisted reminders and schedule any upcoming file tasks missing from the queue"""
+        self.delivery.start()
+        self.scheduler.start()
+        if not self.scheduler.leader:
+            return  # the dispatching process back-fills its own
+        now = datetime.now()
+        missing = [
+            (f"task_{task['id']}", self.store.scheduled_at(task['id']), task)
+            for task in self.store.upcoming(now, datetime.max)
+            if f"task_{task['id']}" not in self.scheduler
+        ]
+        if missing:
+            self.scheduler.schedule_many(missing)
     
     def _load_tasks(self):
-        """Load tasks from file"""
+        """Load tasks from the snapshot file and replay the journal"""
         try:
-            with open(self.tasks_file, 'r') as f:
-                data = json.load(f)
-                self.tasks = data.get('tasks', [])
-                self.task_id_counter = data.get('counter', 1)
-        except FileNotFoundError:
-            self.tasks = []
-            self.task_id_counter = 1
+            tasks, self.task_id_counter = self.journal.load()
+            self.store.load(tasks)
         except Exception as e:
-            print(f"Error loading tasks: {e}")
-            self.tasks = []
+            logger.error("Error loading tasks: %s", e)
+            self.store.load([])
             self.task_id_counter = 1
     
     def _save_tasks(self):
-        """Save tasks to file"""
+        """Compact the journal into a fresh snapshot file"""
+        try:
+            self.journal.compact(self.store.all(all_users=True), self.task_id_counter)
+        except Exception as e:
+            logger.error("Error saving tasks: %s", e)
+    
+    def _commit(self, sequence):
+        """Wait for a journaled change to be durable, compacting the journal once it has grown"""
         try:
-            with open(self.tasks_file, 'w') as f:
-                json.dump({
-                    'tasks': self.tasks,
-                    'counter': self.task_id_counter
-                }, f, indent=2, default=str)
+            self.journal.sync(sequence)
         except Exception as e:
-            print(f"Error saving tasks: {e}")
+            logger.error("Error saving tasks: %s", e)
+        
+        if self.journal.needs_compaction():
+            with self._write_lock:
+                if self.journal.needs_compaction():
+                    self._save_tasks()
     
     def create_task(self, text, scheduled_for=None, user_id=None):
         """Create a new task"""
         # Use provided user_id or instance user_id
         uid = user_id or self.user_id
         
-        # Try database first if user is logged in
-        if uid and db.is_connected():
-            task = db.create_task(uid, text, scheduled_for)
-            if task:
-                # Schedule reminder if scheduled_for is provided
-                if scheduled_for:
-                    self._schedule_reminder(task)
-                return task
+        # Logged-in users keep their tasks in Supabase, or the local database without it.
+        # get_all_tasks only reads from there, so a failed insert must not land in the file store.
+        if uid:
+            database = db if db.is_connected() else local_db
+            task = database.create_task(uid, text, scheduled_for)
+            if not task:
+                raise TaskStoreError(f"Could not save task for user {uid}")
+            
+            # Schedule reminder if scheduled_for is provided
+            if scheduled_for:
+                self._schedule_reminder(task)
+            return task
         
         # Fallback to file storage
-        task = {
-            'id': self.task_id_counter,
-            'text': text,
-            'completed': False,
-            'createdAt': datetime.now().isoformat(),
-            'scheduledFor': scheduled_for
-        }
-        
-        self.tasks.append(task)
-        self.task_id_counter += 1
-        self._save_tasks()
+        with self._write_lock:
+            task = {
+                'id': self.task_id_counter,
+                'text': text,
+                'completed': False,
+                'createdAt': datetime.now().isoformat(),
+                'scheduledFor': scheduled_for,
+                'userId': uid
+            }
+            
+            self.store.add(task)
+            self.task_id_counter += 1
+            sequence = self.journal.log_create(task, self.task_id_counter, sync=False)
+        self._commit(sequence)
         
         # Schedule reminder if scheduled_for is provided
         if scheduled_for:
@@ -89,280 +150,151 @@ class TaskManager:
     
     def _parse_task_command(self, command):
         """Parse a natural language task command"""
-        command_lower = command.lower()
-        
-        # Enhanced time patterns (more comprehensive)
-        time_patterns = [
-            (r'at (\d{1,2}):(\d{2})\s*(am|pm)?', 'time'),
-            (r'at (\d{1,2})\s*(am|pm)', 'time'),
-            (r'(\d{1,2}):(\d{2})\s*(am|pm)', 'time'),  # Without "at"
-            (r'(\d{1,2})\s*(am|pm)', 'time'),  # Without "at"
-            (r'in (\d+)\s*(second|minute|hour|day)s?', 'relative'),
-            (r'after (\d+)\s*(second|minute|hour|day)s?', 'relative'),
-            (r'tomorrow\s+at\s+(\d{1,2}):?(\d{2})?\s*(am|pm)?', 'tomorrow_time'),
-            (r'tomorrow', 'tomorrow'),
-            (r'next (monday|tuesday|wednesday|thursday|friday|saturday|sunday)', 'day_of_week'),
-            (r'(today|tonight)', 'today')
-        ]
-        
-        scheduled_time = None
-        time_match = None
-        
-        # Find time in command
-        for pattern, time_type in time_patterns:
-            match = re.search(pattern, command_lower)
-            if match:
-                time_match = match
-                scheduled_time = self._parse_time(match, time_type)
-                break
-        
-        # Extract task text (remove time-related parts and trigger phrases)
-        task_text = command
-        if time_match:
-            # Remove the time portion
-            task_text = command[:time_match.start()] + command[time_match.end():]
-        
-        # Remove common trigger phrases more intelligently
-        trigger_patterns = [
-            r'^remind me to\s+',
-            r'^remind me\s+',
-            r'^set a reminder to\s+',
-            r'^set a reminder for\s+',
-            r'^set reminder to\s+',
-            r'^create a task to\s+',
-            r'^create task to\s+',
-            r'^add a task to\s+',
-            r'^add task to\s+',
-            r'^schedule\s+',
-            r'^task:\s+',
-            r'^task\s+',
-            r'\s+for me$',
-            r'\s+please$'
-        ]
-        
-        for pattern in trigger_patterns:
-            task_text = re.sub(pattern, '', task_text, flags=re.IGNORECASE)
-        
-        # Clean up extra whitespace
-        task_text = ' '.join(task_text.split())
-        task_text = task_text.strip()
-        
-        # Capitalize first letter
-        if task_text:
-            task_text = task_text[0].upper() + task_text[1:]
-        
+        with DEPENDENCY_LATENCY.time('parser', 'parse_task_command'):
+            task_text, scheduled_time = parse_task_command(command)
         return task_text, scheduled_time.isoformat() if scheduled_time else None
     
-    def _parse_time(self, match, time_type):
-        """Parse time from regex match"""
-        now = datetime.now()
-        
-        if time_type == 'time':
-            # Parse specific time
-            if len(match.groups()) == 3:  # HH:MM AM/PM
-                hour = int(match.group(1))
-                minute = int(match.group(2))
-                period = match.group(3)
-                
-                if period and period.lower() == 'pm' and hour != 12:
-                    hour += 12
-                elif period and period.lower() == 'am' and hour == 12:
-                    hour = 0
-            else:  # HH AM/PM
-                hour = int(match.group(1))
-                minute = 0
-                period = match.group(2)
-                
-                if period.lower() == 'pm' and hour != 12:
-                    hour += 12
-                elif period.lower() == 'am' and hour == 12:
-                    hour = 0
-            
-            scheduled = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-            
-            # If time has passed today, schedule for tomorrow
-            if scheduled < now:
-                scheduled += timedelta(days=1)
-            
-            return scheduled
-        
-        elif time_type == 'relative':
-            # Parse relative time
-            amount = int(match.group(1))
-            unit = match.group(2)
-            
-            if 'second' in unit:
-                return now + timedelta(seconds=amount)
-            elif 'minute' in unit:
-                return now + timedelta(minutes=amount)
-            elif 'hour' in unit:
-                return now + timedelta(hours=amount)
-            elif 'day' in unit:
-                return now + timedelta(days=amount)
-        
-        elif time_type == 'tomorrow':
-            # Tomorrow at 9 AM
-            tomorrow = now + timedelta(days=1)
-            return tomorrow.replace(hour=9, minute=0, second=0, microsecond=0)
-        
-        elif time_type == 'tomorrow_time':
-            # Tomorrow at specific time
-            tomorrow = now + timedelta(days=1)
-            hour = int(match.group(1))
-            minute = int(match.group(2)) if match.group(2) else 0
-            period = match.group(3)
-            
-            if period and period.lower() == 'pm' and hour != 12:
-                hour += 12
-            elif period and period.lower() == 'am' and hour == 12:
-                hour = 0
-            
-            return tomorrow.replace(hour=hour, minute=minute, second=0, microsecond=0)
-        
-        elif time_type == 'today':
-            # Today/tonight - default to current time + 1 hour
-            return now + timedelta(hours=1)
-        
-        elif time_type == 'day_of_week':
-            # Next specific day of week
-            day_name = match.group(1)
-            days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-            target_day = days.index(day_name)
-            current_day = now.weekday()
-            
-            days_ahead = target_day - current_day
-            if days_ahead <= 0:
-                days_ahead += 7
-            
-            target_date = now + timedelta(days=days_ahead)
-            return target_date.replace(hour=9, minute=0, second=0, microsecond=0)
-        
-        return None
-    
     def _schedule_reminder(self, task):
         """Schedule a reminder for a task"""
         try:
-            scheduled_time = parser.parse(task['scheduledFor'])
+            scheduled_time = parse_scheduled_for(task.get('scheduledFor') or task.get('scheduled_for'))
+            if scheduled_time is None:
+                raise ValueError(f"unrecognised time {task.get('scheduledFor') or task.get('scheduled_for')!r}")
             
-            self.scheduler.add_job(
-                func=self._send_reminder,
-                trigger=DateTrigger(run_date=scheduled_time),
-                args=[task],
-                id=f"task_{task['id']}"
-            )
+            self.scheduler.schedule(f"task_{task['id']}", scheduled_time, task)
         except Exception as e:
-            print(f"Error scheduling reminder: {e}")
+            logger.error("Error scheduling reminder: %s", e)
+    
+    def _reschedule_reminder(self, task_id, task, updates):
+        """Keep a task's reminder in step with an update"""
+        if updates.get('completed'):
+            self.scheduler.cancel(f"task_{task_id}")
+        elif 'scheduledFor' in updates or 'scheduled_for' in updates:
+            if updates.get('scheduledFor') or updates.get('scheduled_for'):
+                # The reminder payload is the whole task, whatever the update returned
+                task = dict(self._current_task(task_id) or task)
+                task.update(updates, id=task_id)
+                self._schedule_reminder(task)
+            else:
+                self.scheduler.cancel(f"task_{task_id}")
+    
+    def _current_task(self, task_id):
+        """Read a task from the store that owns it (string ids live in a database)"""
+        if not isinstance(task_id, str):
+            return self.store.get(task_id)
+        if db.is_connected():
+            return db.get_task(task_id)
+        return local_db.get_task(task_id)
     
     def _send_reminder(self, task):
         """Send a reminder for a task"""
-        print(f"🔔 REMINDER: {task['text']}")
-        
-        # Create notification
-        notification = notification_manager.create_reminder_notification(task)
-        print(f"✅ Notification created: {notification['message']}")
-        
-        # Play alarm sound and speak reminder
-        self._play_alarm_and_speak(task)
-    
-    def _play_alarm_and_speak(self, task):
-        """Play alarm sound and speak the reminder"""
-        try:
-            import pyttsx3
-            import winsound
-            import threading
-            
-            def alarm_thread():
-                try:
-                    # Play Windows system beep (frequency, duration in ms)
-                    # Play 3 beeps for attention
-                    for _ in range(3):
-                        winsound.Beep(1000, 300)  # 1000 Hz for 300ms
-                        import time
-                        time.sleep(0.2)
-                    
-                    # Speak the reminder
-                    engine = pyttsx3.init()
-                    engine.setProperty('rate', 150)  # Speed
-                    engine.setProperty('volume', 1.0)  # Max volume
-                    
-                    # Get available voices
-                    voices = engine.getProperty('voices')
-                    # Try to use a female voice (usually index 1)
-                    if len(voices) > 1:
-                        engine.setProperty('voice', voices[1].id)
-                    
-                    # Speak the reminder
-                    reminder_text = f"Sir, this is a reminder. {task['text']}"
-                    engine.say(reminder_text)
-                    engine.runAndWait()
-                    
-                except Exception as e:
-                    print(f"Error playing alarm: {e}")
-            
-            # Run alarm in separate thread to not block scheduler
-            thread = threading.Thread(target=alarm_thread, daemon=True)
-            thread.start()
-            
-        except Exception as e:
-            print(f"Error in alarm system: {e}")
+        # The task may have been edited since the reminder was queued
+        task = self._current_task(task.get('id')) or task
+        self.delivery.submit(task)
     
     def get_all_tasks(self, user_id=None):
         """Get all tasks"""
         # Use provided user_id or instance user_id
         uid = user_id or self.user_id
         
-        # Try database first if user is logged in
+        with span('tasks.get_all_tasks'):
+            # Try database first if user is logged in
+            if uid and db.is_connected():
+                return db.get_user_tasks(uid)
+            
+            if uid:
+                return local_db.get_user_tasks(uid)
+            
+            # Fallback to file storage
+            return self.store.all(uid)
+    
+    def get_tasks_page(self, user_id=None, limit=None, cursor=None, fields=None):
+        """Get one page of tasks, newest first: {'items': [...], 'next_cursor': str or None}
+        
+        Raises ValueError for a malformed cursor or unknown fields.
+        """
+        uid = user_id or self.user_id
+        
         if uid and db.is_connected():
-            return db.get_user_tasks(uid)
+            return db.get_user_tasks_page(uid, limit, cursor, fields)
         
-        # Fallback to file storage
-        return self.tasks
+        if uid:
+            return local_db.get_user_tasks_page(uid, limit, cursor, fields)
+        
+        # File storage pages on the task id, which increases with creation time
+        limit = clamp_limit(limit)
+        columns = parse_fields(fields, LIST_COLUMNS['tasks'], required=('id',))
+        before_id = int(decode_cursor(cursor, size=1)[0]) if cursor else None
+        tasks = self.store.page(uid, limit + 1, before_id)
+        if columns:
+            keys = [FILE_TASK_KEYS.get(column, column) for column in columns]
+            tasks = [{key: task.get(key) for key in keys} for task in tasks]
+        return page_result(tasks, limit, lambda task: (task['id'],))
     
     def get_task(self, task_id):
         """Get a specific task"""
-        for task in self.tasks:
-            if task['id'] == task_id:
-                return task
-        return None
+        return self.store.get(task_id)
     
     def update_task(self, task_id, updates):
         """Update a task"""
-        # Try database first
-        if db.is_connected():
-            task = db.update_task(task_id, updates)
+        # Try database first (Supabase ids are strings; integer ids are file tasks)
+        if db.is_connected() and isinstance(task_id, str):
+            if write_buffer:
+                # The cached row as it will read after the flush; without one, just the changed fields
+                # (reminders load the full task themselves)
+                task = write_buffer.update_task(task_id, updates) or dict(updates, id=task_id)
+            else:
+                task = db.update_task(task_id, updates)
             if task:
+                self._reschedule_reminder(task_id, task, updates)
                 return task
         
+        # Local database tasks have string ids, file tasks have integer ids
+        if isinstance(task_id, str):
+            task = local_db.update_task(task_id, updates)
+            if task:
+                self._reschedule_reminder(task_id, task, updates)
+            return task
+        
         # Fallback to file storage
-        for i, task in enumerate(self.tasks):
-            if task['id'] == task_id:
-                self.tasks[i].update(updates)
-                self._save_tasks()
-                return self.tasks[i]
-        return None
+        with self._write_lock:
+            task = self.store.update(task_id, updates)
+            if task:
+                sequence = self.journal.log_update(task_id, updates, sync=False)
+        if task:
+            self._commit(sequence)
+            self._reschedule_reminder(task_id, task, updates)
+        return task
     
     def delete_task(self, task_id):
         """Delete a task"""
-        # Try database first
-        if db.is_connected():
-            success = db.delete_task(task_id)
+        # Try database first (Supabase ids are strings; integer ids are file tasks)
+        if db.is_connected() and isinstance(task_id, str):
+            if write_buffer:
+                write_buffer.delete_task(task_id)
+                success = True
+            else:
+                success = db.delete_task(task_id)
             if success:
                 # Remove scheduled reminder
-                try:
-                    self.scheduler.remove_job(f"task_{task_id}")
-                except:
-                    pass
+                self.scheduler.cancel(f"task_{task_id}")
                 return True
         
+        if isinstance(task_id, str):
+            local_db.delete_task(task_id)
+            self.scheduler.cancel(f"task_{task_id}")
+            return True
+        
         # Fallback to file storage
-        self.tasks = [task for task in self.tasks if task['id'] != task_id]
-        self._save_tasks()
+        with self._write_lock:
+            removed = self.store.remove(task_id)
+            if removed:
+                sequence = self.journal.log_delete(task_id, sync=False)
+        if removed:
+            self._commit(sequence)
         
         # Remove scheduled reminder
-        try:
-            self.scheduler.remove_job(f"task_{task_id}")
-        except:
-            pass
+        self.scheduler.cancel(f"task_{task_id}")
         return True
     
     def get_upcoming_tasks(self, hours=24):
@@ -370,15 +302,14 @@ class TaskManager:
         now = datetime.now()
         cutoff = now + timedelta(hours=hours)
         
-        upcoming = []
-        for task in self.tasks:
-            if task.get('scheduledFor') and not task['completed']:
-                scheduled = parser.parse(task['scheduledFor'])
-                if now <= scheduled <= cutoff:
-                    upcoming.append(task)
-        
-        return sorted(upcoming, key=lambda x: x['scheduledFor'])
+        return self.store.upcoming(now, cutoff)
     
     def cleanup(self):
         """Cleanup resources"""
-        self.scheduler.shutdown()
+        self.scheduler.stop()
+        self.delivery.stop()
+        if write_buffer:
+            write_buffer.flush()
+        with self._write_lock:
+            self._save_tasks()
+        self.journal.close()
@@ -0,0 +1,169 @@
+"""
+Indexed in-memory task store for JARVIS
+O(1) lookups by id, per-user partitions and a sorted index over scheduled
+times so upcoming-window queries cost O(log n + k)
+"""
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from datetime import datetime
+
+from dateutil import parser
+
+
+def parse_scheduled_for(value):
+    """Parse a scheduledFor value into a naive local datetime, or None"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            try:
+                parsed = parser.parse(value)
+            except (TypeError, ValueError, OverflowError):
+                return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+class TaskStore:
+    """Tasks keyed by id, partitioned by user, with a sorted scheduled-time index"""
+
+    def __init__(self, tasks=None):
+        self._tasks = {}                      # id -> task, in creation order
+        self._by_user = defaultdict(dict)     # userId -> {id: task}
+        self._user_ids = defaultdict(list)    # userId -> sorted [id], for paging
+        self._time_index = []                 # sorted [(scheduled datetime, id)]
+        self._scheduled = {}                  # id -> scheduled datetime in the index
+        self._lock = threading.RLock()
+        if tasks:
+            self.load(tasks)
+
+    def load(self, tasks):
+        """Replace the contents of the store, building all indexes in one pass"""
+        with self._lock:
+            self._tasks = {}
+            self._by_user = defaultdict(dict)
+            self._user_ids = defaultdict(list)
+            self._scheduled = {}
+            for task in tasks:
+                self._tasks[task['id']] = task
+                self._by_user[task.get('userId')][task['id']] = task
+                self._user_ids[task.get('userId')].append(task['id'])
+                scheduled = parse_scheduled_for(task.get('scheduledFor'))
+                if scheduled:
+                    self._scheduled[task['id']] = scheduled
+            for ids in self._user_ids.values():
+                ids.sort()
+            self._time_index = sorted((dt, task_id) for task_id, dt in self._scheduled.items())
+
+    def add(self, task):
+        """Add a task (replacing any task with the same id)"""
+        with self._lock:
+            if task['id'] in self._tasks:
+                self.remove(task['id'])
+            self._tasks[task['id']] = task
+            self._by_user[task.get('userId')][task['id']] = task
+            insort(self._user_ids[task.get('userId')], task['id'])
+            self._index_time(task)
+            return task
+
+    def get(self, task_id):
+        """Get a task by id, or None"""
+        return self._tasks.get(task_id)
+
+    def update(self, task_id, updates):
+        """Apply updates to a task, keeping indexes in sync; returns the task or None"""
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return None
+
+            if 'userId' in updates and updates['userId'] != task.get('userId'):
+                self._by_user[task.get('userId')].pop(task_id, None)
+                self._unindex_user(task.get('userId'), task_id)
+                self._by_user[updates['userId']][task_id] = task
+                insort(self._user_ids[updates['userId']], task_id)
+
+            task.update(updates)
+
+            if 'scheduledFor' in updates:
+                self._unindex_time(task_id)
+                self._index_time(task)
+            return task
+
+    def remove(self, task_id):
+        """Remove a task; returns it, or None if it did not exist"""
+        with self._lock:
+            task = self._tasks.pop(task_id, None)
+            if task is None:
+                return None
+            partition = self._by_user.get(task.get('userId'))
+            if partition is not None:
+                partition.pop(task_id, None)
+                if not partition:
+                    del self._by_user[task.get('userId')]
+            self._unindex_user(task.get('userId'), task_id)
+            self._unindex_time(task_id)
+            return task
+
+    def all(self, user_id=None, all_users=False):
+        """Tasks in creation order, for one user partition or for everyone"""
+        with self._lock:
+            if all_users:
+                return list(self._tasks.values())
+            return list(self._by_user.get(user_id, {}).values())
+
+    def page(self, user_id, limit, before_id=None):
+        """Up to limit of a user's tasks with ids below before_id, newest (highest id) first"""
+        with self._lock:
+            ids = self._user_ids.get(user_id, [])
+            end = bisect_left(ids, before_id) if before_id is not None else len(ids)
+            return [self._tasks[task_id] for task_id in reversed(ids[max(0, end - limit):end])]
+
+    def upcoming(self, start, end, include_completed=False):
+        """Tasks scheduled within [start, end], ordered by scheduled time"""
+        with self._lock:
+            lo = bisect_left(self._time_index, (start,))
+            hi = bisect_right(self._time_index, (end, float('inf')))
+            tasks = (self._tasks[task_id] for _, task_id in self._time_index[lo:hi])
+            return [task for task in tasks if include_completed or not task.get('completed')]
+
+    def scheduled_at(self, task_id):
+        """Parsed scheduled datetime of a task, or None"""
+        return self._scheduled.get(task_id)
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def __contains__(self, task_id):
+        return task_id in self._tasks
+
+    def _index_time(self, task):
+        scheduled = parse_scheduled_for(task.get('scheduledFor'))
+        if scheduled:
+            self._scheduled[task['id']] = scheduled
+            insort(self._time_index, (scheduled, task['id']))
+
+    def _unindex_user(self, user_id, task_id):
+        ids = self._user_ids.get(user_id)
+        if not ids:
+            return
+        index = bisect_left(ids, task_id)
+        if index < len(ids) and ids[index] == task_id:
+            del ids[index]
+        if not ids:
+            del self._user_ids[user_id]
+
+    def _unindex_time(self, task_id):
+        scheduled = self._scheduled.pop(task_id, None)
+        if scheduled is None:
+            return
+        index = bisect_left(self._time_index, (scheduled, task_id))
+        if index < len(self._time_index) and self._time_index[index] == (scheduled, task_id):
+            del self._time_index[index]
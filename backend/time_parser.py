@@ -0,0 +1,178 @@
+"""
+Time Parser for JARVIS
+Pulls the time out of natural-language task commands ("remind me to call mom
+tomorrow at 5pm") with one precompiled regex: a single scan finds every time
+phrase and trigger phrase, and the task text is what is left over.
+
+When there are several clock times ("take the 5 pm train at 4 pm"), the one
+introduced by "at"/"by" is the reminder time, else the last one; the others
+stay in the task text.
+"""
+
+import re
+from datetime import datetime, timedelta
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+# Seconds per relative unit, keyed by the unit's first letters
+UNIT_SECONDS = {'sec': 1, 'min': 60, 'hou': 3600, 'hr': 3600, 'day': 86400, 'wee': 604800}
+
+DEFAULT_HOUR = 9  # for a date without a time ("tomorrow", "next monday")
+
+_UNIT = r'(?:seconds?|secs?|minutes?|mins?|hours?|hrs?|days?|weeks?)'
+_AMOUNT = r'(?:\d+|an?)'
+
+# Every alternative but the trigger starts a word with one of a few letters
+# or a digit, so the scan skips other positions after one or two checks
+TIME_PATTERN = re.compile(rf"""
+    (?P<trigger>\A\s*(?:remind\s+me\s+to|remind\s+me|set\s+a\s+reminder\s+(?:to|for)|set\s+reminder\s+to
+                     |create\s+(?:a\s+)?task\s+to|add\s+(?:a\s+)?task\s+to|schedule|task:|task)\s+)
+  | \b(?=[abdfimnopstw\d])(?:
+      (?P<relative>(?:in|after)\s+{_AMOUNT}\s*{_UNIT}\b(?:(?:\s*,\s*|\s+and\s+|\s+){_AMOUNT}\s*{_UNIT}\b)*)
+    | (?P<iso>(?:(?:on|at|by)\s+)?(?P<iso_date>\d{{4}}-\d{{2}}-\d{{2}})
+              (?:[t\s](?P<iso_hour>\d{{1,2}}):(?P<iso_minute>\d{{2}})(?::\d{{2}})?)?\b)
+    | (?P<clock>(?:(?:at|by)\s+)?(?P<hour>\d{{1,2}})(?::(?P<minute>\d{{2}}))?\s*(?P<period>[ap])\.?m\b\.?)
+    | (?P<clock24>(?:at|by)\s+(?P<hour24>\d{{1,2}})(?::(?P<minute24>\d{{2}}))?\b)
+    | (?P<named>(?:(?:at|by)\s+)?(?P<named_time>noon|midnight)\b)
+    | (?P<day_after>(?:the\s+)?day\s+after\s+tomorrow\b)
+    | (?P<tomorrow>tomorrow\b)
+    | (?P<today>(?:today|tonight)\b)
+    | (?P<next_week>next\s+week\b)
+    | (?P<weekday>(?:on\s+|next\s+|this\s+)?(?P<day>{'|'.join(WEEKDAYS)})\b)
+    | (?P<suffix>(?:for\s+me|please)\s*$)
+  )
+""", re.IGNORECASE | re.VERBOSE)
+
+RELATIVE_PART = re.compile(rf'({_AMOUNT})\s*({_UNIT})', re.IGNORECASE)
+LEADING_TO = re.compile(r'^to\s+', re.IGNORECASE)
+
+
+def _relative_delta(text):
+    seconds = 0
+    for amount, unit in RELATIVE_PART.findall(text):
+        count = 1 if amount.lower() in ('a', 'an') else int(amount)
+        unit = unit.lower()
+        seconds += count * UNIT_SECONDS[unit[:2] if unit.startswith('hr') else unit[:3]]
+    return timedelta(seconds=seconds)
+
+
+def _hour_24(hour, period):
+    """Convert a 12-hour clock hour to 24-hour; None if it isn't one"""
+    if not 1 <= hour <= 12:
+        return None
+    if period == 'p':
+        return hour if hour == 12 else hour + 12
+    return 0 if hour == 12 else hour
+
+
+def parse_task_command(command, now=None):
+    """Split a task command into (task text, scheduled datetime or None)"""
+    now = now or datetime.now()
+    relative = None
+    exact = None        # full datetime given (ISO date and time)
+    date = None         # (date, roll over to tomorrow if the time has passed)
+    clock = None        # (hour, minute)
+    clocks = []         # (anchored by at/by, (hour, minute), span) for every clock time
+    bare_clock = None   # "at 5": only a time if a date goes with it
+    bare_span = None
+    spans = []          # spans of the command to drop from the task text
+    trigger = False
+
+    for match in TIME_PATTERN.finditer(command):
+        kind = match.lastgroup
+        if kind == 'relative':
+            relative = relative or _relative_delta(match.group())
+        elif kind == 'iso':
+            try:
+                day = datetime.strptime(match.group('iso_date'), '%Y-%m-%d')
+            except ValueError:
+                continue  # not a real date
+            if match.group('iso_hour'):
+                hour, minute = int(match.group('iso_hour')), int(match.group('iso_minute'))
+                if hour > 23 or minute > 59:
+                    continue
+                exact = exact or day.replace(hour=hour, minute=minute)
+            else:
+                date = date or (day.date(), False)
+        elif kind == 'clock':
+            hour = _hour_24(int(match.group('hour')), match.group('period').lower())
+            minute = int(match.group('minute') or 0)
+            if hour is None or minute > 59:
+                continue
+            clocks.append((match.group()[:2].lower() in ('at', 'by'), (hour, minute), match.span()))
+            continue  # chosen once every clock time is known
+        elif kind == 'clock24':
+            hour, minute = int(match.group('hour24')), int(match.group('minute24') or 0)
+            if hour > 23 or minute > 59:
+                continue
+            if match.group('minute24'):
+                clocks.append((True, (hour, minute), match.span()))
+                continue
+            elif bare_clock is None:
+                bare_clock, bare_span = (hour, minute), match.span()
+                continue  # decided once we know whether there is a date
+        elif kind == 'named':
+            named = (12, 0) if match.group('named_time').lower() == 'noon' else (0, 0)
+            clocks.append((match.group()[:2].lower() in ('at', 'by'), named, match.span()))
+            continue
+        elif kind == 'day_after':
+            date = date or ((now + timedelta(days=2)).date(), False)
+        elif kind == 'tomorrow':
+            date = date or ((now + timedelta(days=1)).date(), False)
+        elif kind == 'today':
+            date = date or (now.date(), True)
+        elif kind == 'next_week':
+            date = date or ((now + timedelta(days=7 - now.weekday())).date(), False)
+        elif kind == 'weekday':
+            days_ahead = WEEKDAYS.index(match.group('day').lower()) - now.weekday()
+            if days_ahead <= 0:
+                days_ahead += 7
+            date = date or ((now + timedelta(days=days_ahead)).date(), False)
+        elif kind == 'trigger':
+            trigger = True
+        spans.append(match.span())
+
+    if clocks:
+        # Prefer the time introduced by at/by, else the last one; only that one leaves the task text
+        _, clock, clock_span = ([entry for entry in clocks if entry[0]] or clocks)[-1]
+        spans.append(clock_span)
+    elif date and bare_clock:
+        clock = bare_clock
+        spans.append(bare_span)
+    spans.sort()
+
+    if relative:
+        scheduled = now + relative
+    elif exact:
+        scheduled = exact
+    elif clock:
+        day, rolls = date or (now.date(), True)
+        scheduled = datetime.combine(day, datetime.min.time()).replace(hour=clock[0], minute=clock[1])
+        # If the time has passed today, schedule for tomorrow
+        if rolls and scheduled < now:
+            scheduled += timedelta(days=1)
+    elif date:
+        day, is_today = date
+        if is_today:
+            scheduled = now + timedelta(hours=1)  # today/tonight with no time
+        else:
+            scheduled = datetime.combine(day, datetime.min.time()).replace(hour=DEFAULT_HOUR)
+    else:
+        scheduled = None
+
+    # Task text is whatever the time and trigger phrases didn't cover
+    parts = []
+    position = 0
+    for start, end in spans:
+        parts.append(command[position:start])
+        position = end
+    parts.append(command[position:])
+    task_text = ' '.join(' '.join(parts).split())
+    if trigger:
+        task_text = LEADING_TO.sub('', task_text)  # "remind me at 5pm to ..."
+
+    # Capitalize first letter
+    if task_text:
+        task_text = task_text[0].upper() + task_text[1:]
+
+    return task_text, scheduled
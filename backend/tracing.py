@@ -0,0 +1,245 @@
+"""
+Request tracing for JARVIS
+Spans around the stages of a request, tracked in a contextvar so nested calls
+attach to the right request (hand work to an executor with
+contextvars.copy_context().run to keep it in the trace). Every request gets a
+Server-Timing breakdown; a sample of traces, plus every slow one, is written
+to a local file as OpenTelemetry (OTLP JSON) lines.
+"""
+
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+
+from logger import get_logger
+
+logger = get_logger('tracing')
+
+_current_span = contextvars.ContextVar('jarvis_current_span', default=None)
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_ERROR = 2
+
+
+class Span:
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'kind', 'attributes', 'start_ns', 'end_ns', 'error')
+
+    def __init__(self, trace, name, parent_id=None, kind=SPAN_KIND_INTERNAL, attributes=None):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def end(self):
+        self.end_ns = time.time_ns()
+
+    @property
+    def duration_ms(self):
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns or self.start_ns),
+            'attributes': [_otlp_attribute(key, value) for key, value in self.attributes.items()]
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        if self.error:
+            span['status'] = {'code': STATUS_ERROR, 'message': self.error}
+        return span
+
+
+class Trace:
+    """All spans of one request; the first span is the root"""
+
+    def __init__(self, name, attributes=None):
+        self.trace_id = os.urandom(16).hex()
+        self.spans = []
+        self.root = Span(self, name, kind=SPAN_KIND_SERVER, attributes=attributes)
+        self.spans.append(self.root)
+
+    def server_timing(self):
+        """Server-Timing header value: time per stage (repeats summed), then the total"""
+        stages = {}
+        for span in self.spans[1:]:
+            if span.end_ns is None:
+                continue
+            total, calls = stages.get(span.name, (0.0, 0))
+            stages[span.name] = (total + span.duration_ms, calls + 1)
+        entries = []
+        for name, (total, calls) in stages.items():
+            entry = f'{_token(name)};dur={total:.1f}'
+            entries.append(entry + f';desc="{calls} calls"' if calls > 1 else entry)
+        entries.append(f'total;dur={self.root.duration_ms:.1f}')
+        return ', '.join(entries)
+
+    def to_otlp(self, service_name):
+        return {'resourceSpans': [{
+            'resource': {'attributes': [_otlp_attribute('service.name', service_name)]},
+            'scopeSpans': [{
+                'scope': {'name': 'jarvis.tracing'},
+                'spans': [span.to_otlp() for span in self.spans]
+            }]
+        }]}
+
+
+class _SpanScope:
+    __slots__ = ('name', 'attributes', 'span', 'token')
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.span = None
+
+    def __enter__(self):
+        parent = _current_span.get()
+        if parent is None:
+            return None
+        self.span = Span(parent.trace, self.name, parent.span_id, attributes=self.attributes)
+        parent.trace.spans.append(self.span)
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.span is not None:
+            self.span.end()
+            if exc_type is not None:
+                self.span.error = f'{exc_type.__name__}: {exc}'
+            _current_span.reset(self.token)
+        return False
+
+
+def span(name, **attributes):
+    """Context manager timing a stage of the current request (a no-op outside one)"""
+    return _SpanScope(name, attributes)
+
+
+def current_trace():
+    """The trace of the current request, or None"""
+    current = _current_span.get()
+    return current.trace if current else None
+
+
+def start_trace(name, **attributes):
+    """Start a request's trace; returns (trace, token) for end_trace"""
+    trace = Trace(name, attributes)
+    return trace, _current_span.set(trace.root)
+
+
+def end_trace(trace, token, status_code=None):
+    """Finish a request's trace and hand it to the exporter"""
+    trace.root.end()
+    if status_code is not None:
+        trace.root.attributes['http.status_code'] = status_code
+        if status_code >= 500:
+            trace.root.error = f'HTTP {status_code}'
+    try:
+        _current_span.reset(token)
+    except ValueError:
+        # Ended from a different context than it started in
+        _current_span.set(None)
+    trace_exporter.export(trace)
+
+
+class TraceExporter:
+    """Writes sampled traces as OTLP JSON lines from a background thread
+
+    sample_rate: fraction of traces kept
+    slow_ms: traces at least this slow are always kept (0 disables)
+    """
+
+    def __init__(self, path, sample_rate=0.01, slow_ms=1000, max_queue=1000, service_name='jarvis-backend'):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.service_name = service_name
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.exported = 0
+        self.dropped = 0
+
+    def export(self, trace):
+        slow = self.slow_ms and trace.root.duration_ms >= self.slow_ms
+        if not (slow or random.random() < self.sample_rate):
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(trace)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 100:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    for trace in batch:
+                        f.write(json.dumps(trace.to_otlp(self.service_name), separators=(',', ':')) + '\n')
+                self.exported += len(batch)
+            except Exception as e:
+                logger.error("Error writing traces: %s", e)
+
+    def get_stats(self):
+        return {
+            'path': self.path,
+            'sample_rate': self.sample_rate,
+            'slow_ms': self.slow_ms,
+            'exported': self.exported,
+            'dropped': self.dropped,
+            'queued': self._queue.qsize()
+        }
+
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        typed = {'boolValue': value}
+    elif isinstance(value, int):
+        typed = {'intValue': str(value)}
+    elif isinstance(value, float):
+        typed = {'doubleValue': value}
+    else:
+        typed = {'stringValue': str(value)}
+    return {'key': key, 'value': typed}
+
+
+def _token(name):
+    """Server-Timing metric names are HTTP tokens"""
+    return ''.join(c if c.isalnum() or c in '.-_' else '_' for c in name)
+
+
+# Global exporter
+trace_exporter = TraceExporter(
+    os.getenv('TRACE_FILE', 'traces.jsonl'),
+    sample_rate=float(os.getenv('TRACE_SAMPLE_RATE', '0.01')),
+    slow_ms=float(os.getenv('TRACE_SLOW_MS', '1000'))
+)